@@ -162,7 +162,7 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "5000/day"},
     "DEFAULT_RENDERER_CLASSES": (
-        "djangorestframework_camel_case.render.CamelCaseJSONRenderer",
+        "core.renderers.CamelCaseJSONRenderer",
         "djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer",
     ),
     "DEFAULT_PARSER_CLASSES": (
@@ -192,9 +192,79 @@ LOGGING = {
 
 SERVER_LEASE_DEFAULT_DAYS = 14
 SERVER_LEASE_REMINDER_DAYS = [0, 1, 3, 5]
+# Send each user a single reminder email listing all their due leases, rather than one email per lease
+SERVER_LEASE_REMINDER_DIGEST = True
+# Reminders & shelving are triggered by per-lease timers (see openstack.lease_timers), rather than by polling
+SERVER_LEASE_TIMERS = True
+# Servers with overdue leases are automatically shelved (see openstack.shelving)
+SERVER_LEASE_AUTO_SHELVE = True
+# Maximum concurrent shelve requests per region
+SERVER_SHELVING_REGION_CONCURRENCY = 4
+SERVER_SHELVING_MAX_ATTEMPTS = 3
+SERVER_SHELVING_RETRY_SECONDS = 5 * 60
+# Shelved status is checked at this interval (up to SERVER_SHELVING_MAX_CONFIRM_CHECKS times) after shelving
+SERVER_SHELVING_CONFIRM_SECONDS = 30
+SERVER_SHELVING_MAX_CONFIRM_CHECKS = 20
+# Lease reconciliation (see openstack.reconciliation) is aborted, logging an error, if it would mark more than this
+# fraction of a region's active leases deleted (beyond the allowance), e.g. after an incomplete server listing
+SERVER_LEASE_RECONCILIATION_MAX_DELETED_FRACTION = 0.5
+SERVER_LEASE_RECONCILIATION_DELETED_ALLOWANCE = 5
 LICENCE_TERMINATION_DAYS = 90
 LICENCE_RENEWAL_REMINDER_DAYS = [3, 7, 14, 28]
 
+# Openstack
+
+# Pooled keystone tokens are refreshed this many seconds before they expire
+OPENSTACK_SESSION_EXPIRY_MARGIN_SECONDS = 300
+
+# Openstack requests time out after this many seconds (connect or read)
+OPENSTACK_REQUEST_TIMEOUT_SECONDS = 30
+
+# Requests to a region's service fail fast after this many consecutive failures, until a probe request
+# (allowed after the reset interval) succeeds (see openstack.circuit_breaker)
+OPENSTACK_CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+OPENSTACK_CIRCUIT_BREAKER_RESET_SECONDS = 30
+
+# Maximum number of concurrent openstack requests, when fanning out across a team's tenants
+OPENSTACK_MAX_CONCURRENT_REQUESTS = 8
+
+# Maximum page size (limit query parameter) for instance & volume lists, as nova's default max_limit
+OPENSTACK_LIST_MAX_LIMIT = 1000
+
+# Instance & volume statuses are polled at this interval, for server-sent event streams
+OPENSTACK_STATUS_POLL_SECONDS = 5
+
+# Boot volume availability is checked at this interval, up to a maximum number of checks, when launching servers
+SERVER_PROVISIONING_POLL_SECONDS = 5
+SERVER_PROVISIONING_MAX_VOLUME_CHECKS = 60
+
+# Flavor, image & volume type catalogs are cached per region (see openstack.catalog), using the default cache
+OPENSTACK_CATALOG_CACHE_TTL_SECONDS = 60 * 60
+OPENSTACK_CATALOG_CACHE_STALE_SECONDS = 60 * 60 * 24
+
+# Tenants' own flavors & images (e.g. private snapshots) are cached per tenant for this time (see openstack.catalog)
+OPENSTACK_PROJECT_CATALOG_CACHE_SECONDS = 5 * 60
+
+# Servers are mirrored locally (see openstack.snapshots), with a full (rather than incremental) sync at this interval
+SERVER_SNAPSHOT_FULL_SYNC_HOURS = 24
+
+# SPA bootstrap data is cached per user (see home.bootstrap), invalidated on changes & expiring after this time
+FRONTEND_BOOTSTRAP_CACHE_SECONDS = 10 * 60
+
+# Outbound email queue (see core.outbox)
+
+# Due messages are flushed every minute, or as soon as a batch is full
+OUTBOX_FLUSH_BATCH_SIZE = 50
+# Matches the mail relay's limit
+OUTBOX_RATE_LIMIT_PER_MINUTE = 100
+# Failed sends are retried with exponential backoff (from this delay), up to OUTBOX_MAX_ATTEMPTS
+OUTBOX_RETRY_DELAY_SECONDS = 60
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETENTION_DAYS = 30
+
+# Redis database for the cache (see CACHES, below), separate from huey's (database 0)
+REDIS_CACHE_URL = "redis://127.0.0.1:6379/1"
+
 # Local secrets
 try:
     from .locals import *  # noqa: F401,F403
@@ -214,6 +284,20 @@ HUEY = {
     "consumer": {"workers": 2},
 }
 
+# Cache
+
+# Shared by web workers & the huey consumer (catalogs, circuit breakers, metrics, bootstrap data & task locks),
+# so redis (as for huey). With DEBUG, tasks run immediately in the web process, so a local memory cache suffices
+if DEBUG:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+        }
+    }
+
 # TinyMCE
 
 TINYMCE_DEFAULT_CONFIG = {
@@ -0,0 +1,34 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        "subject",
+        "recipients",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "created_at",
+        "sent_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("subject", "recipients", "dedupe_key")
+    readonly_fields = ("dedupe_key", "created_at", "sent_at")
+    actions = ["retry_now"]
+
+    def retry_now(self, request, queryset):
+        """
+        Admin action: requeue messages for an immediate send attempt (including failed messages)
+        """
+        updated = queryset.exclude(status=OutboxMessage.Status.SENT).update(
+            status=OutboxMessage.Status.QUEUED,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} message(s) requeued")
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -36,6 +36,8 @@ urlpatterns = [
         openstack_views.KeyPairDetailView.as_view(),
         name="key_pairs",
     ),
+    # {% url "api:metrics" %}
+    path("metrics/", core_views.MetricsView.as_view(), name="metrics"),
     # {%url "api:messages" % }
     path("messages/", core_views.MessagesListView.as_view(), name="messages"),
     # {% url "api:tenants" team_id=team.id %}
@@ -44,12 +46,24 @@ urlpatterns = [
         openstack_views.TenantListView.as_view(),
         name="tenants",
     ),
+    # {% url "api:team_instances" team_id=team.id %}
+    path(
+        "teams/<hashids:team_id>/instances/",
+        openstack_views.TeamInstanceListView.as_view(),
+        name="team_instances",
+    ),
     # {% url "api:instances" team_id=team.id tenant_id=tenant.id %}
     path(
         "teams/<hashids:team_id>/tenants/<hashids:tenant_id>/instances/",
         openstack_views.InstanceListView.as_view(),
         name="instances",
     ),
+    # {% url "api:instance_jobs" team_id=team.id tenant_id=tenant.id pk=job.id %}
+    path(
+        "teams/<hashids:team_id>/tenants/<hashids:tenant_id>/instances/jobs/<uuid:pk>",
+        openstack_views.ServerProvisioningJobDetailView.as_view(),
+        name="instance_jobs",
+    ),
     # {% url "api:instances" team_id=team.id tenant_id=tenant.id pk=instance.id %}
     path(
         "teams/<hashids:team_id>/tenants/<hashids:tenant_id>/instances/<str:pk>",
@@ -92,6 +106,18 @@ urlpatterns = [
         openstack_views.VolumeTypeListView.as_view(),
         name="volume_types",
     ),
+    # {% url "api:launch_context" team_id=team.id tenant_id=tenant.id %}
+    path(
+        "teams/<hashids:team_id>/tenants/<hashids:tenant_id>/launch-context/",
+        openstack_views.LaunchContextView.as_view(),
+        name="launch_context",
+    ),
+    # {% url "api:tenant_events" team_id=team.id tenant_id=tenant.id %}
+    path(
+        "teams/<hashids:team_id>/tenants/<hashids:tenant_id>/events/",
+        openstack_views.TenantStatusEventsView.as_view(),
+        name="tenant_events",
+    ),
     # {% url "api:team" team_id=team.id %}
     path(
         "teams/<hashids:team_id>", userdb_views.TeamDetailView.as_view(), name="teams",
@@ -1,8 +1,11 @@
 from django.contrib.messages import get_messages
 
+from rest_framework import permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from .metrics import registry
+from .renderers import PrometheusTextRenderer
 from .serializers import MessageSerializer
 
 
@@ -16,3 +19,18 @@ class MessagesListView(APIView):
             [message for message in get_messages(request)], many=True
         )
         return Response(serialized_messages.data)
+
+
+class MetricsView(APIView):
+    """
+    Staff only metrics endpoint (prometheus text format), merged from all web & task worker processes.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    renderer_classes = [PrometheusTextRenderer]
+    throttle_classes = []  # Scraped frequently
+
+    def get(self, request):
+        response = Response(registry.render())
+        response["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+        return response
@@ -0,0 +1,167 @@
+"""
+In-process metrics (latency histograms), exposed in the prometheus text format (see api_views.MetricsView).
+
+Each process (gunicorn or huey worker) aggregates its own observations, and publishes a snapshot to the
+django cache at most every PUBLISH_INTERVAL_SECONDS. The metrics endpoint merges snapshots from all
+processes, so if the cache is shared (e.g. redis), metrics cover all web & task workers.
+"""
+
+import bisect
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PUBLISH_INTERVAL_SECONDS = 15
+
+# Snapshots from processes that have stopped publishing (e.g. restarted workers) expire after this time
+SNAPSHOT_TIMEOUT_SECONDS = 60 * 60
+
+PROCESSES_KEY = "metrics:processes"
+
+SUCCESS = "success"
+ERROR = "error"
+
+
+class Histogram:
+    """
+    Histogram of observations (in seconds), by label values.
+    Values are held as {label values: [count per bucket (non-cumulative, including +Inf), sum]}.
+    """
+
+    def __init__(
+        self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS, registry=None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[labelname]) for labelname in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            values[index] += 1
+            values[-1] += value
+        if self.registry:
+            self.registry.publish()
+
+    @contextmanager
+    def time(self, **labels):
+        """Time a block, with an 'outcome' label of 'success' or 'error' (if an exception is raised)"""
+        start = time.perf_counter()
+        outcome = SUCCESS
+        try:
+            yield
+        except Exception:
+            outcome = ERROR
+            raise
+        finally:
+            self.observe(time.perf_counter() - start, outcome=outcome, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(values) for key, values in self._values.items()}
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+def escape_label_value(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._last_published = 0
+        self.process_key = f"metrics:process:{socket.gethostname()}:{os.getpid()}"
+
+    def histogram(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        """
+        Return a registered histogram, registering it if required.
+        Histograms should be registered at import, so that snapshots from other processes can be rendered.
+        """
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(
+                    name, documentation, labelnames, buckets, registry=self
+                )
+            return self._metrics[name]
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def publish(self, force=False):
+        """Publish a snapshot of this process' metrics to the cache (at most every PUBLISH_INTERVAL_SECONDS)"""
+        now = time.monotonic()
+        if not force and now - self._last_published < PUBLISH_INTERVAL_SECONDS:
+            return
+        self._last_published = now
+        cache.set(self.process_key, self.snapshot(), timeout=SNAPSHOT_TIMEOUT_SECONDS)
+        processes = cache.get(PROCESSES_KEY, set())
+        if self.process_key not in processes:
+            cache.set(PROCESSES_KEY, processes | {self.process_key}, timeout=None)
+
+    def collect(self):
+        """Return snapshots from all processes, merged by metric & label values"""
+        self.publish(force=True)
+        process_keys = cache.get(PROCESSES_KEY, set())
+        snapshots = cache.get_many(process_keys)
+        # Forget processes whose snapshots have expired
+        if len(snapshots) < len(process_keys):
+            cache.set(PROCESSES_KEY, set(snapshots), timeout=None)
+
+        merged = {name: {} for name in self._metrics}
+        for snapshot in snapshots.values():
+            for name, values in snapshot.items():
+                metric_values = merged.setdefault(name, {})
+                for key, counts in values.items():
+                    if key in metric_values:
+                        metric_values[key] = [
+                            a + b for a, b in zip(metric_values[key], counts)
+                        ]
+                    else:
+                        metric_values[key] = list(counts)
+        return merged
+
+    def render(self):
+        """Render merged metrics in the prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, values in sorted(self.collect().items()):
+            metric = self._metrics.get(name)
+            if metric is None:  # Only registered in another process
+                continue
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, counts in sorted(values.items()):
+                labels = ",".join(
+                    f'{labelname}="{escape_label_value(value)}"'
+                    for labelname, value in zip(metric.labelnames, key)
+                )
+                separator = "," if labels else ""
+                cumulative = 0
+                for bucket, count in zip(metric.buckets + ("+Inf",), counts[:-1]):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{{labels}{separator}le="{bucket}"}} {cumulative}'
+                    )
+                lines.append(f"{name}_sum{{{labels}}} {counts[-1]}")
+                lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
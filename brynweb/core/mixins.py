@@ -0,0 +1,38 @@
+import hashlib
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+from rest_framework import status
+
+
+def get_etag(content):
+    """Return a (quoted) ETag for rendered response content"""
+    return quote_etag(hashlib.md5(content).hexdigest())
+
+
+class ConditionalETagMixin:
+    """
+    Mixin for API views, adding an ETag (hash of the rendered content) to successful GET responses.
+    Responds with 304 Not Modified (without content) when the ETag matches If-None-Match.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (
+            request.method in ("GET", "HEAD")
+            and response.status_code == status.HTTP_200_OK
+            and getattr(response, "data", None) is not None
+        ):
+            # Render now (rather than later, in the handler), to hash the content sent
+            response.render()
+            etag = get_etag(response.content)
+            if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+            if etag in if_none_match or "*" in if_none_match:
+                response.status_code = status.HTTP_304_NOT_MODIFIED
+                response.content = b""
+                del response["Content-Type"]
+            response["ETag"] = etag
+            # Responses are per-user; always revalidate with the server
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,53 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessageQuerySet(models.QuerySet):
+    def due(self):
+        """Queued messages ready for a (first or retry) send attempt, oldest first"""
+        return self.filter(
+            status=OutboxMessage.Status.QUEUED, next_attempt_at__lte=timezone.now()
+        ).order_by("next_attempt_at", "pk")
+
+    def sent_since(self, since):
+        return self.filter(status=OutboxMessage.Status.SENT, sent_at__gte=since)
+
+
+class OutboxMessage(models.Model):
+    """
+    Outbound email, queued for sending in batches by tasks.flush_outbox (see core.outbox)
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED"
+        SENT = "SENT"
+        FAILED = "FAILED"
+
+    # Messages with the same dedupe key are only queued once
+    dedupe_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField()
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+    sent_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    objects = OutboxMessageQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="outboxmessage_due_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"'{self.subject}' to {', '.join(self.recipients)} ({self.status})"
@@ -0,0 +1,138 @@
+"""
+Outbound email queue (outbox).
+
+Messages are queued as OutboxMessage rows, and sent in batches by tasks.flush_outbox: periodically, or as soon as
+OUTBOX_FLUSH_BATCH_SIZE messages are due. Each flush sends over a single SMTP connection, at most
+OUTBOX_RATE_LIMIT_PER_MINUTE messages per minute (to match the relay), retrying failed messages with backoff.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from huey.contrib.djhuey import HUEY
+
+from .models import OutboxMessage
+
+FLUSH_LOCK_KEY = "outbox:flushing"
+FLUSH_LOCK_TIMEOUT_SECONDS = 10 * 60
+
+
+def queue(
+    subject, message, from_email, recipient_list, html_message=None, dedupe_key=None
+):
+    """
+    Queue an email (arguments as django.core.mail.send_mail).
+    If dedupe_key is given, and a message with the same key has already been queued, nothing is queued.
+    Returns the queued message, or None for a duplicate.
+    """
+    if dedupe_key and OutboxMessage.objects.filter(dedupe_key=dedupe_key).exists():
+        return None
+
+    outbox_message = OutboxMessage(
+        dedupe_key=dedupe_key,
+        subject=subject,
+        body=message,
+        html_body=html_message or "",
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+    try:
+        with transaction.atomic():
+            outbox_message.save()
+    except IntegrityError:  # Queued concurrently, with the same dedupe key
+        return None
+
+    transaction.on_commit(flush_if_full)
+    return outbox_message
+
+
+def flush_if_full():
+    """
+    Enqueue a flush, if enough messages are due to fill a batch.
+    In immediate mode (i.e. DEBUG), periodic tasks don't run, so messages are flushed straight away.
+    """
+    from .tasks import flush_outbox  # Avoid circular import
+
+    if (
+        HUEY.immediate
+        or OutboxMessage.objects.due().count() >= settings.OUTBOX_FLUSH_BATCH_SIZE
+    ):
+        flush_outbox()
+
+
+def get_email(outbox_message, connection=None):
+    email = EmailMultiAlternatives(
+        outbox_message.subject,
+        outbox_message.body,
+        outbox_message.from_email,
+        outbox_message.recipients,
+        connection=connection,
+    )
+    if outbox_message.html_body:
+        email.attach_alternative(outbox_message.html_body, "text/html")
+    return email
+
+
+def get_retry_delay(attempts):
+    """Exponential backoff, from OUTBOX_RETRY_DELAY_SECONDS"""
+    return datetime.timedelta(
+        seconds=settings.OUTBOX_RETRY_DELAY_SECONDS * 2 ** (attempts - 1)
+    )
+
+
+def get_send_budget():
+    """Number of messages that may be sent now, within the rate limit (sliding one minute window)"""
+    since = timezone.now() - datetime.timedelta(minutes=1)
+    sent = OutboxMessage.objects.sent_since(since).count()
+    return max(settings.OUTBOX_RATE_LIMIT_PER_MINUTE - sent, 0)
+
+
+def flush():
+    """
+    Send due messages over a single SMTP connection, within the rate limit.
+    Only one flush runs at a time (others return immediately). Returns the number of messages sent.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, True, timeout=FLUSH_LOCK_TIMEOUT_SECONDS):
+        return 0
+
+    sent = 0
+    try:
+        outbox_messages = list(OutboxMessage.objects.due()[: get_send_budget()])
+        if not outbox_messages:
+            return 0
+
+        with get_connection() as connection:
+            for outbox_message in outbox_messages:
+                outbox_message.attempts += 1
+                try:
+                    get_email(outbox_message, connection).send()
+                except Exception as e:
+                    outbox_message.error = str(e)
+                    if outbox_message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                        outbox_message.status = OutboxMessage.Status.FAILED
+                    else:
+                        outbox_message.next_attempt_at = (
+                            timezone.now() + get_retry_delay(outbox_message.attempts)
+                        )
+                else:
+                    outbox_message.status = OutboxMessage.Status.SENT
+                    outbox_message.sent_at = timezone.now()
+                    outbox_message.error = ""
+                    sent += 1
+                outbox_message.save()
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    return sent
+
+
+def purge(days=None):
+    """Delete sent messages older than OUTBOX_RETENTION_DAYS"""
+    days = settings.OUTBOX_RETENTION_DAYS if days is None else days
+    return OutboxMessage.objects.filter(
+        status=OutboxMessage.Status.SENT,
+        sent_at__lt=timezone.now() - datetime.timedelta(days=days),
+    ).delete()
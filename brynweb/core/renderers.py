@@ -0,0 +1,157 @@
+import json
+
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.settings import api_settings as camel_case_settings
+from djangorestframework_camel_case.util import (
+    camelize_re,
+    is_iterable,
+    underscore_to_camel,
+)
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Optional, rendering falls back to json
+    orjson = None
+
+# Memoized snake_case -> camelCase keys, bounded since dict keys may be arbitrary data (e.g. server metadata)
+CAMEL_KEYS = {}
+CAMEL_KEYS_MAX_SIZE = 10000
+
+# Range of floats formatted identically by orjson & json (which switches to exponent notation outside it)
+ORJSON_FLOAT_RANGE = (1e-4, 1e16)
+ORJSON_INT_RANGE = (-(2**63), 2**64)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renderer for server-sent event stream views.
+    Streams are returned as StreamingHttpResponse (bypassing the renderer), so only errors are rendered,
+    as a single 'error' event.
+    """
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode(self.charset)
+
+
+class PrometheusTextRenderer(BaseRenderer):
+    """
+    Renderer for metrics, in the prometheus text exposition format (already rendered by the view).
+    """
+
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return str(data).encode(self.charset)  # i.e. error detail
+
+
+def camelize_key(key):
+    """As djangorestframework_camel_case.util.camelize, for a single (str) key"""
+    try:
+        return CAMEL_KEYS[key]
+    except KeyError:
+        camel_key = camelize_re.sub(underscore_to_camel, key) if "_" in key else key
+        if len(CAMEL_KEYS) < CAMEL_KEYS_MAX_SIZE:
+            CAMEL_KEYS[key] = camel_key
+        return camel_key
+
+
+class Camelizer:
+    """
+    Equivalent of djangorestframework_camel_case.util.camelize, with memoized key conversion.
+    Also records whether the camelized data is orjson safe, i.e. only has types (& values) that orjson renders
+    byte-for-byte identically to JSONRenderer.
+    """
+
+    def __init__(self, ignore_fields=None, **options):
+        self.ignore_fields = ignore_fields or ()
+        self.orjson_safe = True
+
+    def __call__(self, data):
+        data_type = type(data)
+        if data_type is str or data is None or data_type is bool:
+            return data
+        if isinstance(data, dict):
+            return self.camelize_dict(data)
+        if data_type is int:
+            if not ORJSON_INT_RANGE[0] <= data < ORJSON_INT_RANGE[1]:
+                self.orjson_safe = False
+            return data
+        if data_type is float:
+            if data and not ORJSON_FLOAT_RANGE[0] <= abs(data) < ORJSON_FLOAT_RANGE[1]:
+                self.orjson_safe = False  # Including nan & inf
+            return data
+        if isinstance(data, Promise):
+            return force_str(data)
+        if isinstance(data, str):
+            return data
+        if isinstance(data, (list, tuple)) or is_iterable(data):
+            return [self(item) for item in data]
+        self.orjson_safe = (
+            False  # e.g. datetime or Decimal, rendered by the JSONRenderer encoder
+        )
+        return data
+
+    def camelize_dict(self, data):
+        camelized = {}
+        for key, value in data.items():
+            if isinstance(key, Promise):
+                key = force_str(key)
+            if isinstance(key, str):
+                new_key = camelize_key(key)
+            else:
+                new_key = key
+                self.orjson_safe = (
+                    False  # Non-str keys are converted by json, but not orjson
+                )
+            if key in self.ignore_fields or new_key in self.ignore_fields:
+                camelized[new_key] = value
+                self.orjson_safe = False  # Not checked
+            else:
+                camelized[new_key] = self(value)
+        return camelized
+
+
+class CamelCaseJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for djangorestframework_camel_case's CamelCaseJSONRenderer, with byte-identical output.
+    Keys are converted with memoization (see Camelizer), and compact JSON is rendered with orjson when installed.
+    Anything orjson would render differently (e.g. exponent floats, or types handled by the JSONRenderer encoder)
+    falls back to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        camelizer = Camelizer(**camel_case_settings.JSON_UNDERSCOREIZE)
+        data = camelizer(data)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or not camelizer.orjson_safe
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data)
+        except orjson.JSONEncodeError:  # e.g. lone surrogates
+            return super().render(data, accepted_media_type, renderer_context)
+        # As JSONRenderer, escape unicode line/paragraph separators (invalid in javascript strings)
+        return ret.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
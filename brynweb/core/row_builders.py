@@ -0,0 +1,214 @@
+"""
+Compiled row builders: a read-only fast path for serializing large lists.
+
+serializer_class(objects, many=True).data runs get_attribute & to_representation for every field of every row.
+A row builder is a plain function, generated once per serializer class from its field declarations, building the same
+row dicts with inline attribute (or key) access & conversions, e.g. str(value) for CharField & UUIDField.
+Fields with constant values across a list (e.g. team & tenant) are represented once per list, rather than per row,
+and builders may be limited to a subset of fields (sparse fieldsets).
+
+Fields without an inline conversion (e.g. DateTimeField, or any overridden to_representation) call the field's own
+to_representation, and fields with dotted or '*' sources use the field's get_attribute, so output is unchanged.
+Rows are openstack objects or dicts, with plain (not callable) values: model instances, for which related fields use the
+pk only optimization, should use their serializer.
+"""
+
+from collections.abc import Mapping
+
+from rest_framework import fields, relations, serializers
+from rest_framework.fields import SkipField, empty
+from rest_framework.relations import PKOnlyObject
+
+from . import hashids
+from .serializers import HashidsFieldMixin, limit_fields
+
+# Compiled row builders, by serializer class, constant field names & fields, bounded since fields are requested by
+# clients (builders are still compiled beyond it, but not memoized)
+ROW_BUILDERS = {}
+ROW_BUILDERS_MAX_SIZE = 1000
+
+
+def get_inline_conversion(field):
+    """
+    Return an expression template ({} for the value) converting a value as field.to_representation,
+    or None if there isn't one
+    """
+    to_representation = type(field).to_representation
+    if to_representation is HashidsFieldMixin.to_representation and isinstance(
+        field, fields.IntegerField
+    ):
+        return "encode(int({}))"
+    if to_representation is fields.IntegerField.to_representation:
+        return "int({})"
+    if to_representation is fields.CharField.to_representation:
+        return "str({})"
+    if (
+        to_representation is fields.UUIDField.to_representation
+        and field.uuid_format == "hex_verbose"
+    ):
+        return "str({})"
+    return None
+
+
+def is_plain_source(field):
+    """Whether a field's value is a single attribute (or key) of a row, fetched by the default get_attribute"""
+    get_attribute = type(field).get_attribute
+    return len(field.source_attrs) == 1 and (
+        get_attribute is fields.Field.get_attribute
+        or get_attribute is relations.RelatedField.get_attribute
+        or isinstance(field, serializers.BaseSerializer)
+    )
+
+
+class RowBuilderCompiler:
+    """Generates the source of row builder functions for a serializer (& its nested serializers)"""
+
+    def __init__(self):
+        self.lines = []
+        self.namespace = {
+            "Mapping": Mapping,
+            "PKOnlyObject": PKOnlyObject,
+            "SkipField": SkipField,
+            "encode": hashids.encode,
+        }
+
+    def add_name(self, prefix, value):
+        name = f"{prefix}_{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def get_conversion(self, field):
+        """Return an expression template ({} for the value) converting a value as field.to_representation"""
+        if isinstance(field, serializers.ListSerializer):
+            return f"[{self.compile(field.child)}(item) for item in {{}}]"
+        if isinstance(field, serializers.Serializer):
+            return f"{self.compile(field)}({{}})"
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            if field.pk_field is None:
+                return "{}.pk"
+            return self.get_conversion(field.pk_field).format("{}.pk")
+        conversion = get_inline_conversion(field)
+        if conversion is None:
+            conversion = f"{self.add_name('field', field)}.to_representation({{}})"
+        return conversion
+
+    def get_field_lines(self, field, name, conversion, lookup, missing_exception):
+        """Return the lines adding a field's value to row, as Serializer.to_representation"""
+        key = repr(field.field_name)
+        if not is_plain_source(field):
+            return [
+                "    try:",
+                f"        value = {name}.get_attribute(instance)",
+                "    except SkipField:",
+                "        pass",
+                "    else:",
+                "        if isinstance(value, PKOnlyObject):",
+                "            value = value.pk",
+                f"        row[{key}] = None if value is None else {conversion}",
+            ]
+
+        # As Field.get_attribute, for missing attributes (or keys)
+        if field.default is not empty:
+            on_missing = f"value = {name}.get_default()"
+        elif field.allow_null:
+            on_missing = "value = None"
+        elif not field.required:
+            on_missing = "value = SkipField"
+        else:
+            on_missing = f"value = {name}.get_attribute(instance)  # Raises"
+        return [
+            "    try:",
+            f"        value = {lookup.format(field.source_attrs[0])}",
+            f"    except {missing_exception}:",
+            f"        {on_missing}",
+            "    if value is not SkipField:",
+            f"        row[{key}] = None if value is None else {conversion}",
+        ]
+
+    def compile(self, serializer, constant_fields=()):
+        """Add row builder functions for a serializer, returning the name of the function building rows"""
+        readable_fields = [
+            (field, self.add_name("field", field), self.get_conversion(field))
+            for field in serializer._readable_fields
+        ]
+        name = self.add_name("build_row", None)
+        for kind, lookup, missing_exception in [
+            ("mapping", "instance[{!r}]", "KeyError"),
+            ("object", "instance.{}", "AttributeError"),
+        ]:
+            self.lines += [f"def {name}_{kind}(instance, constants):", "    row = {}"]
+            for field, field_name, conversion in readable_fields:
+                if field.field_name in constant_fields:
+                    key = repr(field.field_name)
+                    self.lines.append(f"    row[{key}] = constants[{key}]")
+                    continue
+                self.lines += self.get_field_lines(
+                    field,
+                    field_name,
+                    conversion.format("value"),
+                    lookup,
+                    missing_exception,
+                )
+            self.lines += ["    return row", ""]
+
+        self.lines += [
+            f"def {name}(instance, constants=None):",
+            "    if isinstance(instance, Mapping):",
+            f"        return {name}_mapping(instance, constants)",
+            f"    return {name}_object(instance, constants)",
+            "",
+        ]
+        return name
+
+
+def compile_row_builder(serializer_class, constant_fields=(), fields=None):
+    """
+    Generate a row builder for a serializer class: a function(instance, constants) returning a row dict,
+    with constant fields' (already represented) values taken from constants, and only fields named in fields
+    (if not None)
+    """
+    compiler = RowBuilderCompiler()
+    name = compiler.compile(limit_fields(serializer_class(), fields), constant_fields)
+    source = "\n".join(compiler.lines)
+    exec(
+        compile(source, f"<row builder: {serializer_class.__name__}>", "exec"),
+        compiler.namespace,
+    )
+    build_row = compiler.namespace[name]
+    build_row.source = source
+    return build_row
+
+
+def get_row_builder(serializer_class, constant_fields=(), fields=None):
+    """Return the (memoized) compiled row builder for a serializer class, constant field names & fields"""
+    key = (
+        serializer_class,
+        frozenset(constant_fields),
+        None if fields is None else frozenset(fields),
+    )
+    try:
+        return ROW_BUILDERS[key]
+    except KeyError:
+        build_row = compile_row_builder(serializer_class, constant_fields, fields)
+        if len(ROW_BUILDERS) < ROW_BUILDERS_MAX_SIZE:
+            ROW_BUILDERS[key] = build_row
+        return build_row
+
+
+def build_rows(serializer_class, objects, fields=None, **constants):
+    """
+    Return rows as serializer_class(objects, many=True).data would, for a read-only list.
+    If fields isn't None, rows only have the fields named (as a sparse fieldset).
+    constants are field values shared by every row (e.g. team=tenant.team_id), represented once.
+    """
+    serializer = serializer_class()
+    represented = {}
+    for field_name, value in constants.items():
+        if fields is not None and field_name not in fields:
+            continue
+        field = serializer.fields[field_name]
+        represented[field_name] = (
+            None if value is None else field.to_representation(value)
+        )
+    build_row = get_row_builder(serializer_class, represented, fields)
+    return [build_row(obj, represented) for obj in objects]
@@ -22,6 +22,14 @@ class HashidsIntegerField(HashidsFieldMixin, serializers.IntegerField):
     pass
 
 
+def limit_fields(serializer, fields=None):
+    """Remove fields other than those named (if fields isn't None) from a serializer, for sparse fieldsets"""
+    if fields is not None:
+        for field_name in set(serializer.fields) - set(fields):
+            serializer.fields.pop(field_name)
+    return serializer
+
+
 class MessageSerializer(serializers.Serializer):
     level = serializers.IntegerField()
     level_tag = serializers.CharField()
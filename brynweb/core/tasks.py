@@ -1,8 +1,56 @@
+import time
+
 from django.core.mail import send_mail as django_send_mail
 
-from huey.contrib.djhuey import task
+from huey import crontab
+from huey.contrib.djhuey import HUEY, db_periodic_task, db_task, task
+
+from . import outbox
+from .metrics import ERROR, SUCCESS, registry
+
+huey_task_seconds = registry.histogram(
+    "bryn_huey_task_seconds",
+    "Huey task executions, by task & outcome.",
+    ["task", "outcome"],
+)
+
+_task_start_times = {}
+
+
+@HUEY.pre_execute()
+def start_task_timer(task):
+    _task_start_times[task.id] = time.perf_counter()
+
+
+@HUEY.post_execute()
+def record_task_duration(task, task_value, exc):
+    start = _task_start_times.pop(task.id, None)
+    if start is not None:
+        huey_task_seconds.observe(
+            time.perf_counter() - start,
+            task=task.name,
+            outcome=ERROR if exc else SUCCESS,
+        )
 
 
 @task(retries=2, retry_delay=10)
 def send_mail(*args, **kwargs):
     django_send_mail(*args, **kwargs)
+
+
+@db_periodic_task(crontab(minute="*"))
+def flush_outbox_periodically():
+    """Send due outbox messages (see core.outbox)"""
+    outbox.flush()
+
+
+@db_task()
+def flush_outbox():
+    """Flush the outbox, when a full batch of messages is due"""
+    outbox.flush()
+
+
+@db_periodic_task(crontab(minute="30", hour="3"))
+def purge_outbox():
+    """Delete old sent outbox messages"""
+    outbox.purge()
@@ -0,0 +1,75 @@
+import smtplib
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import outbox
+from ..models import OutboxMessage
+
+
+def queue(n=0, **kwargs):
+    return outbox.queue(
+        f"Subject {n}",
+        "Body",
+        "bryn@example.com",
+        [f"user{n}@example.com"],
+        html_message="<main>Body</main>",
+        **kwargs,
+    )
+
+
+class TestOutbox(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_duplicate_messages_are_not_queued(self):
+        """Is a message with an already queued dedupe key ignored?"""
+        self.assertIsNotNone(queue(dedupe_key="reminder:1"))
+        self.assertIsNone(queue(dedupe_key="reminder:1"))
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_flush_sends_over_single_connection(self):
+        """Are all due messages sent over one SMTP connection, and marked as sent?"""
+        for n in range(3):
+            queue(n)
+        with mock.patch.object(
+            outbox, "get_connection", wraps=outbox.get_connection
+        ) as get_connection:
+            self.assertEqual(outbox.flush(), 3)
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], "<main>Body</main>")
+        self.assertFalse(OutboxMessage.objects.due().exists())
+
+    @override_settings(OUTBOX_RATE_LIMIT_PER_MINUTE=2)
+    def test_flush_respects_rate_limit(self):
+        """Are messages beyond the per-minute rate limit left queued?"""
+        for n in range(3):
+            queue(n)
+        self.assertEqual(outbox.flush(), 2)
+        self.assertEqual(outbox.flush(), 0)
+        self.assertEqual(OutboxMessage.objects.due().count(), 1)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY_SECONDS=60)
+    def test_failed_messages_are_retried_then_abandoned(self):
+        """Are failed sends retried later, until the maximum number of attempts?"""
+        message = queue()
+        with mock.patch(
+            "django.core.mail.EmailMessage.send",
+            side_effect=smtplib.SMTPException("Relay unavailable"),
+        ):
+            outbox.flush()
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutboxMessage.Status.QUEUED)
+            self.assertEqual(message.error, "Relay unavailable")
+            self.assertGreater(message.next_attempt_at, timezone.now())
+
+            OutboxMessage.objects.update(next_attempt_at=timezone.now())
+            outbox.flush()
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.Status.FAILED)
+        self.assertEqual(message.attempts, 2)
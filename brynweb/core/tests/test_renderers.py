@@ -0,0 +1,69 @@
+import datetime
+import decimal
+import uuid
+
+from django.test import SimpleTestCase
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext_lazy
+from djangorestframework_camel_case.render import (
+    CamelCaseJSONRenderer as LibraryCamelCaseJSONRenderer,
+)
+
+from ..renderers import CamelCaseJSONRenderer
+
+
+class TestCamelCaseJSONRenderer(SimpleTestCase):
+    def assertRendersIdentically(self, data, renderer_context=None):
+        self.assertEqual(
+            CamelCaseJSONRenderer().render(data, renderer_context=renderer_context),
+            LibraryCamelCaseJSONRenderer().render(
+                data, renderer_context=renderer_context
+            ),
+        )
+
+    def test_output_is_identical_to_library_renderer(self):
+        """Is output byte-identical to djangorestframework_camel_case, for nested data, unicode & edge values?"""
+        self.assertRendersIdentically(
+            {
+                "server_name": "server-1",
+                "flavor": {"vcpus_count": 8, "ram_mb": 16384, "is_public": True},
+                "addresses": [{"ip_4_address": "10.0.0.1"}, {"_private_ip": None}],
+                "metadata": {"__internal__": "a_b", "some-key": "ünïcødé ☃"},
+                "line_separators": "a b c",
+                "control": '\x00\x1f"\\',
+                "floats": [0.0, -1.5, 1e-4, 9.99e15, 1e16, 1e-5, 0.1 + 0.2],
+                "ints": [0, -(2**63), 2**64, -(2**70)],
+                "empty": [{}, [], ""],
+            }
+        )
+
+    def test_fallback_types_are_identical_to_library_renderer(self):
+        """Are types rendered by the JSONRenderer encoder (& non-str or lazy keys) identical?"""
+        self.assertRendersIdentically(
+            {
+                "created_at": datetime.datetime(2020, 1, 2, 3, 4, 5, 123456),
+                "price_amount": decimal.Decimal("1.10"),
+                "server_id": uuid.UUID(int=1),
+                1: "one",
+                gettext_lazy("lazy_key"): gettext_lazy("lazy_value"),
+                mark_safe("server_name"): 1,
+                "tuple_items": ({"nested_key": 1},),
+            }
+        )
+
+    def test_iterables_are_rendered_as_lists(self):
+        """Are generators rendered as lists?"""
+        self.assertEqual(
+            CamelCaseJSONRenderer().render({"generated_items": (n for n in range(3))}),
+            b'{"generatedItems":[0,1,2]}',
+        )
+
+    def test_indented_output_is_identical_to_library_renderer(self):
+        """Is indented output (e.g. ?indent=2 accept params) identical?"""
+        self.assertRendersIdentically(
+            {"server_name": "server-1", "ram_mb": [1, 2]}, {"indent": 2}
+        )
+
+    def test_none_renders_empty(self):
+        """Is None rendered as an empty response body?"""
+        self.assertEqual(CamelCaseJSONRenderer().render(None), b"")
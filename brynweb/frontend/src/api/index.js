@@ -14,15 +14,19 @@ const apiRoutes = {
   hypervisorStats: apiBase + "hypervisor-stats/",
   images: tenantBase + "images/",
   instances: tenantBase + "instances/",
+  instanceJobs: tenantBase + "instances/jobs/",
   invitations: teamBase + "invitations/",
   faqs: apiBase + "faqs/",
   flavors: tenantBase + "flavors/",
   keyPairs: apiBase + "keypairs/",
+  launchContext: tenantBase + "launch-context/",
   licenceAcceptances: teamBase + "licence-acceptances/",
   messages: apiBase + "messages/",
   serverLeaseRequest: instanceBase + "lease-requests/",
   teams: apiBase + "teams/",
+  teamInstances: teamBase + "instances/",
   teamMembers: teamBase + "members/",
+  tenantEvents: tenantBase + "events/",
   userProfile: apiBase + "userprofile/",
   volumes: tenantBase + "volumes/",
   volumeTypes: tenantBase + "volumetypes/",
@@ -8,6 +8,7 @@ export const SET_FILTER_TENANT = "SET_FILTER_TENANT";
 export const FETCH_ALL_TENANT_DATA = "FETCH_ALL_TENANT_DATA";
 export const FETCH_FAQS = "FETCH_FAQS";
 export const FETCH_HYPERVISOR_STATS = "FETCH_HYPERVISOR_STATS";
+export const FETCH_LAUNCH_CONTEXT = "FETCH_LAUNCH_CONTEXT";
 export const FETCH_TEAM = "FETCH_TEAM";
 export const FETCH_TEAM_SPECIFIC_DATA = "FETCH_TEAM_SPECIFIC_DATA";
 export const FETCH_TENANT_SPECIFIC_DATA = "FETCH_TENANT_SPECIFIC_DATA";
@@ -37,6 +38,7 @@ export const CREATE_INSTANCE = "CREATE_INSTANCE";
 export const DELETE_INSTANCE = "DELETE_INSTANCE";
 export const FETCH_INSTANCE = "FETCH_INSTANCE";
 export const FETCH_TENANT_INSTANCES = "FETCH_INSTANCES_FOR_TENANT";
+export const FETCH_TEAM_INSTANCES = "FETCH_INSTANCES_FOR_TEAM";
 export const REMOVE_INSTANCE_BY_ID = "REMOVE_INSTANCE_BY_ID";
 export const RENEW_INSTANCE_LEASE = "RENEW_INSTANCE_LEASE";
 export const TRANSITION_INSTANCE = "TRANSITION_INSTANCE";
@@ -51,6 +53,8 @@ export const FETCH_INVITATIONS = "FETCH_INVITATIONS";
 // Polling
 export const CREATE_POLLING_TARGET = "CREATE_POLLING_TARGET";
 export const FETCH_POLLING_TARGETS = "FETCH_POLLING_TARGETS";
+export const HANDLE_STATUS_EVENT = "HANDLE_STATUS_EVENT";
+export const UPDATE_FALLBACK_POLLING = "UPDATE_FALLBACK_POLLING";
 
 // Team Members
 export const DELETE_TEAM_MEMBER = "DELETE_TEAM_MEMBER";
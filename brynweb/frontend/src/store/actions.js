@@ -7,16 +7,13 @@ import {
   FETCH_ANNOUNCEMENTS,
   FETCH_FAQS,
   FETCH_HYPERVISOR_STATS,
+  FETCH_LAUNCH_CONTEXT,
   FETCH_INVITATIONS,
-  FETCH_KEY_PAIRS,
-  FETCH_TENANT_FLAVORS,
-  FETCH_TENANT_IMAGES,
   FETCH_TEAM,
+  FETCH_TEAM_INSTANCES,
   FETCH_TEAM_MEMBERS,
   FETCH_TEAM_SPECIFIC_DATA,
-  FETCH_TENANT_INSTANCES,
   FETCH_TENANT_SPECIFIC_DATA,
-  FETCH_TENANT_VOLUME_TYPES,
   FETCH_TENANT_VOLUMES,
   FETCH_USER,
   INIT_STORE,
@@ -37,7 +34,12 @@ import {
   SET_TEAM_INITIALIZED,
   MODIFY_TEAM,
   SET_FAQS,
+  SET_FLAVORS,
+  SET_IMAGES,
+  SET_KEY_PAIRS,
+  SET_QUOTAS,
   SET_USER,
+  SET_VOLUME_TYPES,
 } from "./mutation-types";
 
 const actions = {
@@ -47,12 +49,8 @@ const actions = {
     commit(INIT_REGIONS);
     commit(INIT_TEAMS);
     commit(INIT_USER);
-    await Promise.all([
-      dispatch(FETCH_KEY_PAIRS),
-      dispatch(FETCH_HYPERVISOR_STATS),
-      dispatch(FETCH_ANNOUNCEMENTS),
-      dispatch(FETCH_FAQS),
-    ]);
+    /* Key pairs & hypervisor stats are fetched with each tenant's launch context */
+    await Promise.all([dispatch(FETCH_ANNOUNCEMENTS), dispatch(FETCH_FAQS)]);
   },
 
   [SET_ACTIVE_TEAM]({ commit }, team) {
@@ -94,6 +92,46 @@ const actions = {
     commit(SET_HYPERVISOR_STATS, hypervisorStats);
   },
 
+  async [FETCH_LAUNCH_CONTEXT]({ commit, getters }, tenant) {
+    /* Fetch everything needed to launch an instance in a tenant, in a single request */
+    /* Sections that failed server-side are null, leaving the store unchanged, and are reported once committed */
+    const team = getters[TEAM];
+    const url = getAPIRoute("launchContext", team.id, tenant.id);
+    const response = await axios.get(url);
+    const launchContext = response.data;
+    const {
+      flavors,
+      images,
+      volumeTypes,
+      quotas,
+      keypairs,
+      hypervisorStats,
+      errors,
+    } = launchContext;
+    if (flavors) {
+      commit(SET_FLAVORS, { flavors, team, tenant });
+    }
+    if (images) {
+      commit(SET_IMAGES, { images, team, tenant });
+    }
+    if (volumeTypes) {
+      commit(SET_VOLUME_TYPES, { volumeTypes, team, tenant });
+    }
+    if (quotas) {
+      commit(SET_QUOTAS, { quotas, tenant });
+    }
+    commit(SET_KEY_PAIRS, keypairs);
+    commit(SET_HYPERVISOR_STATS, hypervisorStats);
+    if (Object.keys(errors).length) {
+      throw new Error(
+        Object.entries(errors)
+          .map(([section, detail]) => `${section}: ${detail}`)
+          .join(", ")
+      );
+    }
+    return launchContext;
+  },
+
   async [FETCH_TEAM]({ commit, state }) {
     const url = getAPIRoute("teams") + state.activeTeamId;
     const response = await axios.get(url);
@@ -102,13 +140,10 @@ const actions = {
   },
 
   async [FETCH_TENANT_SPECIFIC_DATA]({ dispatch, getters }, tenant) {
-    /* Fetch all tenant-specific data */
+    /* Fetch all tenant-specific data (catalogs, quotas etc. in a single launch context request) */
     try {
       await Promise.all([
-        dispatch(FETCH_TENANT_FLAVORS, tenant),
-        dispatch(FETCH_TENANT_IMAGES, tenant),
-        dispatch(FETCH_TENANT_INSTANCES, tenant),
-        dispatch(FETCH_TENANT_VOLUME_TYPES, tenant),
+        dispatch(FETCH_LAUNCH_CONTEXT, tenant),
         dispatch(FETCH_TENANT_VOLUMES, tenant),
       ]);
     } catch (err) {
@@ -154,11 +189,27 @@ const actions = {
       throw new Error(`The current team has no tenants.`);
     }
 
-    const results = await Promise.allSettled(
-      tenants.map((tenant) => dispatch(FETCH_TENANT_SPECIFIC_DATA, tenant))
-    );
+    /* Instances are fetched for the whole team at once (concurrently, server-side) */
+    const [instanceErrors, results] = await Promise.all([
+      dispatch(FETCH_TEAM_INSTANCES),
+      Promise.allSettled(
+        tenants.map((tenant) => dispatch(FETCH_TENANT_SPECIFIC_DATA, tenant))
+      ),
+    ]);
     return results.map(({ status, value, reason }, index) => {
-      return { status, value, reason, tenant: tenants[index].id };
+      const tenant = tenants[index];
+      const instanceError = instanceErrors.find(
+        (error) => error.tenant === tenant.id
+      );
+      if (status === "fulfilled" && instanceError) {
+        status = "rejected";
+        reason = new Error(
+          `Error fetching instances from ${getters[GET_REGION_NAME_FOR_TENANT](
+            tenant
+          )} tenant: ${instanceError.detail}`
+        );
+      }
+      return { status, value, reason, tenant: tenant.id };
     });
   },
 
@@ -51,6 +51,9 @@ export const GET_KEY_PAIR_BY_ID = "GET_KEY_PAIR_BY_ID";
 export const GET_KEY_PAIR_IS_DEFAULT = "GET_KEY_PAIR_IS_DEFAULT";
 export const DEFAULT_KEY_PAIR = "DEFAULT_KEY_PAIR";
 
+// Quotas
+export const GET_QUOTAS_FOR_TENANT = "GET_QUOTAS_FOR_TENANT";
+
 // Team members
 export const ADMIN_TEAM_MEMBERS = "ADMIN_TEAM_MEMBERS";
 export const ALL_TEAM_MEMBERS = "ALL_TEAM_MEMBERS";
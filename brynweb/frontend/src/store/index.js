@@ -13,6 +13,7 @@ import instances from "./modules/instances";
 import invitations from "./modules/invitations";
 import keyPairs from "./modules/keyPairs";
 import polling from "./modules/polling";
+import quotas from "./modules/quotas";
 import teamMembers from "./modules/teamMembers";
 import volumes from "./modules/volumes";
 import volumeTypes from "./modules/volumeTypes";
@@ -37,6 +38,7 @@ const modules = {
   invitations,
   keyPairs,
   polling,
+  quotas,
   teamMembers,
   volumes,
   volumeTypes,
@@ -10,6 +10,7 @@ import {
   CREATE_POLLING_TARGET,
   DELETE_INSTANCE,
   FETCH_INSTANCE,
+  FETCH_TEAM_INSTANCES,
   FETCH_TENANT_INSTANCES,
   REMOVE_INSTANCE_BY_ID,
   RENEW_INSTANCE_LEASE,
@@ -40,6 +41,10 @@ import {
 } from "../mutation-types";
 
 const SHELVED_STATUSES = ["SHELVED", "SHELVED_OFFLOADED"];
+const JOB_FINISHED_STATUSES = ["COMPLETE", "FAILED"];
+const JOB_POLLING_INTERVAL = 3000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
 
 const getInstanceDetailUri = (instance) =>
   getAPIRoute("instances", instance.team, instance.tenant) + instance.id;
@@ -147,10 +152,22 @@ const actions = {
     { commit, dispatch, rootState, state },
     { tenant, keypair, flavor, image, name }
   ) {
+    /* Enqueue a provisioning job, and wait for it to finish */
     const payload = { tenant, keypair, flavor, image, name };
     const url = getAPIRoute("instances", rootState.activeTeamId, tenant);
-    const response = await axios.post(url, payload);
-    const instance = response.data;
+    let job = (await axios.post(url, payload)).data;
+    const jobUri = getAPIRoute("instanceJobs", job.team, job.tenant) + job.id;
+    while (!JOB_FINISHED_STATUSES.includes(job.status)) {
+      await sleep(JOB_POLLING_INTERVAL);
+      job = (await axios.get(jobUri)).data;
+    }
+    if (job.status === "FAILED") {
+      throw new Error(job.error);
+    }
+
+    const instanceUri =
+      getAPIRoute("instances", job.team, job.tenant) + job.serverId;
+    const instance = (await axios.get(instanceUri)).data;
     commit(ADD_INSTANCE, instance);
     dispatch(CREATE_POLLING_TARGET, {
       collection: state.all,
@@ -199,6 +216,32 @@ const actions = {
     commit(SET_INSTANCES_LOADING, false);
   },
 
+  async [FETCH_TEAM_INSTANCES]({ rootGetters, commit }) {
+    /*
+     * Fetch instances for all of the team's tenants in a single request.
+     * Returns per-tenant errors; instances for failed tenants are left unchanged.
+     */
+    commit(SET_INSTANCES_LOADING, true);
+    const team = rootGetters[TEAM];
+    const url = getAPIRoute("teamInstances", team.id);
+    const response = await axios.get(url);
+    const { instances, errors } = response.data;
+    const failedTenantIds = errors.map((error) => error.tenant);
+    team.tenants
+      .filter((tenant) => !failedTenantIds.includes(tenant.id))
+      .forEach((tenant) => {
+        commit(SET_INSTANCES, {
+          instances: instances.filter(
+            (instance) => instance.tenant === tenant.id
+          ),
+          team,
+          tenant,
+        });
+      });
+    commit(SET_INSTANCES_LOADING, false);
+    return errors;
+  },
+
   async [RENEW_INSTANCE_LEASE]({ commit }, instance) {
     const response = await axios.post(instance.leaseRenewalUrl);
     commit(MODIFY_INSTANCE, {
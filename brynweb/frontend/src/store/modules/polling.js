@@ -1,16 +1,25 @@
-import { CREATE_POLLING_TARGET, FETCH_POLLING_TARGETS } from "../action-types";
+import { getAPIRoute } from "@/api";
+import {
+  CREATE_POLLING_TARGET,
+  FETCH_POLLING_TARGETS,
+  HANDLE_STATUS_EVENT,
+  UPDATE_FALLBACK_POLLING,
+} from "../action-types";
 import { GET_ITEM_IS_POLLING } from "../getter-types";
 import {
-  SET_POLLING_SYMBOL,
   CLEAR_POLLING_SYMBOL,
+  SET_EVENT_SOURCE,
+  SET_POLLING_SYMBOL,
+  REMOVE_EVENT_SOURCE,
   UPDATE_OR_CREATE_POLLING_TARGET,
   REMOVE_POLLING_TARGET,
 } from "../mutation-types";
 
 const state = () => {
   return {
-    pollingSymbol: null, // Identifier for polling from setInterval()
-    pollingTargets: [], // [{collection[], itemId, fetchAction, ["targetStatus", "alternativeStatus"]}]
+    eventSources: {}, // {tenantId: EventSource}, for tenants with polling targets
+    pollingSymbol: null, // Identifier for fallback polling from setInterval(), while any event source isn't open
+    pollingTargets: [], // [{collection[], itemId, tenantId, fetchAction, ["targetStatus", "alternativeStatus"]}]
   };
 };
 
@@ -34,6 +43,14 @@ const mutations = {
     state.pollingSymbol = null;
   },
 
+  [SET_EVENT_SOURCE](state, { tenantId, eventSource }) {
+    state.eventSources[tenantId] = eventSource;
+  },
+
+  [REMOVE_EVENT_SOURCE](state, tenantId) {
+    delete state.eventSources[tenantId];
+  },
+
   [UPDATE_OR_CREATE_POLLING_TARGET](
     state,
     { collection, item, fetchAction, targetStatuses = [] }
@@ -52,6 +69,7 @@ const mutations = {
       targets.push({
         collection,
         itemId: item.id,
+        tenantId: item.tenant,
         fetchAction,
         targetStatuses,
       });
@@ -75,12 +93,47 @@ const actions = {
       targetStatuses,
     });
     dispatch(FETCH_POLLING_TARGETS); // First/immediate update
-    if (!state.pollingSymbol) {
-      /* Start polling */
+    if (!state.eventSources[item.tenant]) {
+      /* Subscribe to tenant status change events; targets are fetched on change */
+      const url = getAPIRoute("tenantEvents", item.team, item.tenant);
+      const eventSource = new EventSource(url);
+      eventSource.addEventListener("open", () => {
+        dispatch(FETCH_POLLING_TARGETS); // Status may have changed before subscription
+        dispatch(UPDATE_FALLBACK_POLLING);
+      });
+      eventSource.addEventListener("error", () => {
+        /* Stream unavailable (or reconnecting): poll until it's open again */
+        dispatch(UPDATE_FALLBACK_POLLING);
+      });
+      eventSource.addEventListener("status", (event) => {
+        dispatch(HANDLE_STATUS_EVENT, JSON.parse(event.data));
+      });
+      commit(SET_EVENT_SOURCE, { tenantId: item.tenant, eventSource });
+    }
+  },
+
+  [UPDATE_FALLBACK_POLLING]({ commit, dispatch, state }) {
+    /* Poll targets on a timer while there are targets, and any tenant event source isn't open */
+    const needsPolling =
+      state.pollingTargets.length > 0 &&
+      Object.values(state.eventSources).some(
+        (eventSource) => eventSource.readyState !== EventSource.OPEN
+      );
+    if (needsPolling && !state.pollingSymbol) {
       const pollingSymbol = setInterval(() => {
         dispatch(FETCH_POLLING_TARGETS);
       }, 5000);
       commit(SET_POLLING_SYMBOL, pollingSymbol);
+    } else if (!needsPolling && state.pollingSymbol) {
+      clearInterval(state.pollingSymbol);
+      commit(CLEAR_POLLING_SYMBOL);
+    }
+  },
+
+  async [HANDLE_STATUS_EVENT]({ state, dispatch }, event) {
+    /* Fetch & update polling targets, if the event relates to a target */
+    if (state.pollingTargets.some((target) => target.itemId === event.id)) {
+      dispatch(FETCH_POLLING_TARGETS);
     }
   },
 
@@ -113,11 +166,16 @@ const actions = {
       }
     });
 
-    if (state.pollingTargets.length === 0) {
-      /* Stop polling */
-      clearInterval(state.pollingSymbol);
-      commit(CLEAR_POLLING_SYMBOL);
-    }
+    /* Unsubscribe from tenants without polling targets */
+    Object.entries(state.eventSources).forEach(([tenantId, eventSource]) => {
+      if (
+        !state.pollingTargets.some((target) => target.tenantId === tenantId)
+      ) {
+        eventSource.close();
+        commit(REMOVE_EVENT_SOURCE, tenantId);
+      }
+    });
+    dispatch(UPDATE_FALLBACK_POLLING);
   },
 };
 
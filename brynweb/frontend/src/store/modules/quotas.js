@@ -0,0 +1,27 @@
+import { GET_QUOTAS_FOR_TENANT } from "@/store/getter-types";
+import { SET_QUOTAS } from "@/store/mutation-types";
+
+const state = () => {
+  return {
+    byTenant: {},
+  };
+};
+
+const mutations = {
+  [SET_QUOTAS](state, { quotas, tenant }) {
+    state.byTenant[tenant.id] = quotas;
+  },
+};
+
+const getters = {
+  [GET_QUOTAS_FOR_TENANT](state) {
+    return ({ id }) => state.byTenant[id];
+  },
+};
+
+export default {
+  namespaced: false,
+  state,
+  getters,
+  mutations,
+};
@@ -44,6 +44,11 @@ export const UPDATE_OR_CREATE_POLLING_TARGET = "ADD_POLLING_TARGET";
 export const REMOVE_POLLING_TARGET = "REMOVE_POLLING_TARGET";
 export const CLEAR_POLLING_SYMBOL = "CLEAR_POLLING_SYMBOL";
 export const SET_POLLING_SYMBOL = "SET_POLLING_SYMBOL";
+export const REMOVE_EVENT_SOURCE = "REMOVE_EVENT_SOURCE";
+export const SET_EVENT_SOURCE = "SET_EVENT_SOURCE";
+
+// Quotas
+export const SET_QUOTAS = "SET_QUOTAS";
 
 // Team Members
 export const REMOVE_TEAM_MEMBER_BY_ID = "REMOVE_TEAM_MEMBER_BY_ID";
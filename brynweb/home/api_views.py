@@ -2,11 +2,13 @@ from django.db.models import Q
 from django.db.models.functions import Now
 from rest_framework.generics import ListAPIView
 
+from core.mixins import ConditionalETagMixin
+
 from .models import Announcement, FrequentlyAskedQuestion
 from .serializers import AnnouncementSerializer, FrequentlyAskedQuestionSerializer
 
 
-class AnnouncementListView(ListAPIView):
+class AnnouncementListView(ConditionalETagMixin, ListAPIView):
     """
     Announcement list view (published, not expired)
     """
@@ -20,7 +22,7 @@ class AnnouncementListView(ListAPIView):
     )
 
 
-class FrequentlyAskedQuestionListView(ListAPIView):
+class FrequentlyAskedQuestionListView(ConditionalETagMixin, ListAPIView):
     """
     FrequentlyAskedQuestion list view (published)
     """
@@ -5,3 +5,7 @@ from django.apps import AppConfig
 
 class HomeConfig(AppConfig):
     name = "home"
+
+    def ready(self):
+        # Signal registration
+        import home.signals  # noqa
@@ -0,0 +1,88 @@
+"""
+SPA bootstrap data (rendered into the FrontendView template), cached.
+
+Data shared by all users (regions & current licence terms) is cached under a single key, and each user's own data
+(user, memberships & verified teams, with their tenants) under a per-user key. Keys are invalidated by signals (see
+home.signals) when the underlying models change. Cached data expires after FRONTEND_BOOTSTRAP_CACHE_SECONDS, or as soon
+as one of the user's team licences expires (licence_is_valid is time dependent).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from humps import camelize
+
+from openstack.models import Region
+from openstack.serializers import RegionSerializer
+from userdb.models import LicenceVersion
+from userdb.serializers import TeamSerializer, UserSerializer
+
+SHARED_KEY = "home:bootstrap:shared"
+
+
+def get_user_key(user_id):
+    return f"home:bootstrap:user:{user_id}"
+
+
+def build_shared_data():
+    regions = Region.objects.select_related("regionsettings")
+    try:
+        licence_terms = LicenceVersion.objects.current().licence_terms
+    except LicenceVersion.DoesNotExist:
+        licence_terms = None
+    return {
+        "regions": camelize(RegionSerializer(regions, many=True).data),
+        "licence_terms": licence_terms,
+    }
+
+
+def build_user_data(user):
+    teams = list(user.teams.verified().prefetch_related("tenants"))
+    return {
+        "user": camelize(UserSerializer(user).data),
+        "teams": camelize(TeamSerializer(teams, many=True).data),
+        "licence_expiries": [team.licence_expiry for team in teams],
+    }
+
+
+def get_timeout(licence_expiries):
+    """Cache timeout: FRONTEND_BOOTSTRAP_CACHE_SECONDS, or until the next team licence expiry"""
+    now = timezone.now()
+    timeout = settings.FRONTEND_BOOTSTRAP_CACHE_SECONDS
+    for expiry in licence_expiries:
+        if expiry and expiry > now:
+            timeout = min(timeout, (expiry - now).total_seconds() + 1)
+    return timeout
+
+
+def get_data(user):
+    """
+    Return bootstrap data for a user (regions, teams, user & licence_terms), camelized for the frontend.
+    Also includes has_teams (whether the user has any team memberships, verified or not).
+    """
+    shared_data = cache.get(SHARED_KEY)
+    if shared_data is None:
+        shared_data = build_shared_data()
+        cache.set(SHARED_KEY, shared_data, settings.FRONTEND_BOOTSTRAP_CACHE_SECONDS)
+
+    user_key = get_user_key(user.pk)
+    user_data = cache.get(user_key)
+    if user_data is None:
+        user_data = build_user_data(user)
+        cache.set(user_key, user_data, get_timeout(user_data["licence_expiries"]))
+
+    return {
+        "regions": shared_data["regions"],
+        "teams": user_data["teams"],
+        "user": user_data["user"],
+        "licence_terms": shared_data["licence_terms"],
+        "has_teams": bool(user_data["user"]["teamMemberships"]),
+    }
+
+
+def invalidate_shared():
+    cache.delete(SHARED_KEY)
+
+
+def invalidate_users(user_ids):
+    cache.delete_many([get_user_key(user_id) for user_id in user_ids])
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from openstack.models import Region, RegionSettings, Tenant
+from userdb.models import LicenceVersion, Profile, Team, TeamMember
+from . import bootstrap
+
+CHANGED = [post_save, post_delete]
+
+
+@receiver(CHANGED, sender=Region)
+@receiver(CHANGED, sender=RegionSettings)
+@receiver(CHANGED, sender=LicenceVersion)
+def invalidate_shared_bootstrap_data(sender, instance, **kwargs):
+    """Invalidate cached bootstrap data shared by all users"""
+    bootstrap.invalidate_shared()
+
+
+@receiver(CHANGED, sender=User)
+def invalidate_user_bootstrap_data(sender, instance, **kwargs):
+    bootstrap.invalidate_users([instance.pk])
+
+
+@receiver(CHANGED, sender=Profile)
+@receiver(CHANGED, sender=TeamMember)
+def invalidate_related_user_bootstrap_data(sender, instance, **kwargs):
+    bootstrap.invalidate_users([instance.user_id])
+
+
+@receiver(CHANGED, sender=Team)
+def invalidate_team_bootstrap_data(sender, instance, **kwargs):
+    """Invalidate cached bootstrap data for team members"""
+    bootstrap.invalidate_users(
+        TeamMember.objects.filter(team=instance.pk).values_list("user", flat=True)
+    )
+
+
+@receiver(CHANGED, sender=Tenant)
+def invalidate_tenant_team_bootstrap_data(sender, instance, **kwargs):
+    """Invalidate cached bootstrap data for the tenant's team members"""
+    bootstrap.invalidate_users(
+        TeamMember.objects.filter(team=instance.team_id).values_list("user", flat=True)
+    )
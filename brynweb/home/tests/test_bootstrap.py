@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from openstack.tests.factories import RegionSettingsFactory, TenantFactory
+from userdb.models import TeamMember
+from userdb.tests.factories import UserFactory
+from .. import bootstrap
+
+
+class TestBootstrapData(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region_settings = RegionSettingsFactory()
+        cls.region = region_settings.region
+        cls.tenant = TenantFactory(region=cls.region)
+        cls.team = cls.tenant.team
+        cls.user = UserFactory()
+        TeamMember.objects.create(team=cls.team, user=cls.user, is_admin=True)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_bootstrap_data_is_cached(self):
+        """Is bootstrap data built with a fixed number of queries, then served from the cache?"""
+        # Regions, licence, teams, tenants, profile & memberships
+        user = User.objects.get(pk=self.user.pk)  # i.e. a request user
+        with self.assertNumQueries(6):
+            data = bootstrap.get_data(user)
+        self.assertEqual(data["teams"][0]["name"], self.team.name)
+        self.assertEqual(len(data["teams"][0]["tenants"]), 1)
+        self.assertIn(self.region.name, [region["name"] for region in data["regions"]])
+        self.assertTrue(data["has_teams"])
+        with self.assertNumQueries(0):
+            self.assertEqual(bootstrap.get_data(user), data)
+
+    def test_changes_invalidate_bootstrap_data(self):
+        """Are cached teams & regions updated when a team or region is changed?"""
+        bootstrap.get_data(self.user)
+        self.team.name = "Renamed team"
+        self.team.save()
+        self.region.description = "Renamed region"
+        self.region.save()
+        data = bootstrap.get_data(self.user)
+        self.assertEqual(data["teams"][0]["name"], "Renamed team")
+        self.assertIn(
+            "Renamed region", [region["description"] for region in data["regions"]]
+        )
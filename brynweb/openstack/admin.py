@@ -3,6 +3,7 @@ from django.contrib.admin import helpers
 from django.template.response import TemplateResponse
 from django.utils.translation import ngettext
 
+from . import catalog, circuit_breaker, shelving
 from .custom_filters import ServerLeaseStatusFilter
 from .models import (
     Tenant,
@@ -101,15 +102,8 @@ class ServerLeaseAdmin(admin.ModelAdmin):
         opts = self.model._meta
 
         if request.POST.get("post"):
-            # User clicked submit after confirmation
-            shelved = 0
-            for server_lease in queryset:
-                if (
-                    not (server_lease.shelved or server_lease.deleted)
-                    and server_lease.has_expired
-                ):
-                    server_lease.shelve_server()
-                    shelved += 1
+            # User clicked submit after confirmation; servers are shelved in the background
+            shelved = shelving.enqueue(queryset)
             if shelved == 0:
                 self.message_user(
                     request,
@@ -120,8 +114,8 @@ class ServerLeaseAdmin(admin.ModelAdmin):
                 self.message_user(
                     request,
                     ngettext(
-                        f"Shelved {shelved} server.",
-                        f"Shelved {shelved} servers.",
+                        f"Shelving {shelved} server in the background.",
+                        f"Shelving {shelved} servers in the background.",
                         shelved,
                     ),
                 )
@@ -232,6 +226,37 @@ class RegionSettingsInline(admin.StackedInline):
 class RegionAdmin(admin.ModelAdmin):
     inlines = (RegionSettingsInline,)
 
+    list_display = ("name", "description", "disabled", "circuit_status")
+
+    actions = ("invalidate_catalog_caches", "reset_circuit_breakers")
+
+    def circuit_status(self, obj):
+        """Openstack services with open circuits (failing fast, see openstack.circuit_breaker)"""
+        open_services = circuit_breaker.get_open_services(obj)
+        return f"Open: {', '.join(open_services)}" if open_services else "OK"
+
+    circuit_status.short_description = "Circuit breakers"
+
+    def invalidate_catalog_caches(self, request, queryset):
+        """
+        Admin action: invalidate cached flavor, image & volume type catalogs
+        """
+        for region in queryset:
+            catalog.invalidate(region)
+        self.message_user(
+            request, f"Catalog caches invalidated for {queryset.count()} region(s)"
+        )
+
+    def reset_circuit_breakers(self, request, queryset):
+        """
+        Admin action: close circuit breakers, allowing requests to a recovered region without waiting for a probe
+        """
+        for region in queryset:
+            circuit_breaker.reset_region(region)
+        self.message_user(
+            request, f"Circuit breakers reset for {queryset.count()} region(s)"
+        )
+
 
 admin.site.register(Tenant, TenantAdmin)
 admin.site.register(Region, RegionAdmin)
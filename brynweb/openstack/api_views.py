@@ -1,21 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
 from operator import methodcaller
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from rest_framework.views import APIView
 from rest_framework import permissions, generics, status
 from rest_framework import exceptions as drf_exceptions
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from djangorestframework_camel_case.util import camel_to_underscore
 
 from core import hashids
+from core.mixins import ConditionalETagMixin
+from core.renderers import EventStreamRenderer
+from core.row_builders import build_rows
+from core.serializers import limit_fields
 from core.permissions import IsOwner
+from userdb.context import get_team_context
 from userdb.models import TeamMember
 from userdb.permissions import IsTeamMemberPermission
 
+from . import catalog, circuit_breaker, launch_context, status_events
 from .service import OpenstackService, ServiceUnavailable, OpenstackException
-from .models import HypervisorStats, KeyPair, ServerLease, ServerLeaseRequest, Tenant
+from .tasks import provision_server
+from .models import (
+    HypervisorStats,
+    KeyPair,
+    ServerLease,
+    ServerLeaseRequest,
+    ServerProvisioningJob,
+    ServerSnapshot,
+    ServerSnapshotSync,
+    Tenant,
+)
 from .serializers import (
     AttachmentSerializer,
     FlavorSerializer,
@@ -24,6 +45,7 @@ from .serializers import (
     InstanceSerializer,
     KeyPairSerializer,
     ServerLeaseRequestSerializer,
+    ServerProvisioningJobSerializer,
     TenantSerializer,
     VolumeSerializer,
     VolumeTypeSerializer,
@@ -51,13 +73,30 @@ def get_tenants_for_user(
     return all_tenants.filter(pk=tenant_id) if tenant_id else all_tenants
 
 
-def get_tenant_for_user(user: User, tenant_id: int, team_id: int = None) -> Tenant:
+# Openstack services (circuit breakers) called by each OpenstackService sub-service, as well as keystone
+CIRCUIT_SERVICES = {
+    OpenstackService.Services.FLAVORS: [circuit_breaker.NOVA],
+    OpenstackService.Services.IMAGES: [circuit_breaker.GLANCE],
+    OpenstackService.Services.KEYPAIRS: [circuit_breaker.NOVA],
+    OpenstackService.Services.LIMITS: [circuit_breaker.NOVA, circuit_breaker.CINDER],
+    OpenstackService.Services.SERVERS: [circuit_breaker.NOVA],
+    OpenstackService.Services.VOLUMES: [circuit_breaker.CINDER],
+    OpenstackService.Services.VOLUME_TYPES: [circuit_breaker.CINDER],
+}
+
+
+def get_tenant_for_request(request, service=None) -> Tenant:
     """
-    Return a tenant for a given user, only if that user is a team member.
-    If team_id is specified: will raise if the specified tenant does not belong to this team.
-    If admin is specified: will raise if the user is not a team admin.
+    Return the tenant for a request's team_id & tenant_id URL kwargs, only if the user is a team member.
+    The tenant is loaded with its team, region & region settings, and memoized on the request (see userdb.context).
+    Raises ServiceUnavailable if the region is disabled, or if service (the OpenstackService sub-service the view
+    calls, if given) has an open circuit breaker. Other open circuits fail the calls made to them (see
+    circuit_breaker.CircuitBreakerSession), so views only fail for the services they use.
     """
-    tenant = get_tenants_for_user(user, tenant_id=tenant_id, team_id=team_id).first()
+    try:
+        tenant = get_team_context(request).tenant
+    except drf_exceptions.NotFound:  # No team
+        raise InvalidTenant
 
     if not tenant:
         raise InvalidTenant
@@ -65,6 +104,17 @@ def get_tenant_for_user(user: User, tenant_id: int, team_id: int = None) -> Tena
     if tenant.region.disabled:
         raise ServiceUnavailable
 
+    if service is None:
+        return tenant
+    open_services = circuit_breaker.get_open_services(
+        tenant.region, [circuit_breaker.KEYSTONE] + CIRCUIT_SERVICES[service]
+    )
+    if open_services:
+        raise circuit_breaker.CircuitOpen(
+            f"Openstack {', '.join(open_services)} unavailable at {tenant.region.description}, "
+            "try again later."
+        )
+
     return tenant
 
 
@@ -77,36 +127,72 @@ class OpenstackAPIView(APIView):
     service = None
     serializer_class = None
 
-    def get_transform_func(self, tenant):
+    def get_requested_fields(self, request):
+        """
+        Return the set of serializer field names requested with ?fields= (comma separated, in camelCase or
+        snake_case), or None for all fields (no fields parameter). Raises ValidationError for unknown fields.
+        """
+        param = request.query_params.get("fields")
+        if param is None:
+            return None
+        fields = {camel_to_underscore(name.strip()) for name in param.split(",")}
+        fields.discard("")
+        unknown = fields - {
+            field.field_name for field in self.serializer_class()._readable_fields
+        }
+        if unknown:
+            raise drf_exceptions.ValidationError(
+                {"fields": f"Unknown fields: {', '.join(sorted(unknown))}."}
+            )
+        return fields
+
+    def get_transform_func(self, tenant, objects=(), fields=None):
         """
         Returns a func to map openstack response to required serializer data structure
+        objects: the openstack response object(s) to be transformed, allowing related data to be loaded in bulk
+        fields: the serializer fields requested (None for all), so that work for other fields can be skipped
         Override as required
         """
 
         def transform_func(obj):
             obj.tenant = tenant.pk
-            obj.team = tenant.team.pk
+            obj.team = tenant.team_id
             return obj
 
         return transform_func
 
+    def get_list_data(self, tenant, objects, fields=None):
+        """
+        Serialized data for a list of a tenant's (transformed) objects, built with a compiled row builder
+        (see core.row_builders), with the team & tenant hashids encoded once, and only the requested fields
+        """
+        return build_rows(
+            self.serializer_class,
+            objects,
+            fields=fields,
+            team=tenant.team_id,
+            tenant=tenant.pk,
+        )
 
-class OpenstackRetrieveView(OpenstackAPIView):
+
+class OpenstackRetrieveView(ConditionalETagMixin, OpenstackAPIView):
     """
     Base class for simple openstack detail views.
+    ?fields= limits the fields returned (see OpenstackAPIView.get_requested_fields).
     """
 
     def get(self, request, team_id, tenant_id, pk):
-        tenant = get_tenant_for_user(
-            request.user, tenant_id=tenant_id, team_id=team_id
-        )  # may raise
+        tenant = get_tenant_for_request(request, self.service)  # may raise
+        fields = self.get_requested_fields(request)
 
         openstack = OpenstackService(tenant=tenant)
-        transform_func = self.get_transform_func(tenant)
         try:
             response = methodcaller("get", pk)(getattr(openstack, self.service.value))
+            transform_func = self.get_transform_func(tenant, [response], fields)
             data = transform_func(response)
-            serialized = self.serializer_class(data)
+            serialized = limit_fields(self.serializer_class(data), fields)
+        except ServiceUnavailable:
+            raise
         except Exception as e:
             if getattr(e, "code", None) == 404:
                 raise drf_exceptions.NotFound
@@ -115,26 +201,112 @@ class OpenstackRetrieveView(OpenstackAPIView):
         return Response(serialized.data)
 
 
-class OpenstackListView(OpenstackAPIView):
+class OpenstackListView(ConditionalETagMixin, OpenstackAPIView):
     """
     Base class for simple openstack collection views.
-    """
+    ?fields= limits the fields returned (see OpenstackAPIView.get_requested_fields).
+    With paginated = True, ?status= & ?name= query parameters are passed to openstack as search_opts (filtering at
+    source, by search_params: query parameter -> search option), and ?limit= (& ?marker=) lists a page, returned as
+    {"next": <next page url>, "results": [...]}.
+    ?status= matches exactly, while ?name= matches any part of the name.
+    """
+
+    paginated = False
+    search_params = {"status": "status", "name": "name"}
+
+    def get_list_kwargs(self, request):
+        """Return get_list kwargs (search_opts, marker & limit) for the request's query parameters"""
+        if not self.paginated:
+            return {}
+
+        params = request.query_params
+        kwargs = {}
+        search_opts = {
+            search_opt: params[param]
+            for param, search_opt in self.search_params.items()
+            if params.get(param)
+        }
+        if search_opts:
+            kwargs["search_opts"] = search_opts
+        if params.get("marker"):
+            kwargs["marker"] = params["marker"]
+        if "limit" in params:
+            try:
+                limit = int(params["limit"])
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                raise drf_exceptions.ValidationError(
+                    {"limit": "A positive integer is required."}
+                )
+            kwargs["limit"] = min(limit, settings.OPENSTACK_LIST_MAX_LIMIT)
+        return kwargs
+
+    def get_paginated_data(self, request, objects, data, limit):
+        """Wrap a page of data, with a link to the next page (after the last object) if the page is full"""
+        next_url = None
+        if len(objects) == limit:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "marker", objects[-1].id
+            )
+        return {"next": next_url, "results": data}
 
     def get(self, request, team_id, tenant_id):
-        tenant = get_tenant_for_user(
-            request.user, team_id=team_id, tenant_id=tenant_id
-        )  # may raise
+        tenant = get_tenant_for_request(request, self.service)  # may raise
+        list_kwargs = self.get_list_kwargs(request)
+        fields = self.get_requested_fields(request)
 
         openstack = OpenstackService(tenant=tenant)
+        try:
+            response = list(
+                methodcaller("get_list", **list_kwargs)(
+                    getattr(openstack, self.service.value)
+                )
+            )
+            transform_func = self.get_transform_func(tenant, response, fields)
+            data = self.get_list_data(tenant, map(transform_func, response), fields)
+        except ServiceUnavailable:
+            raise
+        except Exception as e:
+            if getattr(e, "code", None) == 400 and "marker" in list_kwargs:
+                raise drf_exceptions.ValidationError({"marker": str(e)})
+            raise OpenstackException(detail=str(e))
+
+        if "limit" in list_kwargs:
+            return Response(
+                self.get_paginated_data(request, response, data, list_kwargs["limit"])
+            )
+        return Response(data)
+
+
+class CatalogListView(ConditionalETagMixin, OpenstackAPIView):
+    """
+    Base class for openstack catalog views (served from the region catalog cache, with the tenant's own entries).
+    """
+
+    # You'll need to set these attributes on subclass
+    catalog_name = None
+    serializer_class = None
+
+    def get_transform_func(self, tenant, objects=(), fields=None):
+        def transform_func(obj):
+            return {**obj, "tenant": tenant.pk, "team": tenant.team_id}
+
+        return transform_func
+
+    def get(self, request, team_id, tenant_id):
+        tenant = get_tenant_for_request(request)  # may raise
+
         transform_func = self.get_transform_func(tenant)
         try:
-            response = methodcaller("get_list")(getattr(openstack, self.service.value))
-            data = map(transform_func, response)
-            serialized = self.serializer_class(data, many=True)
+            response = catalog.get_for_tenant(tenant, self.catalog_name)
+            data = self.get_list_data(tenant, map(transform_func, response))
+        except ServiceUnavailable:
+            raise
         except Exception as e:
             raise OpenstackException(detail=str(e))
 
-        return Response(serialized.data)
+        return Response(data)
 
 
 class OpenstackCreateMixin(OpenstackAPIView):
@@ -143,9 +315,7 @@ class OpenstackCreateMixin(OpenstackAPIView):
     """
 
     def post(self, request, team_id, tenant_id):
-        tenant = get_tenant_for_user(
-            request.user, team_id=team_id, tenant_id=tenant_id
-        )  # may raise
+        tenant = get_tenant_for_request(request, self.service)  # may raise
         openstack = OpenstackService(tenant=tenant)
         transform_func = self.get_transform_func(tenant)
 
@@ -158,6 +328,8 @@ class OpenstackCreateMixin(OpenstackAPIView):
             )
             transformed_response = transform_func(response)
             return Response(self.serializer_class(transformed_response).data)
+        except ServiceUnavailable:
+            raise
         except Exception as e:
             raise OpenstackException(detail=str(e))
 
@@ -168,13 +340,13 @@ class OpenstackDeleteMixin(OpenstackAPIView):
     """
 
     def delete(self, request, team_id, tenant_id, pk):
-        tenant = get_tenant_for_user(
-            request.user, team_id=team_id, tenant_id=tenant_id
-        )  # may raise
+        tenant = get_tenant_for_request(request, self.service)  # may raise
 
         openstack = OpenstackService(tenant=tenant)
         try:
             methodcaller("delete", pk)(getattr(openstack, self.service.value))
+        except ServiceUnavailable:
+            raise
         except Exception as e:
             if getattr(e, "code", None) == 404:
                 raise drf_exceptions.NotFound
@@ -196,66 +368,204 @@ class TenantListView(generics.ListAPIView):
         )
 
 
-def get_instance_transform_func(self, tenant):
+def get_instance_transform_func(self, tenant, objects=(), fields=None):
     """
     Transform function factory for Instance views.
+    Leases for all servers are loaded (or created) in bulk, if any lease fields are requested.
     """
     public_netname = tenant.region.regionsettings.public_network_name
+    with_flavor = fields is None or "flavor" in fields
+    with_ip = fields is None or "ip" in fields
+    with_leases = fields is None or any(field.startswith("lease") for field in fields)
+    if with_leases:
+        leases = ServerLease.objects.get_or_create_for_servers(tenant, objects)
 
     def transform_func(obj):
         obj.tenant = tenant.pk
-        obj.team = tenant.team.pk
-        obj.flavor = obj.flavor["id"]
-
-        if self.request.method == "GET":
-            # 'Missing' lease for a legacy server: assign team admin member
-            assigned_teammember = TeamMember.objects.filter(
-                team=tenant.team, is_admin=True
-            ).first()
-        else:
-            # New server: assign logged in user's team membership
-            assigned_teammember = TeamMember.objects.get(
-                team=tenant.team, user=self.request.user
-            )
-
-        lease_defaults = {
-            "server_id": obj.id,
-            "server_name": obj.name,
-            "tenant": tenant,
-            "assigned_teammember": assigned_teammember,
-            "shelved": True if "SHELVED" in obj.status else False,
-        }
-        lease, _created = ServerLease.objects.get_or_create(
-            server_id=obj.id, defaults=lease_defaults
-        )
-        obj.lease_expiry = lease.expiry
-        obj.lease_renewal_url = lease.renewal_url
-        obj.lease_assigned_teammember = lease.assigned_teammember
-
-        if public_netname in obj.addresses.keys():
-            obj.ip = obj.addresses[public_netname][0]["addr"]
-        else:
-            obj.ip = None
+        obj.team = tenant.team_id
+        if with_flavor:
+            obj.flavor = obj.flavor["id"]
+
+        if with_leases:
+            lease = leases[obj.id]
+            obj.lease_expiry = lease.expiry
+            obj.lease_renewal_url = lease.renewal_url
+            obj.lease_assigned_teammember = lease.assigned_teammember
+
+        if with_ip:
+            if public_netname in obj.addresses.keys():
+                obj.ip = obj.addresses[public_netname][0]["addr"]
+            else:
+                obj.ip = None
 
         return obj
 
     return transform_func
 
 
-class InstanceListView(OpenstackCreateMixin, OpenstackListView):
+class InstanceListView(OpenstackListView):
     """
     Instance list view.
+    ?name= is a regular expression (as nova), searched for in names.
+    GET with ?source=mirror serves instances from local server snapshots (see openstack.snapshots),
+    with the snapshot sync time in the X-Synced-At header (unless filtering or paginating, which is done by openstack).
+    POST enqueues a ServerProvisioningJob, rather than creating the server within the request.
     """
 
     serializer_class = InstanceSerializer
     service = OpenstackService.Services.SERVERS
     get_transform_func = get_instance_transform_func
+    paginated = True
+
+    def get(self, request, team_id, tenant_id):
+        if request.query_params.get("source") != "mirror":
+            return super().get(request, team_id, tenant_id)
+        if self.get_list_kwargs(request):  # Filtered or paginated by openstack
+            return super().get(request, team_id, tenant_id)
+
+        tenant = get_tenant_for_request(request)  # may raise
+
+        sync_state = ServerSnapshotSync.objects.filter(
+            region=tenant.region_id, last_synced_at__isnull=False
+        ).first()
+        if not sync_state:  # Region not yet mirrored
+            return super().get(request, team_id, tenant_id)
+
+        fields = self.get_requested_fields(request)
+        servers = [
+            snapshot.as_server()
+            for snapshot in ServerSnapshot.objects.filter(tenant=tenant)
+        ]
+        transform_func = self.get_transform_func(tenant, servers, fields)
+        return Response(
+            self.get_list_data(tenant, map(transform_func, servers), fields),
+            headers={"X-Synced-At": sync_state.last_synced_at.isoformat()},
+        )
+
+    def post(self, request, team_id, tenant_id):
+        tenant = get_tenant_for_request(request, self.service)  # may raise
+
+        serialized = self.serializer_class(data=request.data)
+        serialized.is_valid(raise_exception=True)
+        if not serialized.validated_data.get("image"):
+            # Optional on the serializer (listed servers may lack one), but a boot
+            # volume can't be created without it
+            raise drf_exceptions.ValidationError({"image": "This field is required."})
+        keypair = get_object_or_404(
+            KeyPair, pk=serialized.validated_data.get("keypair")
+        )
+
+        job = ServerProvisioningJob.objects.create(
+            tenant=tenant,
+            user=request.user,
+            name=serialized.validated_data["name"],
+            flavor=str(serialized.validated_data["flavor"]),
+            image=str(serialized.validated_data["image"]),
+            keypair=keypair,
+        )
+        provision_server(job.pk)
+        job.refresh_from_db()  # May have progressed (or completed) already
+
+        return Response(
+            ServerProvisioningJobSerializer(job).data, status=status.HTTP_202_ACCEPTED
+        )
+
+
+class ServerProvisioningJobDetailView(generics.RetrieveAPIView):
+    """
+    Server provisioning job detail view.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsTeamMemberPermission]
+    serializer_class = ServerProvisioningJobSerializer
+
+    def get_queryset(self):
+        tenants = get_tenants_for_user(
+            self.request.user,
+            team_id=self.kwargs.get("team_id"),
+            tenant_id=self.kwargs.get("tenant_id"),
+        )
+        return ServerProvisioningJob.objects.filter(tenant__in=tenants)
+
+
+class TeamInstanceListView(OpenstackAPIView):
+    """
+    Instance list view, for all of a team's tenants.
+    Tenants are queried concurrently; failures are reported per tenant, rather than failing the whole response.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsTeamMemberPermission]
+    serializer_class = InstanceSerializer
+    get_transform_func = get_instance_transform_func
+
+    @staticmethod
+    def fetch_servers(tenant):
+        return list(OpenstackService(tenant=tenant).servers.get_list())
+
+    @staticmethod
+    def get_tenant_error(tenant, detail):
+        return {
+            "tenant": hashids.encode(tenant.pk),
+            "region": tenant.region.name,
+            "detail": str(detail),
+        }
+
+    def get(self, request, team_id):
+        tenants = get_tenants_for_user(request.user, team_id=team_id).select_related(
+            "region__regionsettings"
+        )
+        enabled_tenants = [tenant for tenant in tenants if not tenant.region.disabled]
+        errors = [
+            self.get_tenant_error(tenant, ServiceUnavailable.default_detail)
+            for tenant in tenants
+            if tenant.region.disabled
+        ]
+
+        # Openstack requests only in worker threads; database access remains on the request thread
+        instances = []
+        with ThreadPoolExecutor(
+            max_workers=settings.OPENSTACK_MAX_CONCURRENT_REQUESTS
+        ) as executor:
+            futures = [
+                (tenant, executor.submit(self.fetch_servers, tenant))
+                for tenant in enabled_tenants
+            ]
+            for tenant, future in futures:
+                try:
+                    servers = future.result()
+                    transform_func = self.get_transform_func(tenant, servers)
+                    instances += self.get_list_data(
+                        tenant, map(transform_func, servers)
+                    )
+                except Exception as e:
+                    errors.append(self.get_tenant_error(tenant, e))
+
+        return Response(
+            {
+                "instances": instances,
+                "errors": errors,
+            }
+        )
+
+
+class TenantStatusEventsView(APIView):
+    """
+    Server-sent event stream of instance & volume status changes for a tenant.
+    Events are produced by a single (per-process) watcher for each tenant, shared between all subscribers.
+    """
 
-    def post(self, request, *args, **kwargs):
-        # Grab local keypair, append public key to data dict
-        keypair_local = get_object_or_404(KeyPair, pk=request.data["keypair"])
-        request.data["public_key"] = keypair_local.public_key
-        return super().post(request, *args, **kwargs)
+    permission_classes = [permissions.IsAuthenticated, IsTeamMemberPermission]
+    renderer_classes = [EventStreamRenderer]
+
+    def get(self, request, team_id, tenant_id):
+        tenant = get_tenant_for_request(request)  # may raise
+
+        response = StreamingHttpResponse(
+            status_events.stream(tenant), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Disable proxy (nginx) buffering
+        return response
 
 
 class InstanceDetailView(OpenstackDeleteMixin, OpenstackRetrieveView):
@@ -295,9 +605,7 @@ class InstanceDetailView(OpenstackDeleteMixin, OpenstackRetrieveView):
 
         # Status transition
         if target_status:
-            tenant = get_tenant_for_user(
-                request.user, team_id=team_id, tenant_id=tenant_id
-            )  # may raise
+            tenant = get_tenant_for_request(request, self.service)  # may raise
             openstack = OpenstackService(tenant=tenant)
             service = getattr(openstack, self.service.value)
             try:
@@ -312,6 +620,8 @@ class InstanceDetailView(OpenstackDeleteMixin, OpenstackRetrieveView):
                     )
                 method_name = self.state_transitions[current_status][target_status]
                 methodcaller(method_name, server)(service)
+            except ServiceUnavailable:
+                raise
             except Exception as e:
                 if getattr(e, "code", None) == 404:
                     raise drf_exceptions.NotFound
@@ -329,11 +639,7 @@ class InstanceDetailView(OpenstackDeleteMixin, OpenstackRetrieveView):
         # Lease TeamMember assignment
         if lease_assigned_teammember:
             # Check request user is team admin
-            try:
-                TeamMember.objects.get(
-                    user=request.user, team_id=team_id, is_admin=True
-                )
-            except TeamMember.DoesNotExist:
+            if not get_team_context(request).is_admin:
                 raise drf_exceptions.PermissionDenied
 
             # Check assigned user is team member
@@ -354,22 +660,22 @@ class InstanceDetailView(OpenstackDeleteMixin, OpenstackRetrieveView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class FlavorListView(OpenstackListView):
+class FlavorListView(CatalogListView):
     """
     Flavor list view.
     """
 
     serializer_class = FlavorSerializer
-    service = OpenstackService.Services.FLAVORS
+    catalog_name = catalog.FLAVORS
 
 
-class ImageListView(OpenstackListView):
+class ImageListView(CatalogListView):
     """
     Image list view.
     """
 
     serializer_class = ImageSerializer
-    service = OpenstackService.Services.IMAGES
+    catalog_name = catalog.IMAGES
 
 
 class KeyPairListView(generics.ListCreateAPIView):
@@ -397,21 +703,22 @@ class KeyPairDetailView(generics.RetrieveDestroyAPIView):
         return user.keypairs.all()
 
 
-def get_volume_transform_func(self, tenant):
+def get_volume_transform_func(self, tenant, objects=(), fields=None):
     """
-    Transform function factory for Volume views
+    Transform function factory for Volume views (for VolumeRecords, or cinderclient Volumes)
     """
+    with_name = fields is None or "name" in fields
 
     def transform_func(obj):
-        as_dict = obj.to_dict()
-        as_dict["tenant"] = tenant.pk
-        as_dict["team"] = tenant.team.pk
-        as_dict["name"] = (
-            obj.name.replace(tenant.created_tenant_name, "")
-            if obj.name
-            else str(obj.id)
-        )
-        return as_dict
+        obj.tenant = tenant.pk
+        obj.team = tenant.team_id
+        if with_name:
+            obj.name = (
+                obj.name.replace(tenant.created_tenant_name, "")
+                if obj.name
+                else str(obj.id)
+            )
+        return obj
 
     return transform_func
 
@@ -426,9 +733,7 @@ class VolumeDetailView(OpenstackDeleteMixin, OpenstackRetrieveView):
     get_transform_func = get_volume_transform_func
 
     def patch(self, request, team_id, tenant_id, pk):
-        tenant = get_tenant_for_user(
-            request.user, team_id=team_id, tenant_id=tenant_id
-        )  # may raise
+        tenant = get_tenant_for_request(request, self.service)  # may raise
 
         openstack = OpenstackService(tenant=tenant)
         service = getattr(openstack, self.service.value)
@@ -443,6 +748,8 @@ class VolumeDetailView(OpenstackDeleteMixin, OpenstackRetrieveView):
                 methodcaller("attach", pk, serialized_attachment.data["server_id"])(
                     service
                 )
+        except ServiceUnavailable:
+            raise
         except Exception as e:
             if getattr(e, "code", None) == 404:
                 raise drf_exceptions.NotFound
@@ -454,23 +761,27 @@ class VolumeDetailView(OpenstackDeleteMixin, OpenstackRetrieveView):
 class VolumeListView(OpenstackCreateMixin, OpenstackListView):
     """
     Volume list view.
+    ?name= is matched as a substring (cinder's inexact name~ filter, rather than its exact name filter), so volumes
+    named with their tenant's name prefixed (stripped by get_volume_transform_func) are matched by their shown name.
     """
 
     serializer_class = VolumeSerializer
     service = OpenstackService.Services.VOLUMES
     get_transform_func = get_volume_transform_func
+    paginated = True
+    search_params = {"status": "status", "name": "name~"}
 
 
-class VolumeTypeListView(OpenstackListView):
+class VolumeTypeListView(CatalogListView):
     """
     Volume type list view.
     """
 
     serializer_class = VolumeTypeSerializer
-    service = OpenstackService.Services.VOLUME_TYPES
+    catalog_name = catalog.VOLUME_TYPES
 
 
-class HypervisorStatsListView(generics.ListAPIView):
+class HypervisorStatsListView(ConditionalETagMixin, generics.ListAPIView):
     """
     Hypervisor stats list view.
     """
@@ -479,6 +790,19 @@ class HypervisorStatsListView(generics.ListAPIView):
     queryset = HypervisorStats.objects.all()
 
 
+class LaunchContextView(APIView):
+    """
+    Launch context view: flavors, images, volume types, quotas, key pairs & hypervisor stats for a tenant,
+    in a single request (see openstack.launch_context).
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsTeamMemberPermission]
+
+    def get(self, request, team_id, tenant_id):
+        tenant = get_tenant_for_request(request)  # may raise
+        return Response(launch_context.get_launch_context(tenant, request.user))
+
+
 class ServerLeaseRequestCreateView(generics.CreateAPIView):
     """
     ServerListRequest create view.
@@ -0,0 +1,256 @@
+"""
+API benchmarks against the fake openstack backend (see openstack.fake), run with the benchmark_api command.
+
+Each endpoint is requested sequentially with the django test client, for each dataset size (servers per tenant),
+recording requests per second, p50/p99 latency & SQL queries per request.
+
+JSON renderers are benchmarked separately (benchmark_renderers command), rendering an instance list response,
+as are list serializers vs compiled row builders (benchmark_serializers command).
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from djangorestframework_camel_case.render import (
+    CamelCaseJSONRenderer as LibraryCamelCaseJSONRenderer,
+)
+
+from core.renderers import CamelCaseJSONRenderer
+from core.row_builders import build_rows
+from userdb.models import Region, Team, TeamMember
+from . import api_views, catalog
+from .fake import FakeCloud
+from .models import RegionSettings, Tenant
+from .service import OpenstackService
+
+User = get_user_model()
+
+# Benchmarked endpoints (url names, with team_id & tenant_id kwargs)
+ENDPOINTS = {
+    "instances": "api:instances",
+    "volumes": "api:volumes",
+    "flavors": "api:flavors",
+    "images": "api:images",
+    "instance_picker": "api:instances",
+}
+
+# Query parameters, by endpoint
+ENDPOINT_PARAMS = {
+    "instance_picker": {"fields": "id,name,status"},
+}
+
+DEFAULT_SIZES = [10, 100, 1000]
+
+BENCHMARK_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+RENDERERS = {
+    "djangorestframework_camel_case": LibraryCamelCaseJSONRenderer,
+    "core.renderers": CamelCaseJSONRenderer,
+}
+
+
+@contextmanager
+def benchmark_environment():
+    """Test environment for benchmarks: a test database, and an isolated cache (since it's cleared between runs)"""
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def create_user():
+    return User.objects.create_user("benchmark", email="benchmark@example.com")
+
+
+def create_tenant(user, name):
+    """Create a tenant (in a new region & team, administered by user), i.e. an independent fake project"""
+    region = Region.objects.create(name=name, description=f"Benchmark {name}")
+    RegionSettings.objects.create(
+        region=region, public_network_name="public", public_network_id=name
+    )
+    team = Team.objects.create(name=name, creator=user, verified=True)
+    TeamMember.objects.create(team=team, user=user, is_admin=True)
+    return Tenant.objects.create(
+        team=team,
+        region=region,
+        created_tenant_id=f"{name}-project",
+        created_tenant_name=f"bryn:{name}",
+    )
+
+
+def benchmark_endpoint(client, url, requests, warmup=1):
+    """
+    Request an endpoint repeatedly, returning a dict of results.
+    Warmup requests (e.g. populating the catalog cache, or creating server leases) are excluded.
+    """
+    for n in range(warmup):
+        client.get(url)
+
+    latencies = []
+    query_counts = []
+    started = time.perf_counter()
+    for n in range(requests):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+        query_counts.append(len(queries))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "queries": sum(query_counts) / requests,
+    }
+
+
+def run(sizes=DEFAULT_SIZES, endpoints=ENDPOINTS, requests=100, latency=0.0):
+    """
+    Run benchmarks for each dataset size & endpoint, returning a list of result dicts.
+    Requires a database (e.g. the test database) and an isolated cache, since the cache is cleared between runs.
+    """
+    user = create_user()
+    client = Client()
+    client.force_login(user)
+
+    results = []
+    for size in sizes:
+        tenant = create_tenant(user, f"benchmark{size}")
+        cloud = FakeCloud(servers_per_tenant=size, latency=latency)
+        with cloud.patch():
+            for endpoint in endpoints:
+                cache.clear()  # Reset throttling & catalogs
+                url = reverse(
+                    ENDPOINTS[endpoint],
+                    kwargs={"team_id": tenant.team_id, "tenant_id": tenant.pk},
+                )
+                if endpoint in ENDPOINT_PARAMS:
+                    url = f"{url}?{urlencode(ENDPOINT_PARAMS[endpoint])}"
+                result = benchmark_endpoint(client, url, requests)
+                results.append({"endpoint": endpoint, "size": size, **result})
+    return results
+
+
+def benchmark_renderers(size=1000, repeat=20):
+    """
+    Render an instance list response (size servers) with each renderer, returning a list of result dicts.
+    Raises if the renderers' output differs.
+    """
+    user = create_user()
+    client = Client()
+    client.force_login(user)
+    tenant = create_tenant(user, "renderers")
+    with FakeCloud(servers_per_tenant=size).patch():
+        url = reverse(
+            ENDPOINTS["instances"],
+            kwargs={"team_id": tenant.team_id, "tenant_id": tenant.pk},
+        )
+        data = client.get(url).data
+
+    results = []
+    rendered = set()
+    for name, renderer_class in RENDERERS.items():
+        renderer = renderer_class()
+        rendered.add(renderer.render(data))
+        started = time.perf_counter()
+        for n in range(repeat):
+            renderer.render(data)
+        elapsed = time.perf_counter() - started
+        results.append({"renderer": name, "size": size, "ms": elapsed / repeat * 1000})
+
+    if len(rendered) != 1:
+        raise AssertionError("Rendered output differs between renderers")
+    return results
+
+
+def get_list_objects(tenant):
+    """Return (view class, transformed objects) for each list endpoint, as served by the view"""
+    openstack = OpenstackService(tenant=tenant)
+    lists = {}
+    for name, view_class, objects in [
+        ("instances", api_views.InstanceListView, openstack.servers.get_list()),
+        ("volumes", api_views.VolumeListView, openstack.volumes.get_list()),
+        (
+            "flavors",
+            api_views.FlavorListView,
+            catalog.get(tenant.region, catalog.FLAVORS),
+        ),
+        ("images", api_views.ImageListView, catalog.get(tenant.region, catalog.IMAGES)),
+    ]:
+        objects = list(objects)
+        transform_func = view_class().get_transform_func(tenant, objects)
+        lists[name] = (view_class, list(map(transform_func, objects)))
+    return lists
+
+
+def benchmark_serializers(size=1000, repeat=20):
+    """
+    Serialize lists (size objects) of each endpoint's objects with DRF serializers & compiled row builders,
+    returning a list of result dicts. Raises if the serialized data differs.
+    """
+    tenant = create_tenant(create_user(), "serializers")
+    cloud = FakeCloud(
+        servers_per_tenant=size,
+        volumes_per_tenant=size,
+        flavor_count=size,
+        image_count=size,
+    )
+    with cloud.patch():
+        lists = get_list_objects(tenant)
+
+    results = []
+    for name, (view_class, objects) in lists.items():
+        serializer_class = view_class.serializer_class
+        methods = {
+            "serializer": lambda: serializer_class(objects, many=True).data,
+            "row_builder": lambda: build_rows(
+                serializer_class, objects, team=tenant.team_id, tenant=tenant.pk
+            ),
+        }
+        if methods["serializer"]() != methods["row_builder"]():
+            raise AssertionError(f"Serialized {name} differ")
+        for method, serialize in methods.items():
+            started = time.perf_counter()
+            for n in range(repeat):
+                serialize()
+            elapsed = time.perf_counter() - started
+            results.append(
+                {
+                    "endpoint": name,
+                    "method": method,
+                    "size": len(objects),
+                    "ms": elapsed / repeat * 1000,
+                }
+            )
+    return results
@@ -0,0 +1,182 @@
+"""
+Region-scoped cache of openstack catalogs (flavors, images & volume types).
+
+Catalogs rarely change, so are served from the django cache rather than fetched per request.
+Entries older than OPENSTACK_CATALOG_CACHE_TTL_SECONDS are still served (for up to a further
+OPENSTACK_CATALOG_CACHE_STALE_SECONDS), while a refresh is enqueued in the background.
+
+Region catalogs are fetched with region admin credentials, so only list public flavors & images. Each tenant's own
+flavors & images (project-private flavors, and private or shared images, e.g. its snapshots) are fetched with the
+tenant's credentials, cached per tenant for OPENSTACK_PROJECT_CATALOG_CACHE_SECONDS, and merged in (see get_for_tenant).
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Tenant
+from .service import OpenstackService
+
+FLAVORS = "flavors"
+IMAGES = "images"
+VOLUME_TYPES = "volume_types"
+
+
+def get_flavor_data(flavor):
+    return {
+        "id": flavor.id,
+        "name": flavor.name,
+        "ram": flavor.ram,
+        "vcpus": flavor.vcpus,
+    }
+
+
+def get_image_data(image):
+    return {"id": image.id, "name": image.name}
+
+
+def fetch_flavors(openstack):
+    return [get_flavor_data(flavor) for flavor in openstack.flavors.get_list()]
+
+
+def fetch_images(openstack):
+    # Region admin credentials can see private images for all projects, so restrict to public
+    return [
+        get_image_data(image)
+        for image in openstack.images.get_list(visibility="public")
+    ]
+
+
+def fetch_project_flavors(openstack):
+    """Private flavors a tenant's project has access to (with tenant credentials)"""
+    return [
+        get_flavor_data(flavor)
+        for flavor in openstack.flavors.get_list()
+        if not flavor.is_public
+    ]
+
+
+def fetch_project_images(openstack):
+    """A tenant's own private images, & images shared with its project (with tenant credentials)"""
+    return [
+        get_image_data(image)
+        for visibility in ["private", "shared"]
+        for image in openstack.images.get_list(visibility=visibility)
+    ]
+
+
+def fetch_volume_types(openstack):
+    return [
+        {
+            "id": volume_type.id,
+            "name": volume_type.name,
+            "is_default": volume_type.is_default,
+        }
+        for volume_type in openstack.volume_types.get_list()
+    ]
+
+
+CATALOG_FETCHERS = {
+    FLAVORS: fetch_flavors,
+    IMAGES: fetch_images,
+    VOLUME_TYPES: fetch_volume_types,
+}
+
+PROJECT_CATALOG_FETCHERS = {
+    FLAVORS: fetch_project_flavors,
+    IMAGES: fetch_project_images,
+}
+
+
+def get_cache_key(region, catalog):
+    return f"openstack:catalog:{region.pk}:{catalog}"
+
+
+def get_project_cache_key(region_id, tenant_id, catalog):
+    return f"openstack:catalog:{region_id}:{catalog}:tenant:{tenant_id}"
+
+
+def refresh(region, catalog, openstack=None):
+    """
+    Fetch a catalog from openstack (with region admin credentials, or a given region admin OpenstackService),
+    and cache it
+    """
+    data = CATALOG_FETCHERS[catalog](openstack or OpenstackService(region=region))
+    timeout = (
+        settings.OPENSTACK_CATALOG_CACHE_TTL_SECONDS
+        + settings.OPENSTACK_CATALOG_CACHE_STALE_SECONDS
+    )
+    cache.set(
+        get_cache_key(region, catalog),
+        {"fetched_at": time.time(), "data": data},
+        timeout=timeout,
+    )
+    cache.delete(get_cache_key(region, catalog) + ":refreshing")
+    return data
+
+
+def get(region, catalog, openstack=None):
+    """
+    Return a catalog for a region (list of dicts).
+    Fetched synchronously on a cache miss (with openstack, if given); stale entries are served while a refresh is
+    enqueued.
+    """
+    from .tasks import refresh_region_catalog  # Avoid circular import
+
+    key = get_cache_key(region, catalog)
+    entry = cache.get(key)
+    if entry is None:
+        return refresh(region, catalog, openstack)
+
+    age = time.time() - entry["fetched_at"]
+    if age > settings.OPENSTACK_CATALOG_CACHE_TTL_SECONDS:
+        # Only enqueue one refresh at a time
+        if cache.add(key + ":refreshing", True, timeout=60):
+            refresh_region_catalog(region.pk, catalog)
+    return entry["data"]
+
+
+def get_project_catalog(tenant, catalog):
+    """
+    Return a tenant's own catalog entries (with tenant credentials, cached), not listed in its region's catalog;
+    empty for catalogs without project entries (volume types)
+    """
+    fetch = PROJECT_CATALOG_FETCHERS.get(catalog)
+    if fetch is None:
+        return []
+
+    key = get_project_cache_key(tenant.region_id, tenant.pk, catalog)
+    data = cache.get(key)
+    if data is None:
+        data = fetch(OpenstackService(tenant=tenant))
+        cache.set(key, data, timeout=settings.OPENSTACK_PROJECT_CATALOG_CACHE_SECONDS)
+    return data
+
+
+def get_for_tenant(tenant, catalog, openstack=None):
+    """
+    Return a catalog for a tenant (list of dicts): its region's catalog (see get, with openstack, if given),
+    followed by the tenant's own entries
+    """
+    data = get(tenant.region, catalog, openstack)
+    project_data = get_project_catalog(tenant, catalog)
+    if not project_data:
+        return data
+    ids = {item["id"] for item in data}
+    return data + [item for item in project_data if item["id"] not in ids]
+
+
+def invalidate(region, catalogs=None):
+    """Remove cached catalogs for a region, & its tenants (all catalogs, unless specified)"""
+    catalogs = catalogs or CATALOG_FETCHERS.keys()
+    tenant_ids = Tenant.objects.filter(region=region).values_list("pk", flat=True)
+    cache.delete_many(
+        [get_cache_key(region, catalog) for catalog in catalogs]
+        + [
+            get_project_cache_key(region.pk, tenant_id, catalog)
+            for tenant_id in tenant_ids
+            for catalog in catalogs
+            if catalog in PROJECT_CATALOG_FETCHERS
+        ]
+    )
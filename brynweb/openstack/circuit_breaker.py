@@ -0,0 +1,192 @@
+"""
+Circuit breakers for openstack API requests, keyed per region & service (nova, cinder, glance, keystone).
+
+After OPENSTACK_CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures (connection errors, timeouts or
+gateway errors), a circuit opens and requests to the service fail immediately with CircuitOpen.
+After OPENSTACK_CIRCUIT_BREAKER_RESET_SECONDS, the circuit is half-open: a single probe request is
+allowed through, closing the circuit on success, or re-opening it on failure.
+
+State is held in the django cache, so is shared between processes if the cache is.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from keystoneauth1 import exceptions as ksa_exceptions
+from keystoneauth1 import session as keystonesession
+
+from .exceptions import ServiceUnavailable
+from .metrics import openstack_request_seconds
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+NOVA = "nova"
+CINDER = "cinder"
+GLANCE = "glance"
+KEYSTONE = "keystone"
+SERVICES = [NOVA, CINDER, GLANCE, KEYSTONE]
+
+# Service, by keystone catalog service type
+SERVICE_TYPES = {
+    "compute": NOVA,
+    "volume": CINDER,
+    "volumev2": CINDER,
+    "volumev3": CINDER,
+    "block-storage": CINDER,
+    "image": GLANCE,
+    "identity": KEYSTONE,
+}
+
+# Gateway errors indicate the service is unreachable (rather than an error handling the request)
+FAILURE_STATUS_CODES = [502, 503, 504]
+
+
+class CircuitOpen(ServiceUnavailable):
+    default_detail = "Openstack service temporarily unavailable, try again later."
+    default_code = "circuit_open"
+
+
+class CircuitBreaker:
+    def __init__(self, region_name, service):
+        self.region_name = region_name
+        self.service = service
+
+    @property
+    def key(self):
+        return f"openstack:circuit:{self.region_name}:{self.service}"
+
+    @staticmethod
+    def get_state(entry):
+        """Return circuit state for a cache entry ({"failures": int, "opened_at": float | None})"""
+        if not entry or entry["opened_at"] is None:
+            return CLOSED
+        if (
+            time.time() - entry["opened_at"]
+            < settings.OPENSTACK_CIRCUIT_BREAKER_RESET_SECONDS
+        ):
+            return OPEN
+        return HALF_OPEN
+
+    @property
+    def state(self):
+        return self.get_state(cache.get(self.key))
+
+    def before_request(self):
+        """
+        Raise CircuitOpen if requests are not allowed (open, or half-open with a probe already in flight).
+        Returns the current cache entry, for recording the outcome.
+        """
+        entry = cache.get(self.key)
+        state = self.get_state(entry)
+        if state == OPEN or (
+            state == HALF_OPEN
+            and not cache.add(
+                self.key + ":probe",
+                True,
+                timeout=settings.OPENSTACK_REQUEST_TIMEOUT_SECONDS,
+            )
+        ):
+            raise CircuitOpen(
+                f"Openstack {self.service} service at {self.region_name} is temporarily unavailable, "
+                "try again later."
+            )
+        return entry
+
+    def record_success(self, entry):
+        if entry:
+            self.reset()
+
+    def record_failure(self, entry):
+        entry = entry or {"failures": 0, "opened_at": None}
+        entry["failures"] += 1
+        if (
+            self.get_state(entry) == HALF_OPEN
+            or entry["failures"] >= settings.OPENSTACK_CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        ):
+            entry["opened_at"] = time.time()
+        cache.set(self.key, entry, timeout=None)
+        cache.delete(self.key + ":probe")
+
+    def reset(self):
+        cache.delete_many([self.key, self.key + ":probe"])
+
+
+def get_region_states(region, services=SERVICES):
+    """Return circuit states for each service in a region (or the services specified)"""
+    breakers = [CircuitBreaker(region.name, service) for service in services]
+    entries = cache.get_many([breaker.key for breaker in breakers])
+    return {
+        breaker.service: CircuitBreaker.get_state(entries.get(breaker.key))
+        for breaker in breakers
+    }
+
+
+def get_open_services(region, services=SERVICES):
+    return [
+        service
+        for service, state in get_region_states(region, services).items()
+        if state == OPEN
+    ]
+
+
+def reset_region(region):
+    for service in SERVICES:
+        CircuitBreaker(region.name, service).reset()
+
+
+def is_failure(exception=None, response=None):
+    if exception is not None:
+        if isinstance(exception, ksa_exceptions.HttpError):
+            return exception.http_status in FAILURE_STATUS_CODES
+        return isinstance(exception, ksa_exceptions.ConnectionError)
+    return response.status_code in FAILURE_STATUS_CODES
+
+
+class CircuitBreakerSession(keystonesession.Session):
+    """
+    Keystone session, with requests guarded by per region & service circuit breakers (and timed).
+    Token requests made by the auth plugin (without a service type) are guarded by the keystone breaker.
+    """
+
+    def __init__(self, *args, region_name, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.region_name = region_name
+
+    def request(self, url, method, **kwargs):
+        service_type = (kwargs.get("endpoint_filter") or {}).get("service_type")
+        service = SERVICE_TYPES.get(service_type, service_type or KEYSTONE)
+        breaker = CircuitBreaker(self.region_name, service)
+        entry = breaker.before_request()
+        labels = {"region": self.region_name, "service": service, "method": method}
+        start = time.perf_counter()
+        try:
+            response = super().request(url, method, **kwargs)
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            openstack_request_seconds.observe(
+                time.perf_counter() - start, outcome="error", **labels
+            )
+            # Only record the outcome once, against the innermost service
+            if not getattr(e, "circuit_recorded", False):
+                if is_failure(exception=e):
+                    breaker.record_failure(entry)
+                    e.circuit_recorded = True
+                elif isinstance(e, ksa_exceptions.HttpError):
+                    # The service responded (with a client error), so is reachable
+                    breaker.record_success(entry)
+                    e.circuit_recorded = True
+            raise
+        openstack_request_seconds.observe(
+            time.perf_counter() - start,
+            outcome=f"{response.status_code // 100}xx",
+            **labels,
+        )
+        if is_failure(response=response):
+            breaker.record_failure(entry)
+        else:
+            breaker.record_success(entry)
+        return response
@@ -0,0 +1,14 @@
+from rest_framework import exceptions as drf_exceptions
+from rest_framework import status
+
+
+class ServiceUnavailable(drf_exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Service temporarily unavailable, try again later."
+    default_code = "service_unavailable"
+
+
+class OpenstackException(drf_exceptions.APIException):
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    default_detail = "An unexpected exception occurred."
+    default_code = "openstack_exception"
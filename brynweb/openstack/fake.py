@@ -0,0 +1,684 @@
+"""
+In-process fake openstack backend, for benchmarks & tests without a real cloud (see benchmark_api command).
+
+Implements the subset of novaclient, cinderclient, glanceclient & keystoneclient calls made by OpenstackService
+(and tasks), against a generated dataset: servers_per_tenant servers & volumes, and a private flavor & image, for
+each project, plus shared flavors, images & volume types. Each client call waits for a simulated round trip (latency,
+in seconds).
+"""
+
+import copy
+import datetime
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from unittest import mock
+
+from cinderclient import exceptions as cinder_exceptions
+from cinderclient.api_versions import APIVersion
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from novaclient import exceptions as nova_exceptions
+
+from . import auth_settings
+from .service import OpenstackService
+
+FAKE_AUTH_SETTINGS = {
+    "TENANT_NAME": "admin",
+    "AUTH_URL": "http://openstack.invalid:5000/v3/",
+    "SERVICE_USERNAME": "bryn",
+    "SERVICE_PASSWORD": "",
+    "ADMIN_USERNAME": "admin",
+    "ADMIN_PASSWORD": "",
+}
+
+SERVER_STATUSES = ["ACTIVE"] * 8 + ["SHUTOFF", "SHELVED_OFFLOADED"]
+
+# Project quotas (usage is counted from the project's resources)
+NOVA_QUOTAS = {
+    "maxTotalInstances": 100,
+    "maxTotalCores": 1000,
+    "maxTotalRAMSize": 4096 * 1000,
+}
+CINDER_QUOTAS = {"maxTotalVolumes": 200, "maxTotalVolumeGigabytes": 100000}
+
+
+def random_uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+
+def isoformat(dt):
+    """Format a datetime as openstack does (UTC, second precision)"""
+    return dt.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeResource:
+    """
+    Stand-in for an openstack client resource (e.g. novaclient Server), with attributes from info.
+    As with real clients, each call returns new resources (copies of the cloud's data), which callers may modify.
+    """
+
+    def __init__(self, manager, info):
+        self.manager = manager
+        self._info = info
+        self.__dict__.update(info)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {getattr(self, 'id', '')}>"
+
+    def to_dict(self):
+        return {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in ("manager", "_info")
+        }
+
+    def delete(self):
+        self.manager.delete(self.id)
+
+
+class FakeServer(FakeResource):
+    def reboot(self, reboot_type="SOFT"):
+        self.manager.reboot(self, reboot_type)
+
+    def stop(self):
+        self.manager.stop(self)
+
+    def start(self):
+        self.manager.start(self)
+
+    def shelve(self):
+        self.manager.shelve(self)
+
+    def unshelve(self):
+        self.manager.unshelve(self)
+
+
+class FakeManager:
+    """
+    Stand-in for an openstack client resource manager (e.g. novaclient ServerManager).
+    Resources are held by the cloud, keyed by (manager name, project id); shared resources use project id None.
+    """
+
+    name = None
+    resource_class = FakeResource
+    not_found = nova_exceptions.NotFound
+    bad_request = nova_exceptions.BadRequest
+    shared = False
+
+    def __init__(self, cloud, project_id):
+        self.cloud = cloud
+        self.project_id = None if self.shared else project_id
+
+    @property
+    def resources(self):
+        """Resource info (dicts), by id"""
+        return self.cloud.get_resources(self.name, self.project_id)
+
+    def build(self, info):
+        return self.resource_class(self, copy.deepcopy(info))
+
+    def get_info(self, resource_id):
+        resource_id = getattr(resource_id, "id", resource_id)
+        try:
+            return self.resources[resource_id]
+        except KeyError:
+            raise self.not_found(404, f"{self.name} {resource_id} could not be found.")
+
+    def matches(self, info, search_opts):
+        """Whether resource info matches search_opts (status & name, matched exactly)"""
+        return all(
+            info.get(key) == value
+            for key, value in search_opts.items()
+            if key in ("status", "name")
+        )
+
+    def paginate(self, infos, marker=None, limit=None):
+        """Return up to limit resources after the marker (resource id), as marker pagination"""
+        if marker:
+            ids = [info["id"] for info in infos]
+            if marker not in ids:
+                raise self.bad_request(400, f"marker [{marker}] not found")
+            infos = infos[ids.index(marker) + 1 :]
+        if limit is not None and limit >= 0:
+            infos = infos[:limit]
+        return infos
+
+    def list(self, search_opts=None, marker=None, limit=None, **kwargs):
+        self.cloud.wait()
+        infos = [
+            info
+            for info in self.resources.values()
+            if self.matches(info, search_opts or {})
+        ]
+        return [self.build(info) for info in self.paginate(infos, marker, limit)]
+
+    def get(self, resource_id):
+        self.cloud.wait()
+        return self.build(self.get_info(resource_id))
+
+    def update(self, resource_id, **info):
+        self.cloud.wait()
+        with self.cloud.lock:
+            self.get_info(resource_id).update(info)
+
+    def add(self, **info):
+        self.cloud.wait()
+        with self.cloud.lock:
+            self.resources[info["id"]] = info
+        return self.build(info)
+
+    def delete(self, resource_id):
+        self.cloud.wait()
+        with self.cloud.lock:
+            if self.resources.pop(resource_id, None) is None:
+                raise self.not_found(404)
+
+
+class FakeServerManager(FakeManager):
+    name = "servers"
+    resource_class = FakeServer
+
+    def matches(self, info, search_opts):
+        """As nova, matching names as regular expressions"""
+        name = search_opts.get("name")
+        if name and not re.search(name, info["name"]):
+            return False
+        return super().matches(
+            info, {key: value for key, value in search_opts.items() if key != "name"}
+        )
+
+    def list(self, detailed=True, search_opts=None, marker=None, limit=None, **kwargs):
+        search_opts = search_opts or {}
+        if not search_opts.get("all_tenants"):
+            return super().list(search_opts=search_opts, marker=marker, limit=limit)
+
+        self.cloud.wait()
+        servers = [
+            info
+            for project_id in self.cloud.project_ids
+            for info in self.cloud.get_resources(self.name, project_id).values()
+        ]
+        if "changes-since" in search_opts:
+            changes_since = parse_datetime(search_opts["changes-since"])
+            servers = [
+                s for s in servers if parse_datetime(s["updated"]) >= changes_since
+            ]
+        return [self.build(info) for info in servers]
+
+    def create(self, name, image, flavor=None, key_name=None, **kwargs):
+        now = isoformat(timezone.now())
+        return self.add(
+            id=str(uuid.uuid4()),
+            name=name,
+            status="ACTIVE",
+            tenant_id=self.project_id,
+            flavor={"id": str(flavor)},
+            image=image or "",
+            key_name=key_name,
+            addresses={},
+            metadata={},
+            created=now,
+            updated=now,
+        )
+
+    def set_status(self, server, status):
+        self.update(server, status=status, updated=isoformat(timezone.now()))
+
+    def reboot(self, server, reboot_type="SOFT"):
+        self.set_status(server, "ACTIVE")
+
+    def stop(self, server):
+        self.set_status(server, "SHUTOFF")
+
+    def start(self, server):
+        self.set_status(server, "ACTIVE")
+
+    def shelve(self, server):
+        self.set_status(server, "SHELVED_OFFLOADED")
+
+    def unshelve(self, server):
+        self.set_status(server, "ACTIVE")
+
+
+class FakeFlavor(FakeResource):
+    @property
+    def is_public(self):
+        return self._info["os-flavor-access:is_public"]
+
+
+class FakeCatalogManager(FakeManager):
+    """Shared resources (e.g. flavors), plus each project's own (visible to that project only)"""
+
+    shared = True
+
+    def __init__(self, cloud, project_id):
+        super().__init__(cloud, project_id)
+        self.owner_id = project_id
+
+    @property
+    def project_resources(self):
+        if self.owner_id is None:
+            return {}
+        return self.cloud.get_resources(self.name, self.owner_id)
+
+    def get_info(self, resource_id):
+        resource_id = getattr(resource_id, "id", resource_id)
+        if resource_id in self.project_resources:
+            return self.project_resources[resource_id]
+        return super().get_info(resource_id)
+
+    def list(self, **kwargs):
+        resources = super().list()
+        return resources + [
+            self.build(info) for info in self.project_resources.values()
+        ]
+
+
+class FakeFlavorManager(FakeCatalogManager):
+    # Region admins (without a project) see public flavors only
+    name = "flavors"
+    resource_class = FakeFlavor
+
+
+class FakeKeypairManager(FakeManager):
+    name = "keypairs"
+
+    def create(self, name, public_key=None):
+        return self.add(id=name, name=name, public_key=public_key)
+
+
+class FakeAbsoluteLimit:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+
+class FakeLimits:
+    def __init__(self, absolute):
+        self.absolute = [
+            FakeAbsoluteLimit(name, value) for name, value in absolute.items()
+        ]
+
+
+class FakeNovaLimitsManager(FakeManager):
+    """Stand-in for novaclient LimitsManager (absolute limits only)"""
+
+    def get(self, reserved=False, tenant_id=None):
+        self.cloud.wait()
+        project_id = tenant_id or self.project_id
+        flavors = self.cloud.get_resources("flavors", None)
+        servers = self.cloud.get_resources("servers", project_id).values()
+        server_flavors = [flavors[server["flavor"]["id"]] for server in servers]
+        return FakeLimits(
+            {
+                **NOVA_QUOTAS,
+                "totalInstancesUsed": len(servers),
+                "totalCoresUsed": sum(flavor["vcpus"] for flavor in server_flavors),
+                "totalRAMUsed": sum(flavor["ram"] for flavor in server_flavors),
+            }
+        )
+
+
+class FakeCinderLimitsManager(FakeManager):
+    """Stand-in for cinderclient LimitsManager (absolute limits only)"""
+
+    def get(self, tenant_id=None, project_id=None):
+        """As cinder, ignoring the requested project below microversion 3.39"""
+        self.cloud.wait()
+        if self.api_version < APIVersion("3.39"):
+            tenant_id = project_id = None
+        volumes = self.cloud.get_resources(
+            "volumes", project_id or tenant_id or self.project_id
+        )
+        return FakeLimits(
+            {
+                **CINDER_QUOTAS,
+                "totalVolumesUsed": len(volumes),
+                "totalGigabytesUsed": sum(
+                    volume["size"] for volume in volumes.values()
+                ),
+            }
+        )
+
+
+class FakeHypervisorManager:
+    def __init__(self, cloud):
+        self.cloud = cloud
+
+    def statistics(self):
+        self.cloud.wait()
+        running_vms = sum(
+            len(self.cloud.get_resources("servers", project_id))
+            for project_id in self.cloud.project_ids
+        )
+        return FakeResource(
+            self,
+            {
+                "count": 10,
+                "disk_available_least": 8000,
+                "free_disk_gb": 9000,
+                "free_ram_mb": 512000,
+                "local_gb": 10000,
+                "local_gb_used": 1000,
+                "memory_mb": 1024000,
+                "memory_mb_used": 512000,
+                "running_vms": running_vms,
+                "vcpus": 640,
+                "vcpus_used": min(running_vms * 4, 640),
+            },
+        )
+
+
+class FakeServerVolumeManager:
+    """Stand-in for novaclient VolumeManager (volume attachments)"""
+
+    def __init__(self, cloud, project_id):
+        self.cloud = cloud
+        self.project_id = project_id
+
+    @property
+    def volumes(self):
+        return FakeVolumeManager(self.cloud, self.project_id)
+
+    def create_server_volume(self, server_id, volume_id, device=None):
+        attachment = {
+            "id": volume_id,
+            "attachment_id": str(uuid.uuid4()),
+            "volume_id": volume_id,
+            "server_id": server_id,
+            "device": device or "/dev/vdb",
+            "attached_at": isoformat(timezone.now()),
+        }
+        self.volumes.update(volume_id, status="in-use", attachments=[attachment])
+        return self.volumes.build(attachment)
+
+    def delete_server_volume(self, server_id, volume_id):
+        self.volumes.update(volume_id, status="available", attachments=[])
+
+
+class FakeVolumeManager(FakeManager):
+    name = "volumes"
+    not_found = cinder_exceptions.NotFound
+    bad_request = cinder_exceptions.BadRequest
+
+    def matches(self, info, search_opts):
+        """As cinder, matching name~ (an inexact filter, ignored below microversion 3.34) as a substring"""
+        name = search_opts.get("name~")
+        if name and self.api_version >= APIVersion("3.34"):
+            if name not in (info["name"] or ""):
+                return False
+        return super().matches(info, search_opts)
+
+    def create(self, size, name=None, imageRef=None, volume_type=None, **kwargs):
+        return self.add(
+            id=str(uuid.uuid4()),
+            name=name,
+            size=size,
+            status="available",
+            bootable="false",
+            volume_type=volume_type or self.cloud.default_volume_type,
+            attachments=[],
+            created_at=isoformat(timezone.now()),
+        )
+
+    def set_bootable(self, volume, flag):
+        self.update(volume, bootable="true" if flag else "false")
+
+
+class FakeVolumeTypeManager(FakeManager):
+    name = "volume_types"
+    not_found = cinder_exceptions.NotFound
+    shared = True
+
+    def list(self, is_public=None, **kwargs):
+        return super().list()
+
+    def default(self):
+        return self.get(self.cloud.default_volume_type)
+
+
+class FakeImageManager(FakeCatalogManager):
+    name = "images"
+
+    def list(self, filters=None, **kwargs):
+        images = super().list()
+        if self.owner_id is not None:
+            # Projects see public images & their own (region admins, all shared images)
+            images = [
+                image
+                for image in images
+                if image.visibility == "public" or image.id in self.project_resources
+            ]
+        # glanceclient lists lazily (paged generator)
+        visibility = (filters or {}).get("visibility")
+        return (image for image in images if visibility in (None, image.visibility))
+
+
+class FakeProjectManager(FakeManager):
+    name = "projects"
+    shared = True
+
+
+class FakeNovaClient:
+    def __init__(self, cloud, project_id):
+        self.servers = FakeServerManager(cloud, project_id)
+        self.flavors = FakeFlavorManager(cloud, project_id)
+        self.keypairs = FakeKeypairManager(cloud, project_id)
+        self.volumes = FakeServerVolumeManager(cloud, project_id)
+        self.hypervisors = FakeHypervisorManager(cloud)
+        self.limits = FakeNovaLimitsManager(cloud, project_id)
+
+
+class FakeCinderClient:
+    def __init__(self, cloud, project_id, api_version="3.0"):
+        self.volumes = FakeVolumeManager(cloud, project_id)
+        self.volume_types = FakeVolumeTypeManager(cloud, project_id)
+        self.limits = FakeCinderLimitsManager(cloud, project_id)
+        for manager in (self.volumes, self.volume_types, self.limits):
+            manager.api_version = APIVersion(api_version)
+
+
+class FakeGlanceClient:
+    def __init__(self, cloud, project_id):
+        self.images = FakeImageManager(cloud, project_id)
+
+
+class FakeKeystoneClient:
+    def __init__(self, cloud, project_id):
+        self.projects = FakeProjectManager(cloud, project_id)
+
+
+class FakeCloud:
+    """
+    Fake openstack cloud (all regions), with resources generated on first use for each project.
+    Use FakeCloud.patch() to route OpenstackService clients to the fake, e.g.
+
+        with FakeCloud(servers_per_tenant=100, latency=0.05).patch():
+            ...
+    """
+
+    def __init__(
+        self,
+        servers_per_tenant=10,
+        volumes_per_tenant=None,
+        flavor_count=10,
+        image_count=20,
+        latency=0.0,
+        public_network_name="public",
+        seed=0,
+    ):
+        self.servers_per_tenant = servers_per_tenant
+        self.volumes_per_tenant = (
+            servers_per_tenant if volumes_per_tenant is None else volumes_per_tenant
+        )
+        self.latency = latency
+        self.public_network_name = public_network_name
+        self.seed = seed
+        self.lock = threading.RLock()
+        self.call_count = 0
+        self._resources = defaultdict(dict)
+        self._generated_projects = set()
+
+        self.add_shared_resources(flavor_count, image_count)
+
+    def wait(self):
+        """Simulate a client call round trip"""
+        with self.lock:
+            self.call_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def project_ids(self):
+        return list(self._generated_projects)
+
+    def get_resources(self, name, project_id):
+        """Return resources (dict, by id) of a given type, generating a project's dataset on first use"""
+        if project_id is not None and project_id not in self._generated_projects:
+            with self.lock:
+                if project_id not in self._generated_projects:
+                    self.add_project_resources(project_id)
+                    self._generated_projects.add(project_id)
+        return self._resources[(name, project_id)]
+
+    def get_random(self, *keys):
+        return random.Random(":".join(str(key) for key in (self.seed,) + keys))
+
+    def add_shared_resources(self, flavor_count, image_count):
+        rng = self.get_random("shared")
+        flavors = self._resources[("flavors", None)]
+        for n in range(flavor_count):
+            flavor_id = random_uuid(rng)
+            flavors[flavor_id] = {
+                "id": flavor_id,
+                "name": f"climb.flavor{n}",
+                "ram": 4096 * (n + 1),
+                "vcpus": 2 * (n + 1),
+                "disk": 120,
+                "os-flavor-access:is_public": True,
+            }
+        images = self._resources[("images", None)]
+        for n in range(image_count):
+            image_id = random_uuid(rng)
+            images[image_id] = {
+                "id": image_id,
+                "name": f"image{n}",
+                "visibility": "public" if n % 2 == 0 else "private",
+                "status": "active",
+            }
+        volume_types = self._resources[("volume_types", None)]
+        for name in ["default", "ssd"]:
+            volume_type_id = random_uuid(rng)
+            volume_types[volume_type_id] = {"id": volume_type_id, "name": name}
+        self.default_volume_type = next(iter(volume_types))
+
+    def add_project_resources(self, project_id):
+        rng = self.get_random(project_id)
+        flavor_ids = list(self._resources[("flavors", None)])
+        created = isoformat(timezone.now() - datetime.timedelta(days=30))
+
+        servers = self._resources[("servers", project_id)]
+        for n in range(self.servers_per_tenant):
+            server_id = random_uuid(rng)
+            servers[server_id] = {
+                "id": server_id,
+                "name": f"server{n}",
+                "status": rng.choice(SERVER_STATUSES),
+                "tenant_id": project_id,
+                "flavor": {"id": rng.choice(flavor_ids)},
+                "image": "",  # Volume backed
+                "key_name": None,
+                "addresses": {
+                    self.public_network_name: [
+                        {"addr": f"10.{n // 65536}.{n // 256 % 256}.{n % 256}"}
+                    ]
+                },
+                "metadata": {},
+                "created": created,
+                "updated": created,
+            }
+
+        # Boot volumes (attached) for each server, then any further volumes are unattached
+        volumes = self._resources[("volumes", project_id)]
+        server_ids = list(servers)
+        for n in range(self.volumes_per_tenant):
+            volume_id = random_uuid(rng)
+            attachments = []
+            if n < len(server_ids):
+                attachments.append(
+                    {
+                        "id": volume_id,
+                        "attachment_id": random_uuid(rng),
+                        "volume_id": volume_id,
+                        "server_id": server_ids[n],
+                        "device": "/dev/vda",
+                        "attached_at": created,
+                    }
+                )
+            volumes[volume_id] = {
+                "id": volume_id,
+                "name": f"volume{n}",
+                "size": 120,
+                "status": "in-use" if attachments else "available",
+                "bootable": "true" if attachments else "false",
+                "volume_type": self.default_volume_type,
+                "attachments": attachments,
+                "created_at": created,
+            }
+
+        # A private flavor & image (snapshot) of the project's own
+        flavor_id = random_uuid(rng)
+        self._resources[("flavors", project_id)][flavor_id] = {
+            "id": flavor_id,
+            "name": f"{project_id}.flavor",
+            "ram": 4096,
+            "vcpus": 2,
+            "disk": 120,
+            "os-flavor-access:is_public": False,
+        }
+        image_id = random_uuid(rng)
+        self._resources[("images", project_id)][image_id] = {
+            "id": image_id,
+            "name": f"{project_id}-snapshot",
+            "visibility": "private",
+            "status": "active",
+        }
+
+        self._resources[("projects", None)][project_id] = {
+            "id": project_id,
+            "name": project_id,
+        }
+
+    @staticmethod
+    def get_project_id(openstack):
+        """Project id for an OpenstackService instance (None for region admin services)"""
+        return openstack.tenant.created_tenant_id if openstack.tenant else None
+
+    @contextmanager
+    def patch(self):
+        """Route OpenstackService clients (for any region) to this cloud"""
+
+        def client_property(client_class):
+            return property(
+                lambda openstack: client_class(self, self.get_project_id(openstack))
+            )
+
+        authentication = defaultdict(lambda: FAKE_AUTH_SETTINGS)
+        clients = mock.patch.multiple(
+            OpenstackService,
+            nova=client_property(FakeNovaClient),
+            cinder=client_property(FakeCinderClient),
+            get_cinder=lambda openstack, api_version: FakeCinderClient(
+                self, self.get_project_id(openstack), api_version
+            ),
+            glance=client_property(FakeGlanceClient),
+            keystone=client_property(FakeKeystoneClient),
+        )
+        with mock.patch.object(auth_settings, "AUTHENTICATION", authentication):
+            with clients:
+                yield self
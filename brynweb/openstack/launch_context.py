@@ -0,0 +1,97 @@
+"""
+Launch context: the data needed to launch a server in a tenant (e.g. for the new instance form), in one request.
+
+Catalogs (flavors, images & volume types) and the project's quotas are fetched concurrently: catalogs sharing a single
+region admin OpenstackService (so a single keystone session), and quotas with the tenant's own OpenstackService (since
+cinder only reports another project's limits from microversion 3.39). The user's key pairs & hypervisor stats are
+queried on the request thread. Openstack sections fail independently: a failed section is None, with its error reported.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from core.row_builders import build_rows
+from . import catalog
+from .models import HypervisorStats
+from .serializers import (
+    FlavorSerializer,
+    HypervisorStatsSerializer,
+    ImageSerializer,
+    KeyPairSerializer,
+    VolumeTypeSerializer,
+)
+from .service import OpenstackService
+
+CATALOG_SECTIONS = {
+    "flavors": (catalog.FLAVORS, FlavorSerializer),
+    "images": (catalog.IMAGES, ImageSerializer),
+    "volume_types": (catalog.VOLUME_TYPES, VolumeTypeSerializer),
+}
+
+# Quotas, by (limit, used) nova & cinder absolute limit names (limits of -1 are unlimited)
+QUOTAS = {
+    "instances": ("maxTotalInstances", "totalInstancesUsed"),
+    "cores": ("maxTotalCores", "totalCoresUsed"),
+    "ram_mb": ("maxTotalRAMSize", "totalRAMUsed"),
+    "volumes": ("maxTotalVolumes", "totalVolumesUsed"),
+    "volume_gb": ("maxTotalVolumeGigabytes", "totalGigabytesUsed"),
+}
+
+
+def get_catalog(openstack, tenant, catalog_name, serializer_class):
+    return build_rows(
+        serializer_class,
+        catalog.get_for_tenant(tenant, catalog_name, openstack=openstack),
+        team=tenant.team_id,
+        tenant=tenant.pk,
+    )
+
+
+def get_quotas(openstack, tenant):
+    """Return the tenant project's quotas, as {"instances": {"limit": 10, "used": 2}, ...} (openstack for the tenant)"""
+    limits = openstack.limits.get()
+    return {
+        name: {"limit": limits.get(limit), "used": limits.get(used)}
+        for name, (limit, used) in QUOTAS.items()
+    }
+
+
+def get_launch_context(tenant, user):
+    """
+    Return the launch context for a tenant & user: a dict of sections (flavors, images, volume_types, quotas,
+    keypairs & hypervisor_stats), and errors (detail, by failed section)
+    """
+    openstack = OpenstackService(region=tenant.region)
+    fetchers = {
+        name: (get_catalog, openstack, catalog_name, serializer_class)
+        for name, (catalog_name, serializer_class) in CATALOG_SECTIONS.items()
+    }
+    fetchers["quotas"] = (get_quotas, OpenstackService(tenant=tenant))
+
+    context = {}
+    errors = {}
+    # Openstack requests only in worker threads; database access remains on the request thread
+    with ThreadPoolExecutor(
+        max_workers=settings.OPENSTACK_MAX_CONCURRENT_REQUESTS
+    ) as executor:
+        futures = {
+            name: executor.submit(func, service, tenant, *args)
+            for name, (func, service, *args) in fetchers.items()
+        }
+        keypairs = KeyPairSerializer(user.keypairs.all(), many=True).data
+        hypervisor_stats = HypervisorStatsSerializer(
+            HypervisorStats.objects.all(), many=True
+        ).data
+
+        for name, future in futures.items():
+            try:
+                context[name] = future.result()
+            except Exception as e:
+                context[name] = None
+                errors[name] = str(e)
+
+    context["keypairs"] = keypairs
+    context["hypervisor_stats"] = hypervisor_stats
+    context["errors"] = errors
+    return context
@@ -0,0 +1,93 @@
+"""
+Event-driven server lease timers.
+
+Rather than polling for due leases, each lease has a huey task scheduled (with an ETA) for its next timer point: the
+start of each reminder window (i.e. when time_remaining.days first equals a day in SERVER_LEASE_REMINDER_DAYS), then
+expiry. Timers are scheduled whenever a lease is created, renewed or granted, and carry the lease's renewal_count &
+expiry as a revision: a timer for a superseded revision does nothing when it fires (i.e. it is cancelled).
+
+Timers are also rescheduled daily for all active leases, as a safety net (e.g. for legacy leases, leases edited in
+the admin, or timers lost from the queue). Each scheduled ETA is persisted on the lease (timer_eta), so a timer already
+scheduled isn't scheduled again: once a timer's point has passed without it firing, the next timer point differs.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def get_reminder_points(lease):
+    """Start of each of the lease's reminder windows, ascending"""
+    return sorted(
+        lease.expiry - datetime.timedelta(days=days + 1)
+        for days in settings.SERVER_LEASE_REMINDER_DAYS
+    )
+
+
+def is_reminder_due(lease, now=None):
+    """Is the lease in a reminder window, and not yet reminded since the window started?"""
+    now = now or timezone.now()
+    if lease.expiry is None or lease.expiry <= now:
+        return False
+    for point in get_reminder_points(lease):
+        if point <= now < point + datetime.timedelta(days=1):
+            return (
+                lease.last_reminder_sent_at is None
+                or lease.last_reminder_sent_at < point
+            )
+    return False
+
+
+def get_next_timer(lease, now=None):
+    """Time of the lease's next timer point (now, if one is already due), or None if there is none"""
+    now = now or timezone.now()
+    if lease.expiry is None:
+        return None
+    if lease.expiry <= now:
+        return now if settings.SERVER_LEASE_AUTO_SHELVE else None
+    if is_reminder_due(lease, now):
+        return now
+    future_points = [point for point in get_reminder_points(lease) if point > now]
+    return future_points[0] if future_points else lease.expiry
+
+
+def schedule(lease):
+    """
+    Schedule a timer task for the lease's next timer point, if it has one.
+    Returns the ETA, or None if nothing was scheduled (including an identical timer already scheduled).
+    """
+    from .models import ServerLease  # Avoid circular import
+    from .tasks import fire_server_lease_timer  # Avoid circular import
+
+    if lease.shelved or lease.deleted:
+        return None
+    now = timezone.now()
+    eta = get_next_timer(lease, now)
+    if eta is None:
+        return None
+
+    # Avoid duplicate timers (e.g. from the daily reschedule): claim the ETA with a conditional update, so concurrent
+    # calls don't both schedule it
+    claimed = (
+        ServerLease.objects.filter(pk=lease.pk)
+        .exclude(timer_eta=eta)
+        .update(timer_eta=eta)
+    )
+    if not claimed:
+        return None
+    lease.timer_eta = eta
+
+    fire_server_lease_timer.schedule(
+        (lease.pk, lease.renewal_count, lease.expiry), eta=eta
+    )
+    return eta
+
+
+def schedule_all(leases):
+    """Schedule timers for a queryset of leases, returning the number scheduled"""
+    scheduled = 0
+    for lease in leases.active_with_expiry().iterator(chunk_size=500):
+        if schedule(lease):
+            scheduled += 1
+    return scheduled
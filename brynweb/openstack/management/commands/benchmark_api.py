@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from ... import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark openstack API endpoints against a fake (in-process) openstack backend. "
+        "Runs offline, against a test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=benchmarks.DEFAULT_SIZES,
+            help="Servers (and volumes) per tenant, for each run",
+        )
+        parser.add_argument(
+            "--endpoints",
+            nargs="+",
+            choices=list(benchmarks.ENDPOINTS),
+            default=list(benchmarks.ENDPOINTS),
+        )
+        parser.add_argument(
+            "--requests", type=int, default=100, help="Requests per endpoint & size"
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="Simulated openstack round trip per client call (seconds)",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Output results as JSON"
+        )
+
+    def handle(self, *args, **options):
+        with benchmarks.benchmark_environment():
+            results = benchmarks.run(
+                sizes=options["sizes"],
+                endpoints=options["endpoints"],
+                requests=options["requests"],
+                latency=options["latency"],
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'endpoint':<16}{'size':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['endpoint']:<16}{result['size']:>8}{result['rps']:>10.1f}"
+                f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['queries']:>10.1f}"
+            )
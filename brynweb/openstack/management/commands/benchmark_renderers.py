@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from ... import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark JSON renderers, rendering an instance list response from a fake (in-process) openstack backend. "
+        "Runs offline, against a test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", type=int, default=1000, help="Servers in the instance list"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Renders per renderer"
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Output results as JSON"
+        )
+
+    def handle(self, *args, **options):
+        with benchmarks.benchmark_environment():
+            results = benchmarks.benchmark_renderers(
+                size=options["size"], repeat=options["repeat"]
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        baseline = results[0]["ms"]
+        self.stdout.write(f"{'renderer':<34}{'size':>8}{'ms':>10}{'speedup':>10}")
+        for result in results:
+            self.stdout.write(
+                f"{result['renderer']:<34}{result['size']:>8}{result['ms']:>10.2f}"
+                f"{baseline / result['ms']:>9.1f}x"
+            )
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from ... import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark list serializers against compiled row builders, for each list endpoint's data from a fake "
+        "(in-process) openstack backend. Runs offline, against a test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", type=int, default=1000, help="Objects in each list"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Serializations per method"
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Output results as JSON"
+        )
+
+    def handle(self, *args, **options):
+        with benchmarks.benchmark_environment():
+            results = benchmarks.benchmark_serializers(
+                size=options["size"], repeat=options["repeat"]
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        baselines = {}
+        self.stdout.write(
+            f"{'endpoint':<12}{'method':<14}{'size':>8}{'ms':>10}{'speedup':>10}"
+        )
+        for result in results:
+            baseline = baselines.setdefault(result["endpoint"], result["ms"])
+            self.stdout.write(
+                f"{result['endpoint']:<12}{result['method']:<14}{result['size']:>8}{result['ms']:>10.2f}"
+                f"{baseline / result['ms']:>9.1f}x"
+            )
@@ -0,0 +1,45 @@
+"""
+Openstack call instrumentation (see core.metrics).
+
+OpenstackService sub-service calls (e.g. servers.get_list) are timed by InstrumentedService, and the underlying
+HTTP requests (e.g. nova GET) by the pooled keystone sessions (see circuit_breaker.CircuitBreakerSession).
+Results returned lazily (e.g. glance image lists) are only timed at the HTTP request level.
+"""
+
+import functools
+
+from core.metrics import registry
+
+openstack_call_seconds = registry.histogram(
+    "bryn_openstack_call_seconds",
+    "OpenstackService calls, by region, service (e.g. servers), method & outcome.",
+    ["region", "service", "method", "outcome"],
+)
+
+openstack_request_seconds = registry.histogram(
+    "bryn_openstack_request_seconds",
+    "Openstack API requests, by region, service (e.g. nova), HTTP method & outcome (status class or error).",
+    ["region", "service", "method", "outcome"],
+)
+
+
+class InstrumentedService:
+    """
+    Proxy for an OpenstackService sub-service (e.g. ServersService), timing public method calls.
+    """
+
+    def __init__(self, service, region_name, service_name):
+        self._service = service
+        self._labels = {"region": region_name, "service": service_name}
+
+    def __getattr__(self, name):
+        attr = getattr(self._service, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            with openstack_call_seconds.time(method=name, **self._labels):
+                return attr(*args, **kwargs)
+
+        return timed
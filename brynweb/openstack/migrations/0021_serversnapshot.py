@@ -0,0 +1,81 @@
+# Generated by Django 3.1.1 on 2021-04-14 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userdb", "0024_auto_20210406_1525"),
+        ("openstack", "0020_serverprovisioningjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServerSnapshotSync",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_synced_at", models.DateTimeField(blank=True, null=True)),
+                ("last_full_sync_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "region",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="server_snapshot_sync",
+                        to="userdb.region",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ServerSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("project_id", models.CharField(max_length=50)),
+                ("server_id", models.UUIDField(editable=False, unique=True)),
+                ("name", models.CharField(max_length=255)),
+                ("status", models.CharField(max_length=50)),
+                ("flavor_id", models.CharField(max_length=50)),
+                ("image_id", models.CharField(blank=True, max_length=50)),
+                ("addresses", models.JSONField(default=dict)),
+                ("created", models.DateTimeField()),
+                ("updated", models.DateTimeField()),
+                ("synced_at", models.DateTimeField()),
+                (
+                    "region",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="server_snapshots",
+                        to="userdb.region",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="server_snapshots",
+                        to="openstack.tenant",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.1 on 2021-04-15 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("openstack", "0021_serversnapshot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="serverlease",
+            index=models.Index(
+                condition=models.Q(("deleted", False), ("shelved", False)),
+                fields=["expiry", "last_reminder_sent_at"],
+                name="serverlease_active_expiry_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.1 on 2026-10-18 21:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("openstack", "0022_serverlease_active_expiry_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="serverlease",
+            name="timer_eta",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
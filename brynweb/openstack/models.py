@@ -1,4 +1,6 @@
 import datetime
+import hashlib
+import itertools
 import uuid
 
 from django.conf import settings
@@ -14,12 +16,13 @@ from slugify import slugify
 from sshpubkeys import SSHKey
 
 # from .service import OpenstackService
+from .records import ServerRecord
 from .validators import validate_public_key
+from core import outbox
 from core.tasks import send_mail
 from core.utils import main_text_from_html
 from userdb.models import Region, Team, TeamMember
 
-
 User = get_user_model()
 
 # Region model would ideally be in this app, but to avoid legacy migration issues it remains in userdb
@@ -96,6 +99,86 @@ class ServerLeaseQuerySet(models.QuerySet):
     def active_indefinite(self):
         return self.active().filter(expiry__isnull=True)
 
+    def due_for_reminder(self, reminder_days=None):
+        """
+        Active leases with a whole number of days remaining in reminder_days (default SERVER_LEASE_REMINDER_DAYS),
+        excluding leases reminded within the last 24 hours.
+        """
+        if reminder_days is None:
+            reminder_days = settings.SERVER_LEASE_REMINDER_DAYS
+        now = timezone.now()
+        # i.e. time_remaining.days == days
+        in_reminder_window = Q()
+        for days in reminder_days:
+            in_reminder_window |= Q(
+                expiry__gte=now + datetime.timedelta(days=days),
+                expiry__lt=now + datetime.timedelta(days=days + 1),
+            )
+        if not in_reminder_window:
+            return self.none()
+        return self.active().filter(
+            in_reminder_window,
+            Q(last_reminder_sent_at__isnull=True)
+            | Q(last_reminder_sent_at__lte=now - datetime.timedelta(days=1)),
+        )
+
+    @staticmethod
+    def send_email_renewal_reminder_digest(user, leases):
+        """Send (queue) a single renewal reminder email to a user, listing multiple leases"""
+        context = {
+            "user": user,
+            "leases": [lease.get_reminder_context() for lease in leases],
+        }
+        subject = render_to_string(
+            "openstack/email/server_lease_expiry_digest_subject.txt", context
+        ).strip()
+        html_content = render_to_string(
+            "openstack/email/server_lease_expiry_digest_email.html", context
+        )
+        text_content = main_text_from_html(html_content)
+        lease_pks = ",".join(str(lease.pk) for lease in leases)
+        outbox.queue(
+            subject,
+            text_content,
+            settings.DEFAULT_FROM_EMAIL,
+            [user.email],
+            html_message=html_content,
+            dedupe_key=(
+                f"server_lease_reminder_digest:{user.pk}:{timezone.now():%Y-%m-%d}:"
+                f"{hashlib.md5(lease_pks.encode()).hexdigest()}"
+            ),
+        )
+
+    def send_email_renewal_reminder_digests(self):
+        """
+        Send a single renewal reminder email to each assigned user, listing all of their leases in this queryset.
+        Emails are queued in the outbox (so are sent in batches), and last_reminder_sent_at is updated for all
+        reminded leases with a single query (after iterating, since SQLite doesn't isolate iteration from updates).
+        Returns the number of emails queued.
+        """
+        leases = (
+            self.select_related("assigned_teammember__user")
+            .order_by("assigned_teammember__user", "expiry")
+            .iterator(chunk_size=500)
+        )
+        by_user = itertools.groupby(
+            leases, key=lambda lease: lease.assigned_teammember.user
+        )
+        reminded_pks = []
+        sent = 0
+        try:
+            for user, user_leases in by_user:
+                user_leases = list(user_leases)
+                self.send_email_renewal_reminder_digest(user, user_leases)
+                reminded_pks.extend(lease.pk for lease in user_leases)
+                sent += 1
+        finally:
+            # Including any reminders sent before a failure, so they aren't repeated
+            self.model.objects.filter(pk__in=reminded_pks).update(
+                last_reminder_sent_at=timezone.now()
+            )
+        return sent
+
     def deleted(self):
         return self.filter(deleted=True)
 
@@ -105,6 +188,40 @@ class ServerLeaseQuerySet(models.QuerySet):
     def inactive(self):
         return self.filter(Q(deleted=True) | Q(shelved=True))
 
+    def get_or_create_for_servers(self, tenant, servers):
+        """
+        Return a dict of leases keyed by server id, for a list of openstack servers.
+        Existing leases are fetched in a single query; missing leases (i.e. legacy servers)
+        are created in bulk and assigned to a team admin member.
+        """
+        leases = {
+            str(lease.server_id): lease
+            for lease in self.filter(
+                server_id__in=[server.id for server in servers]
+            ).select_related("assigned_teammember__user")
+        }
+        missing = [server for server in servers if server.id not in leases]
+        if missing:
+            admin_teammember = (
+                TeamMember.objects.filter(team=tenant.team_id, is_admin=True)
+                .select_related("user")
+                .first()
+            )
+            new_leases = [
+                self.model(
+                    server_id=server.id,
+                    server_name=server.name,
+                    tenant=tenant,
+                    assigned_teammember=admin_teammember,
+                    shelved="SHELVED" in server.status,
+                )
+                for server in missing
+            ]
+            # Ignore conflicts, in case of concurrent creation by another request
+            self.bulk_create(new_leases, ignore_conflicts=True)
+            leases.update({str(lease.server_id): lease for lease in new_leases})
+        return leases
+
 
 class ServerLease(models.Model):
     server_id = models.UUIDField(unique=True, editable=False)
@@ -124,9 +241,21 @@ class ServerLease(models.Model):
     shelved = models.BooleanField(default=False)
     deleted = models.BooleanField(default=False)
     last_reminder_sent_at = models.DateTimeField(blank=True, null=True, editable=False)
+    # ETA of the last timer scheduled (see openstack.lease_timers), so the same timer isn't scheduled twice
+    timer_eta = models.DateTimeField(blank=True, null=True, editable=False)
 
     objects = ServerLeaseQuerySet.as_manager()
 
+    class Meta:
+        indexes = [
+            # Reminder selection (see ServerLeaseQuerySet.due_for_reminder)
+            models.Index(
+                fields=["expiry", "last_reminder_sent_at"],
+                name="serverlease_active_expiry_idx",
+                condition=Q(deleted=False, shelved=False),
+            )
+        ]
+
     @property
     def time_remaining(self):
         if self.expiry:
@@ -153,22 +282,40 @@ class ServerLease(models.Model):
             self.user = user
         self.last_reminder_sent_at = None
         self.save()
+        self.schedule_timer()
 
-    def shelve_server(self):
-        pass
+    def schedule_timer(self):
+        """Schedule a timer for the lease's next reminder or expiry (see openstack.lease_timers)"""
+        from . import lease_timers  # Avoid circular import
 
-    def send_email_renewal_reminder(self):
-        """Send an email renewal reminder"""
-        user = self.assigned_teammember.user
-        context = {
-            "user": user,
+        if settings.SERVER_LEASE_TIMERS:
+            return lease_timers.schedule(self)
+
+    def shelve_server(self):
+        """
+        Shelve the server in the background, if the lease is overdue (see openstack.shelving).
+        Returns True if shelving was enqueued.
+        """
+        from . import shelving  # Avoid circular import
+
+        return shelving.enqueue(ServerLease.objects.filter(pk=self.pk)) > 0
+
+    def get_reminder_context(self):
+        """Template context for renewal reminder emails"""
+        time_remaining = self.time_remaining
+        return {
             "server_name": self.server_name,
             "renewal_url": self.renewal_url,
             "expiry": self.expiry,
-            "days_remaining": self.time_remaining.days,
-            "hours_remaining": self.time_remaining.days * 24
-            + self.time_remaining.seconds // 3600,
+            "days_remaining": time_remaining.days,
+            "hours_remaining": time_remaining.days * 24
+            + time_remaining.seconds // 3600,
         }
+
+    def send_email_renewal_reminder(self):
+        """Send an email renewal reminder"""
+        user = self.assigned_teammember.user
+        context = {"user": user, **self.get_reminder_context()}
         subject = render_to_string(
             "openstack/email/server_lease_expiry_reminder_subject.txt", context
         ).strip()
@@ -176,13 +323,13 @@ class ServerLease(models.Model):
             "openstack/email/server_lease_expiry_reminder_email.html", context
         )
         text_content = main_text_from_html(html_content)
-        send_mail(
+        outbox.queue(
             subject,
             text_content,
             settings.DEFAULT_FROM_EMAIL,
             [user.email],
             html_message=html_content,
-            fail_silently=False,
+            dedupe_key=f"server_lease_reminder:{self.pk}:{timezone.now():%Y-%m-%d}",
         )
         self.last_reminder_sent_at = timezone.now()
         self.save()
@@ -239,6 +386,7 @@ class ServerLeaseRequest(models.Model):
         lease = self.server_lease
         lease.expiry = None
         lease.save()
+        lease.schedule_timer()  # Supersedes any scheduled timer (indefinite leases have none)
 
         self.granted = True
         self.closed = True
@@ -296,6 +444,118 @@ class ServerLeaseRequest(models.Model):
         return f"Indefinite lease request for {self.server_lease.server_name}"
 
 
+class ServerProvisioningJob(models.Model):
+    """
+    Tracks progress of a server launch, carried out in the background by tasks.provision_server
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED"
+        CREATING_VOLUME = "CREATING_VOLUME"
+        AWAITING_VOLUME = "AWAITING_VOLUME"
+        BOOTING = "BOOTING"
+        COMPLETE = "COMPLETE"
+        FAILED = "FAILED"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, related_name="provisioning_jobs"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="provisioning_jobs"
+    )
+    name = models.CharField(max_length=255)
+    flavor = models.CharField(max_length=50)
+    image = models.CharField(max_length=50)
+    keypair = models.ForeignKey(KeyPair, null=True, on_delete=models.SET_NULL)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.QUEUED
+    )
+    volume_id = models.CharField(max_length=50, blank=True)
+    volume_checks = models.PositiveIntegerField(default=0)
+    server_id = models.CharField(max_length=50, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, editable=False)
+
+    @property
+    def is_finished(self):
+        return self.status in [self.Status.COMPLETE, self.Status.FAILED]
+
+    def set_status(self, status, error=""):
+        self.status = status
+        self.error = error
+        self.save()
+
+    def __str__(self):
+        return f"Provisioning job for server '{self.name}' ({self.status})"
+
+
+class ServerSnapshot(models.Model):
+    """
+    Local mirror of an openstack server, kept in sync by tasks.sync_server_snapshots
+    """
+
+    region = models.ForeignKey(
+        Region, on_delete=models.CASCADE, related_name="server_snapshots"
+    )
+    tenant = models.ForeignKey(
+        Tenant,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="server_snapshots",
+    )
+    project_id = models.CharField(max_length=50)
+    server_id = models.UUIDField(unique=True, editable=False)
+    name = models.CharField(max_length=255)
+    status = models.CharField(max_length=50)
+    flavor_id = models.CharField(max_length=50)
+    image_id = models.CharField(max_length=50, blank=True)
+    addresses = models.JSONField(default=dict)
+    created = models.DateTimeField()
+    updated = models.DateTimeField()
+    synced_at = models.DateTimeField()
+
+    def as_server(self):
+        """Return a ServerRecord (as listed by OpenstackService), for use with instance transform functions"""
+        return ServerRecord(
+            id=str(self.server_id),
+            name=self.name,
+            status=self.status,
+            flavor={"id": self.flavor_id},
+            image=self.image_id,
+            addresses=self.addresses,
+            created=self.created,
+        )
+
+    def __str__(self):
+        return f"Snapshot of server '{self.name}' at {self.region.name} ({self.status})"
+
+
+class ServerSnapshotSync(models.Model):
+    """
+    Server snapshot sync state for a region.
+    After an initial full sync, only servers changed since the last sync are fetched.
+    """
+
+    region = models.OneToOneField(
+        Region, on_delete=models.CASCADE, related_name="server_snapshot_sync"
+    )
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def requires_full_sync(self):
+        if not self.last_full_sync_at:
+            return True
+        interval = datetime.timedelta(hours=settings.SERVER_SNAPSHOT_FULL_SYNC_HOURS)
+        return timezone.now() - self.last_full_sync_at > interval
+
+    def __str__(self):
+        return f"Server snapshot sync for {self.region.name}"
+
+
 class HypervisorStats(models.Model):
     region = models.OneToOneField(Region, on_delete=models.CASCADE)
 
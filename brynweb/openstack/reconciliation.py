@@ -0,0 +1,114 @@
+"""
+Reconciliation of server leases with openstack servers, per region (with region admin credentials).
+
+Servers deleted (or shelved/unshelved) outside bryn, e.g. in Horizon, leave leases out of sync. Each region's servers
+are listed with a single all_tenants request, and diffed against the region's leases by server id:
+leases for missing servers are marked deleted, leases for servers that have reappeared are restored, and shelved state
+is synced, with bulk updates. Servers without any lease are reported (leases are created lazily, when their tenant's
+servers are listed).
+
+An empty or incomplete listing would mark live servers' leases deleted, so nothing is updated if the listing is empty
+while there are active leases, or if more than SERVER_LEASE_RECONCILIATION_MAX_DELETED_FRACTION of active leases would
+be marked deleted.
+"""
+
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import lease_timers
+from .models import ServerLease
+from .service import OpenstackService
+from .shelving import SHELVED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile(region):
+    """
+    Reconcile leases with servers for a region.
+    Returns a dict of lease counts (deleted, restored, shelved & unshelved), and the ids of servers without a lease,
+    or None if reconciliation was aborted.
+    """
+    started_at = timezone.now()
+    servers = OpenstackService(region=region).servers.get_list_for_all_tenants()
+    server_shelved = {
+        server.id: server.status in SHELVED_STATUSES for server in servers
+    }
+
+    # Leases created since servers were listed may be for servers not yet listed
+    leases = ServerLease.objects.filter(
+        tenant__region=region, deleted=False, created_at__lt=started_at
+    )
+    deleted_pks = []
+    shelved_pks = []
+    unshelved_pks = []
+    active_count = 0
+    for pk, server_id, shelved in leases.values_list("pk", "server_id", "shelved"):
+        active_count += 1
+        server_id = str(server_id)
+        if server_id not in server_shelved:
+            deleted_pks.append(pk)
+        elif server_shelved[server_id] and not shelved:
+            shelved_pks.append(pk)
+        elif shelved and not server_shelved[server_id]:
+            unshelved_pks.append(pk)
+
+    if active_count and not servers:
+        logger.error(
+            f"Lease reconciliation aborted at {region.name}: no servers listed, "
+            f"with {active_count} active leases"
+        )
+        return None
+    max_deleted = max(
+        settings.SERVER_LEASE_RECONCILIATION_DELETED_ALLOWANCE,
+        settings.SERVER_LEASE_RECONCILIATION_MAX_DELETED_FRACTION * active_count,
+    )
+    if len(deleted_pks) > max_deleted:
+        logger.error(
+            f"Lease reconciliation aborted at {region.name}: {len(deleted_pks)} of {active_count} "
+            f"active leases would be marked deleted"
+        )
+        return None
+
+    # Servers listed again (e.g. after a transient listing error) have their leases restored
+    restored_leases = ServerLease.objects.filter(
+        tenant__region=region, deleted=True, server_id__in=list(server_shelved)
+    )
+    restored_pks = {True: [], False: []}  # By shelved
+    for pk, server_id in restored_leases.values_list("pk", "server_id"):
+        restored_pks[server_shelved[str(server_id)]].append(pk)
+
+    ServerLease.objects.filter(pk__in=deleted_pks).update(deleted=True)
+    for shelved, pks in restored_pks.items():
+        ServerLease.objects.filter(pk__in=pks).update(deleted=False, shelved=shelved)
+    ServerLease.objects.filter(pk__in=shelved_pks).update(shelved=True)
+    ServerLease.objects.filter(pk__in=unshelved_pks).update(shelved=False)
+
+    # Restored leases' timers did nothing if they fired while deleted
+    if settings.SERVER_LEASE_TIMERS:
+        lease_timers.schedule_all(
+            ServerLease.objects.filter(pk__in=restored_pks[False])
+        )
+
+    leased_server_ids = {
+        str(server_id)
+        for server_id in ServerLease.objects.filter(
+            server_id__in=list(server_shelved)
+        ).values_list("server_id", flat=True)
+    }
+    unleased_server_ids = sorted(set(server_shelved) - leased_server_ids)
+    if unleased_server_ids:
+        logger.warning(
+            f"{len(unleased_server_ids)} servers without a lease at {region.name}: "
+            f"{', '.join(unleased_server_ids)}"
+        )
+
+    return {
+        "deleted": len(deleted_pks),
+        "restored": sum(len(pks) for pks in restored_pks.values()),
+        "shelved": len(shelved_pks),
+        "unshelved": len(unshelved_pks),
+        "unleased_server_ids": unleased_server_ids,
+    }
@@ -0,0 +1,69 @@
+"""
+Compact records for openstack resources listed by OpenstackService.
+
+Client resources (e.g. novaclient Server) hold a manager reference & the raw response dict, as well as an attribute per
+response key (and any set later, e.g. by transform functions). Server & volume listings are instead returned as records
+with __slots__, holding only the response fields bryn uses, built from each resource's response dict as soon as it's
+listed (so the resources can be freed). Fields missing from a response are left unset, raising AttributeError as for
+resources.
+"""
+
+
+class Record:
+    __slots__ = ()
+
+    # Fields copied from response dicts; other slots are set by transform functions
+    response_fields = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {getattr(self, 'id', '')}>"
+
+    @classmethod
+    def from_info(cls, info):
+        """Build a record from a response dict"""
+        return cls(**{name: info[name] for name in cls.response_fields if name in info})
+
+    @classmethod
+    def from_resources(cls, resources):
+        """Build records from client resources (e.g. the result of a list call)"""
+        return [cls.from_info(resource._info) for resource in resources]
+
+
+class ServerRecord(Record):
+    response_fields = (
+        "id",
+        "name",
+        "status",
+        "tenant_id",
+        "flavor",
+        "image",
+        "addresses",
+        "created",
+        "updated",
+    )
+    __slots__ = response_fields + (
+        "team",
+        "tenant",
+        "ip",
+        "lease_expiry",
+        "lease_renewal_url",
+        "lease_assigned_teammember",
+    )
+
+
+class VolumeRecord(Record):
+    response_fields = (
+        "id",
+        "name",
+        "status",
+        "size",
+        "bootable",
+        "volume_type",
+        "attachments",
+        "created_at",
+    )
+    __slots__ = response_fields + ("team", "tenant")
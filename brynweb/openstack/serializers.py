@@ -9,6 +9,7 @@ from .models import (
     RegionSettings,
     ServerLease,
     ServerLeaseRequest,
+    ServerProvisioningJob,
     Tenant,
 )
 
@@ -77,6 +78,26 @@ class InstanceSerializer(OpenstackBaseSerializer):
     )
 
 
+class ServerProvisioningJobSerializer(serializers.ModelSerializer):
+    team = HashidsIntegerField(source="tenant.team_id", read_only=True)
+    tenant = HashidsIntegerField(source="tenant_id", read_only=True)
+
+    class Meta:
+        model = ServerProvisioningJob
+        fields = [
+            "id",
+            "team",
+            "tenant",
+            "name",
+            "status",
+            "server_id",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
 class ImageSerializer(OpenstackBaseSerializer):
     id = serializers.UUIDField(read_only=True)
     name = serializers.CharField()
@@ -1,8 +1,6 @@
 import time
 
 from novaclient import client as novaclient
-from keystoneauth1 import session as keystonesession
-from keystoneauth1.identity import v3
 
 # from keystoneclient.v2_0 import client as keystoneclient
 from keystoneclient.v3 import client as keystoneclient
@@ -10,22 +8,12 @@ from glanceclient import Client as GlanceClient
 from cinderclient import client as cinderclient
 
 from enum import Enum
-from rest_framework import exceptions as drf_exceptions
-from rest_framework import status
 
 from . import auth_settings
-
-
-class ServiceUnavailable(drf_exceptions.APIException):
-    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-    default_detail = "Service temporarily unavailable, try again later."
-    default_code = "service_unavailable"
-
-
-class OpenstackException(drf_exceptions.APIException):
-    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-    default_detail = "An unexpected exception occurred."
-    default_code = "openstack_exception"
+from .exceptions import OpenstackException, ServiceUnavailable  # noqa: F401
+from .metrics import InstrumentedService
+from .records import ServerRecord, VolumeRecord
+from .session_pool import session_pool
 
 
 class OpenstackService:
@@ -33,6 +21,7 @@ class OpenstackService:
         IMAGES = "images"
         FLAVORS = "flavors"
         KEYPAIRS = "keypairs"
+        LIMITS = "limits"
         SERVERS = "servers"
         VOLUMES = "volumes"
         VOLUME_TYPES = "volume_types"
@@ -52,40 +41,32 @@ class OpenstackService:
         self._session = None
         self._nova = None
         self._cinder = None
+        self._cinder_versions = {}
         self._glance = None
         self._keystone = None
 
         self.auth_settings = auth_settings.AUTHENTICATION[self.region.name]
-        self.images = ImagesService(self)
-        self.flavors = FlavorsService(self)
-        self.keypairs = KeypairsService(self)
-        self.servers = ServersService(self)
-        self.volumes = VolumesService(self)
-        self.volume_types = VolumeTypesService(self)
+        self.images = self.instrument(ImagesService(self), self.Services.IMAGES)
+        self.flavors = self.instrument(FlavorsService(self), self.Services.FLAVORS)
+        self.keypairs = self.instrument(KeypairsService(self), self.Services.KEYPAIRS)
+        self.limits = self.instrument(LimitsService(self), self.Services.LIMITS)
+        self.servers = self.instrument(ServersService(self), self.Services.SERVERS)
+        self.volumes = self.instrument(VolumesService(self), self.Services.VOLUMES)
+        self.volume_types = self.instrument(
+            VolumeTypesService(self), self.Services.VOLUME_TYPES
+        )
+
+    def instrument(self, service, name):
+        """Wrap a sub-service, so that calls are timed (see openstack.metrics)"""
+        return InstrumentedService(service, self.region.name, name.value)
 
     @property
     def session(self):
         if not self._session:
-            if self.tenant:  # Service user for project operations
-                username = self.auth_settings["SERVICE_USERNAME"]
-                password = self.auth_settings["SERVICE_PASSWORD"]
-                project_id = self.tenant.created_tenant_id
-                project_name = None
-            else:  # Admin user for domain operations
-                username = self.auth_settings["ADMIN_USERNAME"]
-                password = self.auth_settings["ADMIN_PASSWORD"]
-                project_id = None
-                project_name = self.auth_settings["TENANT_NAME"]
-            auth = v3.Password(
-                auth_url=self.auth_settings["AUTH_URL"],
-                username=username,
-                password=password,
-                project_id=project_id,
-                project_name=project_name,
-                user_domain_id="default",
-                project_domain_id="default",
+            # Shared across instances, so keystone tokens are reused between requests
+            self._session = session_pool.get(
+                self.auth_settings, self.region, tenant=self.tenant
             )
-            self._session = keystonesession.Session(auth=auth)
         return self._session
 
     @property
@@ -100,6 +81,14 @@ class OpenstackService:
             self._cinder = cinderclient.Client(3, session=self.session)
         return self._cinder
 
+    def get_cinder(self, api_version):
+        """Cinder client for a specific microversion, for the calls which require it (others use cinder, i.e. 3.0)"""
+        if api_version not in self._cinder_versions:
+            self._cinder_versions[api_version] = cinderclient.Client(
+                api_version, session=self.session
+            )
+        return self._cinder_versions[api_version]
+
     @property
     def glance(self):
         if not self._glance:
@@ -153,6 +142,31 @@ class KeypairsService:
         return keypair.delete()
 
 
+class LimitsService:
+    def __init__(self, openstack):
+        self.openstack = openstack
+
+    @property
+    def nova(self):
+        return self.openstack.nova
+
+    @property
+    def cinder(self):
+        return self.openstack.cinder
+
+    def get(self):
+        """
+        Return nova & cinder absolute limits (quotas & usage, e.g. maxTotalCores & totalCoresUsed) as a dict,
+        for the service's project (use a tenant's OpenstackService: below microversion 3.39, cinder ignores a
+        requested project, reporting the region admin project's limits)
+        """
+        limits = {limit.name: limit.value for limit in self.nova.limits.get().absolute}
+        limits.update(
+            (limit.name, limit.value) for limit in self.cinder.limits.get().absolute
+        )
+        return limits
+
+
 class ImagesService:
     def __init__(self, openstack):
         self.openstack = openstack
@@ -161,7 +175,10 @@ class ImagesService:
     def glance(self):
         return self.openstack.glance
 
-    def get_list(self):
+    def get_list(self, visibility=None):
+        """List images, of a given visibility (e.g. public, private or shared) if specified"""
+        if visibility:
+            return self.glance.images.list(filters={"visibility": visibility})
         return self.glance.images.list()
 
 
@@ -178,6 +195,9 @@ class FlavorsService:
 
 
 class VolumesService:
+    # Cinder microversion for inexact (e.g. name~) list filters
+    INEXACT_FILTERS_API_VERSION = "3.34"
+
     def __init__(self, openstack):
         self.openstack = openstack
 
@@ -192,8 +212,17 @@ class VolumesService:
     def get(self, volume_id):
         return self.cinder.volumes.get(volume_id)
 
-    def get_list(self):
-        return self.cinder.volumes.list()
+    def get_list(self, search_opts=None, marker=None, limit=None):
+        """
+        List the project's volumes, filtered by cinder with search_opts (e.g. status, name or name~).
+        If limit is specified, up to limit volumes after marker (a volume id) are listed.
+        """
+        cinder = self.cinder
+        if any(key.endswith("~") for key in search_opts or {}):
+            cinder = self.openstack.get_cinder(self.INEXACT_FILTERS_API_VERSION)
+        return VolumeRecord.from_resources(
+            cinder.volumes.list(search_opts=search_opts, marker=marker, limit=limit)
+        )
 
     def create(self, data):
         return self.cinder.volumes.create(
@@ -264,37 +293,51 @@ class ServersService:
     def get(self, uuid):
         return self.nova.servers.get(uuid)
 
-    def get_list(self):
-        return self.nova.servers.list(detailed=True)
-
-    def create(self, data):
-        flavor = data["flavor"]
-        image = data["image"]
-        keypair = data["keypair"]
-        public_key = data["public_key"]
-        name = data["name"]
+    def get_list(self, search_opts=None, marker=None, limit=None):
+        """
+        List the project's servers, filtered by nova with search_opts (e.g. status, or name as a regular expression).
+        If limit is specified, up to limit servers after marker (a server id) are listed.
+        """
+        return ServerRecord.from_resources(
+            self.nova.servers.list(
+                detailed=True, search_opts=search_opts, marker=marker, limit=limit
+            )
+        )
 
-        # Create keypair if it doesn't yet exist for this tenant
-        self.openstack.keypairs.find_or_create(keypair, public_key)
+    def get_list_for_all_tenants(self, changes_since=None):
+        """
+        List servers for all projects in the region (requires region admin credentials).
+        If changes_since (datetime) is specified, only servers changed since then (including deleted) are listed.
+        """
+        search_opts = {"all_tenants": True}
+        if changes_since:
+            search_opts["changes-since"] = changes_since.isoformat()
+        # limit=-1 follows pagination markers, beyond the nova max_limit
+        return ServerRecord.from_resources(
+            self.nova.servers.list(detailed=True, search_opts=search_opts, limit=-1)
+        )
 
-        # Create boot volume
+    def create_boot_volume(self, name, image):
+        """Create a bootable volume from an image, for a new server"""
         volume = self.cinder.volumes.create(
             imageRef=image, name=f"{name}: BOOT VOLUME", size=120,
         )
         self.cinder.volumes.set_bootable(volume, True)
+        return volume
 
-        # Wait for boot volume availability
-        for n in range(60):
-            # TODO: move volume creation to frontend, otherwise tidy up a bit
-            v = self.cinder.volumes.get(volume.id)
-            if v.status == "available":
-                break
-            time.sleep(1)
+    def boot_volume_is_ready(self, volume_id):
+        """Check whether a boot volume is available, raising if creation failed"""
+        volume = self.cinder.volumes.get(volume_id)
+        if volume.status == "error":
+            raise OpenstackException("Boot volume creation failed.")
+        return volume.status == "available"
 
+    def boot(self, name, flavor, keypair, volume_id):
+        """Boot a server from an existing boot volume"""
         # Block device mapping
         bdm = [
             {
-                "uuid": volume.id,
+                "uuid": volume_id,
                 "source_type": "volume",
                 "destination_type": "volume",
                 "boot_index": "0",
@@ -312,23 +355,50 @@ class ServersService:
             block_device_mapping_v2=bdm,
         )
 
+    def create(self, data):
+        """
+        Create a server synchronously, blocking until the boot volume is available.
+        API views should enqueue a ServerProvisioningJob instead (see tasks.provision_server)
+        """
+        flavor = data["flavor"]
+        image = data["image"]
+        keypair = data["keypair"]
+        public_key = data["public_key"]
+        name = data["name"]
+
+        # Create keypair if it doesn't yet exist for this tenant
+        self.openstack.keypairs.find_or_create(keypair, public_key)
+
+        # Create boot volume
+        volume = self.create_boot_volume(name, image)
+
+        # Wait for boot volume availability
+        for n in range(60):
+            if self.boot_volume_is_ready(volume.id):
+                break
+            time.sleep(1)
+
+        return self.boot(name, flavor, keypair, volume.id)
+
     def delete(self, server_id):
         server = self.get(server_id)
         if server.status not in ["SHELVED", "SHELVED_OFFLOADED"]:
             raise OpenstackException("Only SHELVED servers can be deleted via Bryn.")
         server.delete()
 
+    # Actions accept a novaclient Server, ServerRecord or server id
+
     def reboot(self, server):
-        server.reboot(reboot_type="HARD")
+        self.nova.servers.reboot(server, reboot_type="HARD")
 
     def stop(self, server):
-        server.stop()
+        self.nova.servers.stop(server)
 
     def start(self, server):
-        server.start()
+        self.nova.servers.start(server)
 
     def shelve(self, server):
-        server.shelve()
+        self.nova.servers.shelve(server)
 
     def unshelve(self, server):
-        server.unshelve()
+        self.nova.servers.unshelve(server)
@@ -0,0 +1,110 @@
+import threading
+
+from django.conf import settings
+from keystoneauth1.identity import v3
+
+from .circuit_breaker import CircuitBreakerSession
+
+
+class SessionPool:
+    """
+    Process-wide registry of keystone sessions, shared between OpenstackService instances.
+    Sessions are keyed by (region name, project id, user type), so that the keystone token held by each
+    session's auth plugin is reused across requests, until shortly before it expires.
+    Safe for use from gunicorn threads and huey workers.
+    """
+
+    SERVICE_USER = "service"
+    ADMIN_USER = "admin"
+
+    def __init__(self, expiry_margin=None):
+        self._expiry_margin = expiry_margin
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._counters = {"hits": 0, "misses": 0, "refreshes": 0}
+
+    @property
+    def expiry_margin(self):
+        """Seconds before token expiry at which the token is refreshed"""
+        if self._expiry_margin is None:
+            return settings.OPENSTACK_SESSION_EXPIRY_MARGIN_SECONDS
+        return self._expiry_margin
+
+    @staticmethod
+    def get_key(auth_settings, region, tenant=None):
+        """Return the pool key for a region, and (optionally) a tenant"""
+        if tenant:
+            return (region.name, tenant.created_tenant_id, SessionPool.SERVICE_USER)
+        return (region.name, auth_settings["TENANT_NAME"], SessionPool.ADMIN_USER)
+
+    @staticmethod
+    def create_auth(auth_settings, tenant=None):
+        """Create a keystone password auth plugin, for the service user (tenant) or admin user"""
+        if tenant:  # Service user for project operations
+            username = auth_settings["SERVICE_USERNAME"]
+            password = auth_settings["SERVICE_PASSWORD"]
+            project_id = tenant.created_tenant_id
+            project_name = None
+        else:  # Admin user for domain operations
+            username = auth_settings["ADMIN_USERNAME"]
+            password = auth_settings["ADMIN_PASSWORD"]
+            project_id = None
+            project_name = auth_settings["TENANT_NAME"]
+        return v3.Password(
+            auth_url=auth_settings["AUTH_URL"],
+            username=username,
+            password=password,
+            project_id=project_id,
+            project_name=project_name,
+            user_domain_id="default",
+            project_domain_id="default",
+        )
+
+    def get(self, auth_settings, region, tenant=None):
+        """
+        Return a pooled session, creating one if none exists.
+        If the held token is due to expire within the expiry margin, it is invalidated, so that the auth plugin
+        re-authenticates on next use.
+        """
+        key = self.get_key(auth_settings, region, tenant)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = CircuitBreakerSession(
+                    auth=self.create_auth(auth_settings, tenant),
+                    region_name=region.name,
+                    timeout=settings.OPENSTACK_REQUEST_TIMEOUT_SECONDS,
+                )
+                self._sessions[key] = session
+                self._counters["misses"] += 1
+                return session
+
+            auth_ref = session.auth.auth_ref
+            if auth_ref is not None and auth_ref.will_expire_soon(self.expiry_margin):
+                session.auth.invalidate()
+                self._counters["refreshes"] += 1
+            else:
+                self._counters["hits"] += 1
+            return session
+
+    def invalidate(self, region=None):
+        """Discard pooled sessions, for a single region or all regions"""
+        with self._lock:
+            if region is None:
+                self._sessions.clear()
+                return
+            for key in [key for key in self._sessions if key[0] == region.name]:
+                del self._sessions[key]
+
+    def stats(self):
+        """Return a snapshot of pool counters, and the current pool size"""
+        with self._lock:
+            return {**self._counters, "size": len(self._sessions)}
+
+    def reset_stats(self):
+        with self._lock:
+            for counter in self._counters:
+                self._counters[counter] = 0
+
+
+session_pool = SessionPool()
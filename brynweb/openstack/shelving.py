@@ -0,0 +1,114 @@
+"""
+Enforcement of server leases: shelving servers for overdue leases (see tasks.shelve_region_servers).
+
+Leases are grouped by region, and each region's servers are shelved concurrently (up to
+SERVER_SHELVING_REGION_CONCURRENCY openstack requests at a time). Nova shelves asynchronously, so leases are only
+marked as shelved once the server status is confirmed as SHELVED (or SHELVED_OFFLOADED) by a later check.
+"""
+
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .service import OpenstackService
+
+logger = logging.getLogger(__name__)
+
+SHELVED_STATUSES = ["SHELVED", "SHELVED_OFFLOADED"]
+
+# Lease outcomes
+SHELVED = "shelved"  # Confirmed by nova
+SHELVING = "shelving"  # Requested, or already in progress
+DELETED = "deleted"  # Server no longer exists
+
+LOCK_TIMEOUT_SECONDS = 30 * 60
+
+
+def group_by_region(leases):
+    """Return lease ids, by region id"""
+    lease_ids = defaultdict(list)
+    for region_id, lease_id in leases.values_list("tenant__region", "pk"):
+        lease_ids[region_id].append(lease_id)
+    return lease_ids
+
+
+def enqueue(leases):
+    """
+    Enqueue shelving for a queryset of leases (one task per region), returning the number of leases enqueued.
+    Only active, overdue leases in enabled regions are shelved.
+    """
+    from .tasks import shelve_region_servers  # Avoid circular import
+
+    lease_ids = group_by_region(
+        leases.active_overdue().filter(tenant__region__disabled=False)
+    )
+    for region_id, region_lease_ids in lease_ids.items():
+        shelve_region_servers(region_id, region_lease_ids)
+    return sum(len(region_lease_ids) for region_lease_ids in lease_ids.values())
+
+
+@contextmanager
+def region_lock(region_id):
+    """Lock shelving for a region (so the concurrency cap holds across workers), yielding False if already locked"""
+    key = f"openstack:shelving:{region_id}"
+    acquired = cache.add(key, True, timeout=LOCK_TIMEOUT_SECONDS)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(key)
+
+
+def is_shelving(server):
+    task_state = getattr(server, "OS-EXT-STS:task_state", None) or ""
+    return task_state.startswith("shelving")
+
+
+def shelve(lease):
+    """Shelve a lease's server, unless already shelved (or shelving), returning the outcome"""
+    servers = OpenstackService(tenant=lease.tenant).servers
+    try:
+        server = servers.get(str(lease.server_id))
+    except Exception as e:
+        if getattr(e, "code", None) == 404:
+            return DELETED
+        raise
+    if server.status in SHELVED_STATUSES:
+        return SHELVED
+    if not is_shelving(server):
+        servers.shelve(server)
+    return SHELVING
+
+
+def check(lease):
+    """Check whether a lease's server has been shelved, returning the outcome"""
+    try:
+        server = OpenstackService(tenant=lease.tenant).servers.get(str(lease.server_id))
+    except Exception as e:
+        if getattr(e, "code", None) == 404:
+            return DELETED
+        raise
+    return SHELVED if server.status in SHELVED_STATUSES else SHELVING
+
+
+def run(func, leases):
+    """
+    Apply shelve or check to leases concurrently (openstack requests only, in worker threads).
+    Returns a dict of lease lists, by outcome (including failures, under None).
+    """
+    results = defaultdict(list)
+    with ThreadPoolExecutor(
+        max_workers=settings.SERVER_SHELVING_REGION_CONCURRENCY
+    ) as executor:
+        futures = [(lease, executor.submit(func, lease)) for lease in leases]
+        for lease, future in futures:
+            try:
+                results[future.result()].append(lease)
+            except Exception:
+                logger.exception(f"Failed to shelve server for lease {lease.pk}")
+                results[None].append(lease)
+    return results
@@ -0,0 +1,131 @@
+"""
+Local mirror of openstack servers (ServerSnapshot), synced per region with region admin credentials.
+
+After an initial full sync, only servers changed since the previous sync are fetched (nova changes-since filter).
+A full sync is repeated every SERVER_SNAPSHOT_FULL_SYNC_HOURS, to remove anything missed by incremental syncs.
+"""
+
+import datetime
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ServerSnapshot, ServerSnapshotSync, Tenant
+from .service import OpenstackService
+
+# Allow for clock skew between bryn & nova; re-fetching a few unchanged servers is harmless
+CHANGES_SINCE_OVERLAP = datetime.timedelta(minutes=1)
+
+# Deleted servers are only included in changes-since responses
+DELETED_STATUSES = ["DELETED", "SOFT_DELETED"]
+
+# Outlasts any sync (the lock is released when a sync finishes), in case a worker dies mid-sync
+LOCK_TIMEOUT_SECONDS = 10 * 60
+
+SNAPSHOT_FIELDS = [
+    "tenant",
+    "project_id",
+    "name",
+    "status",
+    "flavor_id",
+    "image_id",
+    "addresses",
+    "created",
+    "updated",
+    "synced_at",
+]
+
+
+def get_snapshot_fields(server):
+    """Map a novaclient Server to ServerSnapshot fields"""
+    return {
+        "project_id": server.tenant_id,
+        "name": server.name,
+        "status": server.status,
+        "flavor_id": server.flavor.get("id", ""),
+        "image_id": server.image["id"] if server.image else "",  # "" if volume backed
+        "addresses": server.addresses,
+        "created": parse_datetime(server.created),
+        "updated": parse_datetime(server.updated),
+    }
+
+
+@contextmanager
+def region_lock(region_id):
+    """Lock syncing for a region (so slow syncs don't overlap), yielding False if already locked"""
+    key = f"openstack:snapshots:{region_id}"
+    acquired = cache.add(key, True, timeout=LOCK_TIMEOUT_SECONDS)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(key)
+
+
+def sync(region):
+    """
+    Sync server snapshots for a region.
+    Returns the number of servers fetched from openstack.
+    """
+    sync_state, _ = ServerSnapshotSync.objects.get_or_create(region=region)
+    full_sync = sync_state.requires_full_sync
+    changes_since = (
+        None if full_sync else sync_state.last_synced_at - CHANGES_SINCE_OVERLAP
+    )
+
+    started_at = timezone.now()
+    servers = list(
+        OpenstackService(region=region).servers.get_list_for_all_tenants(
+            changes_since=changes_since
+        )
+    )
+    current_servers = [s for s in servers if s.status not in DELETED_STATUSES]
+    deleted_server_ids = [s.id for s in servers if s.status in DELETED_STATUSES]
+    tenants = {
+        tenant.created_tenant_id: tenant
+        for tenant in Tenant.objects.filter(region=region)
+    }
+
+    with transaction.atomic():
+        snapshots = ServerSnapshot.objects.filter(region=region)
+        if not full_sync:
+            snapshots = snapshots.filter(
+                server_id__in=[server.id for server in current_servers]
+            )
+        existing = {str(snapshot.server_id): snapshot for snapshot in snapshots}
+
+        new_snapshots = []
+        updated_snapshots = []
+        for server in current_servers:
+            fields = get_snapshot_fields(server)
+            fields["tenant"] = tenants.get(server.tenant_id)
+            fields["synced_at"] = started_at
+            snapshot = existing.get(server.id)
+            if snapshot:
+                for field, value in fields.items():
+                    setattr(snapshot, field, value)
+                updated_snapshots.append(snapshot)
+            else:
+                new_snapshots.append(
+                    ServerSnapshot(region=region, server_id=server.id, **fields)
+                )
+
+        ServerSnapshot.objects.bulk_create(new_snapshots)
+        ServerSnapshot.objects.bulk_update(updated_snapshots, SNAPSHOT_FIELDS)
+
+        if full_sync:
+            # Servers not listed no longer exist
+            ServerSnapshot.objects.filter(
+                region=region, synced_at__lt=started_at
+            ).delete()
+            sync_state.last_full_sync_at = started_at
+        elif deleted_server_ids:
+            ServerSnapshot.objects.filter(server_id__in=deleted_server_ids).delete()
+
+        sync_state.last_synced_at = started_at
+        sync_state.save()
+
+    return len(servers)
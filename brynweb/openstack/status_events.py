@@ -0,0 +1,176 @@
+"""
+Instance & volume status change events, for server-sent event streams.
+
+A single watcher thread per tenant polls openstack, and publishes status changes to all subscribers
+(i.e. open event streams) for that tenant. The watcher starts with the first subscriber, and stops
+when the last subscriber disconnects. Watchers are per-process.
+"""
+
+import json
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from core import hashids
+from .service import OpenstackService
+
+logger = logging.getLogger(__name__)
+
+# Comment lines are sent at this interval, so that disconnected clients are detected
+KEEPALIVE_SECONDS = 15
+
+INSTANCE = "instance"
+VOLUME = "volume"
+DELETED = "DELETED"
+
+
+class TenantStatusWatcher:
+    """
+    Polls a tenant's instance & volume statuses, publishing events to subscriber queues on change.
+    """
+
+    def __init__(self, tenant, poll_interval):
+        self.tenant = tenant
+        self.poll_interval = poll_interval
+        self.subscribers = set()
+        self.statuses = None  # {(type, id): status}, once polled
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self.run, name=f"status-watcher-{tenant.pk}", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def get_statuses(self):
+        openstack = OpenstackService(tenant=self.tenant)
+        statuses = {
+            (INSTANCE, server.id): server.status
+            for server in openstack.servers.get_list()
+        }
+        statuses.update(
+            {
+                (VOLUME, volume.id): volume.status
+                for volume in openstack.volumes.get_list()
+            }
+        )
+        return statuses
+
+    def get_events(self, statuses):
+        """
+        Return events for status changes since the previous poll.
+        The first poll returns events for all items, since subscribers may have missed changes before it.
+        """
+        previous = self.statuses or {}
+        events = [
+            self.get_event(obj_type, obj_id, status)
+            for (obj_type, obj_id), status in statuses.items()
+            if previous.get((obj_type, obj_id)) != status
+        ]
+        events.extend(
+            self.get_event(obj_type, obj_id, DELETED)
+            for (obj_type, obj_id) in previous.keys() - statuses.keys()
+        )
+        return events
+
+    def get_event(self, obj_type, obj_id, status):
+        return {
+            "type": obj_type,
+            "id": obj_id,
+            "status": status,
+            "team": hashids.encode(self.tenant.team_id),
+            "tenant": hashids.encode(self.tenant.pk),
+        }
+
+    def publish(self, event):
+        for subscriber in list(self.subscribers):
+            subscriber.put(event)
+
+    def poll(self):
+        statuses = self.get_statuses()
+        for event in self.get_events(statuses):
+            self.publish(event)
+        self.statuses = statuses
+
+    def run(self):
+        try:
+            while not self._stopped.is_set():
+                # Long-running thread: discard database connections past their max age (or unusable)
+                close_old_connections()
+                try:
+                    self.poll()
+                except Exception:
+                    # e.g. openstack unavailable; retry at next poll
+                    logger.exception(
+                        "Status watcher poll failed for tenant %s", self.tenant.pk
+                    )
+                self._stopped.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+
+class StatusWatcherRegistry:
+    """
+    Process-wide registry of tenant status watchers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._watchers = {}
+
+    def subscribe(self, tenant):
+        """Return a queue of status change events for a tenant, starting a watcher if required"""
+        subscriber = queue.Queue()
+        with self._lock:
+            watcher = self._watchers.get(tenant.pk)
+            if not watcher:
+                watcher = TenantStatusWatcher(
+                    tenant, settings.OPENSTACK_STATUS_POLL_SECONDS
+                )
+                self._watchers[tenant.pk] = watcher
+                watcher.start()
+            watcher.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, tenant, subscriber):
+        """Remove a subscriber, stopping the tenant's watcher if it was the last"""
+        with self._lock:
+            watcher = self._watchers.get(tenant.pk)
+            if not watcher:
+                return
+            watcher.subscribers.discard(subscriber)
+            if not watcher.subscribers:
+                watcher.stop()
+                del self._watchers[tenant.pk]
+
+    def get_watcher(self, tenant):
+        return self._watchers.get(tenant.pk)
+
+
+status_watchers = StatusWatcherRegistry()
+
+
+def format_event(event):
+    return f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+def stream(tenant):
+    """Generate server-sent events for a tenant, until the client disconnects"""
+    subscriber = status_watchers.subscribe(tenant)
+    try:
+        yield f"retry: {settings.OPENSTACK_STATUS_POLL_SECONDS * 1000}\n\n"
+        while True:
+            try:
+                event = subscriber.get(timeout=KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        status_watchers.unsubscribe(tenant, subscriber)
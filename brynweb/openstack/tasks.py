@@ -1,11 +1,24 @@
+import logging
+import threading
+
 from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 
 from huey import crontab
-from huey.contrib.djhuey import db_periodic_task
+from huey.contrib.djhuey import HUEY, db_periodic_task, db_task
+
+from userdb.models import TeamMember
+from . import catalog, lease_timers, reconciliation, shelving, snapshots
+from .models import (
+    HypervisorStats,
+    Region,
+    ServerLease,
+    ServerProvisioningJob,
+)
+from .service import OpenstackException, OpenstackService
 
-from .models import HypervisorStats, Region, ServerLease
-from .service import OpenstackService
+logger = logging.getLogger(__name__)
 
 
 @db_periodic_task(crontab(minute="10", hour="*/1"))
@@ -29,14 +42,306 @@ def update_hypervisor_stats():
         HypervisorStats.objects.update_or_create(defaults=defaults, region=region)
 
 
+@db_periodic_task(crontab(minute="*/20"))
+def update_region_catalogs():
+    """Refresh cached flavor, image & volume type catalogs for each region (a failure only skips that catalog)"""
+    for region in Region.objects.filter(disabled=False):
+        for name in catalog.CATALOG_FETCHERS:
+            try:
+                catalog.refresh(region, name)
+            except Exception:
+                logger.exception(f"Failed to refresh {name} catalog for {region.name}")
+
+
+@db_task()
+def refresh_region_catalog(region_id, name):
+    """Refresh a single stale catalog, enqueued when served from cache"""
+    catalog.refresh(Region.objects.get(pk=region_id), name)
+
+
+@db_periodic_task(crontab(minute="*"))
+def sync_server_snapshots():
+    """
+    Sync local server snapshots for each region (incrementally, after the first full sync).
+    Regions still syncing from a previous run are skipped, and a failure only skips that region.
+    """
+    for region in Region.objects.filter(disabled=False):
+        with snapshots.region_lock(region.pk) as acquired:
+            if not acquired:
+                continue
+            try:
+                snapshots.sync(region)
+            except Exception:
+                logger.exception(f"Failed to sync server snapshots for {region.name}")
+
+
+@db_periodic_task(crontab(minute="50"))
+def reconcile_server_leases():
+    """
+    Reconcile leases with servers for each region, e.g. after deletion outside bryn (see openstack.reconciliation).
+    A failure only skips that region.
+    """
+    for region in Region.objects.filter(disabled=False):
+        try:
+            reconciliation.reconcile(region)
+        except Exception:
+            logger.exception(f"Failed to reconcile server leases for {region.name}")
+
+
 @db_periodic_task(crontab(minute="*/30"))
 def send_server_lease_expiry_reminder_emails():
-    """Send server lease expiry reminder emails, on specified days until expiry"""
-    reminder_days = settings.SERVER_LEASE_REMINDER_DAYS
-    due_leases = ServerLease.objects.active_due()
-    for lease in due_leases:
-        if lease.time_remaining.days in reminder_days:
-            last_reminder = lease.last_reminder_sent_at
-            if last_reminder and (timezone.now() - last_reminder).days < 1:
-                continue  # Don't send reminder more than once every 24 hours
+    """
+    Send server lease expiry reminder emails, on specified days until expiry.
+    Only polls if lease timers are disabled (otherwise reminders are sent by fire_server_lease_timer).
+    """
+    if settings.SERVER_LEASE_TIMERS:
+        return
+
+    due_leases = ServerLease.objects.due_for_reminder()
+    if settings.SERVER_LEASE_REMINDER_DIGEST:
+        due_leases.send_email_renewal_reminder_digests()
+        return
+
+    due_leases = due_leases.select_related("assigned_teammember__user")
+    for lease in due_leases.iterator(chunk_size=500):
+        lease.send_email_renewal_reminder()
+
+
+@db_periodic_task(crontab(minute="15,45"))
+def shelve_overdue_servers():
+    """
+    Shelve servers with overdue leases, if enabled (see openstack.shelving).
+    Only polls if lease timers are disabled (otherwise leases are shelved by fire_server_lease_timer).
+    """
+    if settings.SERVER_LEASE_AUTO_SHELVE and not settings.SERVER_LEASE_TIMERS:
+        shelving.enqueue(ServerLease.objects.all())
+
+
+@db_periodic_task(crontab(minute="0", hour="4"))
+def schedule_server_lease_timers():
+    """Reschedule timers for all active leases, as a safety net for missed timers (see openstack.lease_timers)"""
+    if settings.SERVER_LEASE_TIMERS:
+        lease_timers.schedule_all(ServerLease.objects.all())
+
+
+@db_task()
+def fire_server_lease_timer(lease_id, renewal_count, expiry):
+    """
+    Send a due reminder for a lease, or shelve its server once expired, then schedule its next timer.
+    Does nothing if the lease has been renewed, granted, shelved or deleted since the timer was scheduled.
+    """
+    lease = (
+        ServerLease.objects.active()
+        .filter(pk=lease_id, renewal_count=renewal_count, expiry=expiry)
+        .select_related("assigned_teammember__user")
+        .first()
+    )
+    if lease is None:  # Superseded
+        return
+
+    if lease.has_expired:
+        if settings.SERVER_LEASE_AUTO_SHELVE:
+            shelving.enqueue(ServerLease.objects.filter(pk=lease.pk))
+        return
+
+    now = timezone.now()
+    if lease_timers.is_reminder_due(lease, now):
+        if settings.SERVER_LEASE_REMINDER_DIGEST:
+            # Include the user's other due leases, whose own timers then find them already reminded
+            user_leases = ServerLease.objects.active_with_expiry().filter(
+                assigned_teammember__user=lease.assigned_teammember.user
+            )
+            due_pks = [
+                user_lease.pk
+                for user_lease in user_leases
+                if lease_timers.is_reminder_due(user_lease, now)
+            ]
+            ServerLease.objects.filter(
+                pk__in=due_pks
+            ).send_email_renewal_reminder_digests()
+            lease.refresh_from_db()
+        else:
             lease.send_email_renewal_reminder()
+    lease_timers.schedule(lease)
+
+
+def schedule_task(task, args, delay):
+    """
+    Schedule a task to run after a delay.
+    With no consumer to run scheduled tasks (HUEY.immediate), the task is run from a timer thread instead, rather than
+    blocking the calling (e.g. request) thread.
+    """
+    if HUEY.immediate:
+        timer = threading.Timer(delay, call_in_thread, (task, args))
+        timer.daemon = True
+        timer.start()
+    else:
+        task.schedule(args, delay=delay)
+
+
+def call_in_thread(task, args):
+    try:
+        task.call_local(*args)
+    finally:
+        connection.close()  # The thread's own connection
+
+
+def update_shelved_leases(results):
+    """Update leases from shelving results, once confirmed by nova"""
+    ServerLease.objects.filter(
+        pk__in=[lease.pk for lease in results[shelving.SHELVED]]
+    ).update(shelved=True)
+    ServerLease.objects.filter(
+        pk__in=[lease.pk for lease in results[shelving.DELETED]]
+    ).update(deleted=True)
+
+
+@db_task()
+def shelve_region_servers(region_id, lease_ids, attempt=1):
+    """
+    Shelve servers for overdue leases in a region, scheduling confirmation of shelved status.
+    Failures are retried (up to SERVER_SHELVING_MAX_ATTEMPTS).
+    """
+    with shelving.region_lock(region_id) as acquired:
+        if not acquired:  # Region already being shelved
+            schedule_task(
+                shelve_region_servers,
+                (region_id, lease_ids, attempt),
+                settings.SERVER_SHELVING_RETRY_SECONDS,
+            )
+            return
+
+        # Leases may have been renewed since shelving was enqueued
+        leases = ServerLease.objects.active_overdue().filter(
+            pk__in=lease_ids, tenant__region=region_id
+        )
+        results = shelving.run(shelving.shelve, leases.select_related("tenant__region"))
+        update_shelved_leases(results)
+
+    if results[shelving.SHELVING]:
+        schedule_task(
+            confirm_region_servers_shelved,
+            (region_id, [lease.pk for lease in results[shelving.SHELVING]]),
+            settings.SERVER_SHELVING_CONFIRM_SECONDS,
+        )
+    if results[None] and attempt < settings.SERVER_SHELVING_MAX_ATTEMPTS:
+        schedule_task(
+            shelve_region_servers,
+            (region_id, [lease.pk for lease in results[None]], attempt + 1),
+            settings.SERVER_SHELVING_RETRY_SECONDS,
+        )
+
+
+@db_task()
+def confirm_region_servers_shelved(region_id, lease_ids, check=1):
+    """
+    Mark leases as shelved, once nova confirms shelved status for their servers.
+    Re-checked (up to SERVER_SHELVING_MAX_CONFIRM_CHECKS) while shelving is in progress.
+    """
+    leases = ServerLease.objects.filter(
+        pk__in=lease_ids, shelved=False, deleted=False
+    ).select_related("tenant__region")
+    results = shelving.run(shelving.check, leases)
+    update_shelved_leases(results)
+
+    pending = results[shelving.SHELVING] + results[None]
+    if pending and check < settings.SERVER_SHELVING_MAX_CONFIRM_CHECKS:
+        schedule_task(
+            confirm_region_servers_shelved,
+            (region_id, [lease.pk for lease in pending], check + 1),
+            settings.SERVER_SHELVING_CONFIRM_SECONDS,
+        )
+
+
+def advance_server_provisioning_job(job, openstack):
+    """
+    Run the next stage of a server provisioning job.
+    Returns False if the job must wait (for boot volume availability) before continuing.
+    """
+    Status = ServerProvisioningJob.Status
+    servers = openstack.servers
+
+    if job.status == Status.QUEUED:
+        # Create keypair if it doesn't yet exist for this tenant
+        if not job.keypair:
+            raise OpenstackException("Keypair no longer exists.")
+        openstack.keypairs.find_or_create(str(job.keypair.id), job.keypair.public_key)
+        job.set_status(Status.CREATING_VOLUME)
+
+    elif job.status == Status.CREATING_VOLUME:
+        volume = servers.create_boot_volume(job.name, job.image)
+        job.volume_id = volume.id
+        job.set_status(Status.AWAITING_VOLUME)
+
+    elif job.status == Status.AWAITING_VOLUME:
+        if not servers.boot_volume_is_ready(job.volume_id):
+            job.volume_checks += 1
+            if job.volume_checks >= settings.SERVER_PROVISIONING_MAX_VOLUME_CHECKS:
+                raise OpenstackException("Timed out waiting for boot volume.")
+            job.save()
+            return False
+        job.set_status(Status.BOOTING)
+
+    elif job.status == Status.BOOTING:
+        server = servers.boot(job.name, job.flavor, str(job.keypair_id), job.volume_id)
+        job.server_id = server.id
+        job.save()  # The server now exists, so the job must not be reported as failed
+
+        try:
+            assign_server_lease(job)
+        except Exception as e:
+            logger.exception("Failed to assign a lease to server %s", server.id)
+            job.set_status(
+                Status.COMPLETE,
+                error=f"Server launched, but its lease could not be assigned: {e}",
+            )
+        else:
+            job.set_status(Status.COMPLETE)
+
+    return True
+
+
+def assign_server_lease(job):
+    """
+    Create the lease for a newly booted server, assigned to the launching user's team
+    membership (or to a team admin's, if the user has since left the team).
+    """
+    tenant = job.tenant
+    memberships = TeamMember.objects.filter(team=tenant.team)
+    teammember = (
+        memberships.filter(user=job.user).first()
+        or memberships.filter(is_admin=True).order_by("pk").first()
+    )
+    if teammember is None:
+        raise TeamMember.DoesNotExist(f"No member of {tenant.team} can hold the lease")
+
+    lease, created = ServerLease.objects.update_or_create(
+        server_id=job.server_id,
+        defaults={
+            "server_name": job.name,
+            "tenant": tenant,
+            "assigned_teammember": teammember,
+        },
+    )
+    lease.schedule_timer()
+
+
+@db_task()
+def provision_server(job_id):
+    """
+    Provision a new server, re-scheduling while the boot volume is being created
+    (rather than blocking a worker).
+    """
+    job = ServerProvisioningJob.objects.select_related(
+        "keypair", "tenant__region__regionsettings", "tenant__team"
+    ).get(pk=job_id)
+    openstack = OpenstackService(tenant=job.tenant)
+    poll_interval = settings.SERVER_PROVISIONING_POLL_SECONDS
+
+    try:
+        while not job.is_finished:
+            if not advance_server_provisioning_job(job, openstack):
+                schedule_task(provision_server, (job_id,), poll_interval)
+                return
+    except Exception as e:
+        job.set_status(ServerProvisioningJob.Status.FAILED, error=str(e))
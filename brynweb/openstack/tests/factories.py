@@ -1,6 +1,6 @@
 import factory
 
-from userdb.tests.factories import UserFactory
+from userdb.tests.factories import TeamFactory, UserFactory
 
 
 class KeyPairFactory(factory.django.DjangoModelFactory):
@@ -19,3 +19,30 @@ class KeyPairFactory(factory.django.DjangoModelFactory):
         )
     )
     user = factory.SubFactory(UserFactory)
+
+
+class RegionFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = "userdb.Region"
+
+    name = "bham"
+    description = "Birmingham"
+
+
+class RegionSettingsFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = "openstack.RegionSettings"
+
+    region = factory.SubFactory(RegionFactory)
+    public_network_name = "public"
+    public_network_id = factory.Faker("uuid4")
+
+
+class TenantFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = "openstack.Tenant"
+
+    team = factory.SubFactory(TeamFactory)
+    region = factory.SubFactory(RegionFactory)
+    created_tenant_id = factory.Faker("uuid4")
+    created_tenant_name = factory.Sequence(lambda n: "bryn:tenant%d" % n)
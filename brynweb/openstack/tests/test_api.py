@@ -1,11 +1,32 @@
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
 from django.urls import reverse
 
 from rest_framework.test import APITestCase
 from rest_framework import status
 
+from core import hashids
+from userdb.models import TeamMember
 from userdb.tests.factories import UserFactory
-from ..models import KeyPair
-from .factories import KeyPairFactory
+from .. import benchmarks
+from ..fake import FakeCloud
+from ..models import KeyPair, ServerLease, ServerProvisioningJob
+from ..service import OpenstackService
+from .factories import KeyPairFactory, RegionSettingsFactory, TenantFactory
+
+
+def fake_server(n, status="ACTIVE"):
+    """Minimal stand-in for a novaclient Server"""
+    return SimpleNamespace(
+        id=str(uuid.uuid4()),
+        name=f"server{n}",
+        status=status,
+        flavor={"id": str(uuid.uuid4())},
+        addresses={"public": [{"addr": f"10.0.0.{n % 250}"}]},
+        created="2021-04-01T12:00:00Z",
+    )
 
 
 class TestKeyPairAPI(APITestCase):
@@ -71,3 +92,286 @@ class TestKeyPairAPI(APITestCase):
     # Deletion
 
     # Security for detail endpoint
+
+
+class TestInstanceListAPI(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.path_name = "api:instances"
+
+        region_settings = RegionSettingsFactory()
+        cls.tenant = TenantFactory(region=region_settings.region)
+        cls.user = UserFactory()
+        cls.teammember = TeamMember.objects.create(
+            team=cls.tenant.team, user=cls.user, is_admin=True
+        )
+        cls.keypair = KeyPairFactory(user=cls.user)
+        cls.url = reverse(
+            cls.path_name,
+            kwargs={"team_id": cls.tenant.team_id, "tenant_id": cls.tenant.pk},
+        )
+
+    def setUp(self):
+        patcher = mock.patch("openstack.api_views.OpenstackService")
+        self.openstack = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.client.force_login(user=self.user)
+
+    def test_missing_leases_are_created(self):
+        """Are leases created for servers without one, assigned to a team admin?"""
+        servers = [fake_server(n) for n in range(3)] + [fake_server(3, "SHELVED")]
+        self.openstack.servers.get_list.return_value = servers
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(ServerLease.objects.filter(tenant=self.tenant).count(), 4)
+        self.assertEqual(ServerLease.objects.shelved().count(), 1)
+        self.assertEqual(
+            response.data[0]["lease_assigned_teammember"], self.teammember.hashid
+        )
+
+    def test_instance_list_query_count_is_constant(self):
+        """Does the number of queries stay constant, regardless of server count?"""
+        servers = [fake_server(n) for n in range(50)]
+        self.openstack.servers.get_list.side_effect = lambda: [
+            SimpleNamespace(**vars(server)) for server in servers
+        ]  # Fresh objects per request, as transform modifies them in place
+        # Session, user & team context, then leases
+        with self.assertNumQueries(6):  # Includes lease bulk creation
+            self.client.get(self.url)
+        with self.assertNumQueries(4):  # Leases exist
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 50)
+
+    def test_unchanged_instance_list_is_not_modified(self):
+        """Is a 304 returned, without content, when the instance list ETag matches?"""
+        servers = [fake_server(n) for n in range(3)]
+        self.openstack.servers.get_list.side_effect = lambda: [
+            SimpleNamespace(**vars(server)) for server in servers
+        ]
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_changed_instance_list_is_returned(self):
+        """Is the full instance list returned, with a new ETag, when an instance has changed?"""
+        servers = [fake_server(n) for n in range(3)]
+        self.openstack.servers.get_list.side_effect = lambda: [
+            SimpleNamespace(**vars(server)) for server in servers
+        ]
+        etag = self.client.get(self.url)["ETag"]
+        servers[0].status = "SHUTOFF"
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_filters_and_page_are_passed_to_openstack(self):
+        """Are status & name filters, marker & limit passed to openstack, with a next page link for a full page?"""
+        servers = [fake_server(n) for n in range(2)]
+        self.openstack.servers.get_list.return_value = servers
+        response = self.client.get(
+            self.url, {"status": "ACTIVE", "name": "web", "marker": "m", "limit": 2}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.openstack.servers.get_list.assert_called_once_with(
+            search_opts={"status": "ACTIVE", "name": "web"}, marker="m", limit=2
+        )
+        self.assertEqual(
+            [instance["id"] for instance in response.data["results"]],
+            [server.id for server in servers],
+        )
+        self.assertIn(f"marker={servers[1].id}", response.data["next"])
+
+    def test_sparse_fieldset_skips_leases(self):
+        """Are only the requested fields returned, without loading (or creating) leases unless requested?"""
+        self.openstack.servers.get_list.side_effect = lambda **kwargs: [fake_server(0)]
+        response = self.client.get(self.url, {"fields": "id,name,status"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {"id", "name", "status"})
+        self.assertFalse(ServerLease.objects.exists())
+
+        response = self.client.get(self.url, {"fields": "id,leaseAssignedTeammember"})
+        self.assertEqual(
+            response.data[0],
+            {
+                "id": response.data[0]["id"],
+                "lease_assigned_teammember": self.teammember.hashid,
+            },
+        )
+
+    def test_sparse_fieldset_detail(self):
+        """Are only the requested fields of an instance returned?"""
+        server = fake_server(0)
+        self.openstack.servers.get.return_value = server
+        url = reverse(
+            self.path_name,
+            kwargs={
+                "team_id": self.tenant.team_id,
+                "tenant_id": self.tenant.pk,
+                "pk": server.id,
+            },
+        )
+        response = self.client.get(url, {"fields": "name,ip"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"name": "server0", "ip": "10.0.0.0"})
+        self.assertFalse(ServerLease.objects.exists())
+
+    def test_unknown_fields_are_rejected(self):
+        """Is a fieldset with unknown (or write only) fields rejected?"""
+        response = self.client.get(self.url, {"fields": "id,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.openstack.servers.get_list.assert_not_called()
+
+    def test_invalid_limit_is_rejected(self):
+        """Is a non-positive (or non-integer) limit rejected?"""
+        for limit in ["0", "-1", "ten"]:
+            response = self.client.get(self.url, {"limit": limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.openstack.servers.get_list.assert_not_called()
+
+    def test_launch_without_image_is_rejected(self):
+        """Is a server launch without an image rejected, before a job is queued?"""
+        data = {
+            "name": "server",
+            "flavor": str(uuid.uuid4()),
+            "keypair": str(self.keypair.pk),
+        }
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ServerProvisioningJob.objects.exists())
+
+
+class TestTeamInstanceListAPI(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.path_name = "api:team_instances"
+
+        cls.tenant_a = TenantFactory(region=RegionSettingsFactory().region)
+        cls.tenant_b = TenantFactory(
+            team=cls.tenant_a.team,
+            region=RegionSettingsFactory(region__name="warwick").region,
+        )
+        cls.user = UserFactory()
+        TeamMember.objects.create(team=cls.tenant_a.team, user=cls.user, is_admin=True)
+        cls.url = reverse(cls.path_name, kwargs={"team_id": cls.tenant_a.team_id})
+
+    def setUp(self):
+        patcher = mock.patch("openstack.api_views.OpenstackService")
+        self.service_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_team_instances_merged_across_tenants(self):
+        """Are instances for all of the team's tenants returned together?"""
+        self.service_class.return_value.servers.get_list.side_effect = lambda: [
+            fake_server(n) for n in range(2)
+        ]
+        self.client.force_login(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["instances"]), 4)
+        self.assertEqual(response.data["errors"], [])
+
+    def test_tenant_failure_is_reported(self):
+        """Does a failing region report an error, without failing the whole response?"""
+
+        def get_service(tenant):
+            service = mock.Mock()
+            if tenant == self.tenant_b:
+                service.servers.get_list.side_effect = Exception("Region down")
+            else:
+                service.servers.get_list.return_value = [fake_server(0)]
+            return service
+
+        self.service_class.side_effect = get_service
+        self.client.force_login(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["instances"]), 1)
+        self.assertEqual(
+            response.data["errors"],
+            [
+                {
+                    "tenant": hashids.encode(self.tenant_b.pk),
+                    "region": "warwick",
+                    "detail": "Region down",
+                }
+            ],
+        )
+
+    def test_non_member_cannot_list_team_instances(self):
+        """Are users forbidden from listing instances for teams they don't belong to?"""
+        self.client.force_login(user=UserFactory())
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestPaginatedListAPI(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.tenant = benchmarks.create_tenant(cls.user, "pages")
+
+    def setUp(self):
+        self.client.force_login(user=self.user)
+
+    def get_url(self, path_name):
+        return reverse(
+            path_name,
+            kwargs={"team_id": self.tenant.team_id, "tenant_id": self.tenant.pk},
+        )
+
+    def test_pages_follow_markers(self):
+        """Do next page links list every instance & volume exactly once?"""
+        for path_name in ["api:instances", "api:volumes"]:
+            with self.subTest(path_name=path_name):
+                url = self.get_url(path_name)
+                with FakeCloud(servers_per_tenant=5).patch():
+                    all_ids = [item["id"] for item in self.client.get(url).data]
+                    ids = []
+                    url = f"{url}?limit=2"
+                    while url:
+                        response = self.client.get(url)
+                        ids += [item["id"] for item in response.data["results"]]
+                        url = response.data["next"]
+                self.assertEqual(len(all_ids), 5)
+                self.assertEqual(ids, all_ids)
+
+    def test_lists_are_filtered_by_openstack(self):
+        """Are instances filtered by status & name (a regular expression) in openstack?"""
+        with FakeCloud(servers_per_tenant=12).patch():
+            all_instances = self.client.get(self.get_url("api:instances")).data
+            response = self.client.get(
+                self.get_url("api:instances"), {"status": "ACTIVE", "name": "^server1"}
+            )
+        self.assertEqual(
+            [instance["name"] for instance in response.data],
+            [
+                instance["name"]
+                for instance in all_instances
+                if instance["status"] == "ACTIVE"
+                and instance["name"].startswith("server1")
+            ],
+        )
+
+    def test_volumes_are_filtered_by_shown_name(self):
+        """Are volumes filtered by part of their name in openstack, including names with the tenant name prefixed?"""
+        with FakeCloud(servers_per_tenant=0).patch():
+            volumes = OpenstackService(tenant=self.tenant).cinder.volumes
+            volumes.create(1, name="data")
+            volumes.create(1, name=f"{self.tenant.created_tenant_name}data-old")
+            volumes.create(1, name="scratch")
+            response = self.client.get(self.get_url("api:volumes"), {"name": "data"})
+        self.assertEqual(
+            sorted(volume["name"] for volume in response.data), ["data", "data-old"]
+        )
+
+    def test_unknown_marker_is_rejected(self):
+        """Is a marker not found by openstack rejected as a bad request?"""
+        with FakeCloud().patch():
+            response = self.client.get(
+                self.get_url("api:volumes"), {"marker": "missing", "limit": 2}
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
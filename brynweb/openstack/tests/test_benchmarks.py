@@ -0,0 +1,75 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+from userdb.tests.factories import UserFactory
+from .. import benchmarks
+from ..fake import FakeCloud
+from ..service import OpenstackService
+
+
+class TestFakeCloud(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.tenant = benchmarks.create_tenant(cls.user, "fake")
+
+    def test_instance_list_served_by_fake(self):
+        """Are instance list requests served from the fake dataset, for the tenant's project?"""
+        self.client.force_login(user=self.user)
+        with FakeCloud(servers_per_tenant=7).patch():
+            response = self.client.get(
+                reverse(
+                    "api:instances",
+                    kwargs={
+                        "team_id": self.tenant.team_id,
+                        "tenant_id": self.tenant.pk,
+                    },
+                )
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 7)
+
+    def test_actions_update_fake_state(self):
+        """Are server actions reflected by later calls (but not modifications to returned resources)?"""
+        with FakeCloud(servers_per_tenant=1).patch():
+            openstack = OpenstackService(tenant=self.tenant)
+            server = openstack.servers.get_list()[0]
+            server.name = "modified"
+            openstack.servers.stop(server)
+            server = openstack.servers.get(server.id)
+        self.assertEqual(server.status, "SHUTOFF")
+        self.assertEqual(server.name, "server0")
+
+    def test_missing_resource_raises_not_found(self):
+        """Do missing resources raise client exceptions with a 404 code, as for a real cloud?"""
+        with FakeCloud().patch():
+            with self.assertRaises(Exception) as context:
+                OpenstackService(tenant=self.tenant).volumes.get("missing")
+        self.assertEqual(context.exception.code, 404)
+
+
+class TestBenchmarks(TestCase):
+    def test_run_reports_each_endpoint(self):
+        """Does a benchmark run report latency & query counts for each endpoint and size?"""
+        results = benchmarks.run(sizes=[2], requests=2)
+        self.assertEqual(
+            [result["endpoint"] for result in results], list(benchmarks.ENDPOINTS)
+        )
+        for result in results:
+            self.assertGreater(result["rps"], 0)
+            self.assertGreaterEqual(result["p99_ms"], result["p50_ms"])
+            self.assertGreater(result["queries"], 0)
+
+    def test_serializer_benchmark_reports_each_endpoint(self):
+        """Does a serializer benchmark report each endpoint, for serializers & row builders?"""
+        results = benchmarks.benchmark_serializers(size=3, repeat=1)
+        self.assertEqual(
+            [(result["endpoint"], result["method"]) for result in results],
+            [
+                (endpoint, method)
+                for endpoint in ["instances", "volumes", "flavors", "images"]
+                for method in ["serializer", "row_builder"]
+            ],
+        )
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from userdb.tests.factories import UserFactory
+from .. import benchmarks, catalog
+from ..fake import FakeCloud
+from ..models import Tenant
+from .factories import RegionFactory
+
+FLAVORS = [{"id": "f1", "name": "small", "ram": 1024, "vcpus": 1}]
+
+
+@override_settings(
+    OPENSTACK_CATALOG_CACHE_TTL_SECONDS=60, OPENSTACK_CATALOG_CACHE_STALE_SECONDS=60
+)
+class TestRegionCatalogCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = RegionFactory()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.fetch = mock.Mock(return_value=FLAVORS)
+        patcher = mock.patch.dict(
+            catalog.CATALOG_FETCHERS, {catalog.FLAVORS: self.fetch}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("openstack.catalog.OpenstackService")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_catalog_is_fetched_once(self):
+        """Are repeated requests served from the cache?"""
+        self.assertEqual(catalog.get(self.region, catalog.FLAVORS), FLAVORS)
+        self.assertEqual(catalog.get(self.region, catalog.FLAVORS), FLAVORS)
+        self.fetch.assert_called_once()
+
+    def test_stale_catalog_is_served_while_refresh_is_enqueued(self):
+        """Is a stale catalog returned, with a single background refresh enqueued?"""
+        cache.set(
+            catalog.get_cache_key(self.region, catalog.FLAVORS),
+            {"fetched_at": 0, "data": FLAVORS},
+        )
+        with mock.patch("openstack.tasks.refresh_region_catalog") as refresh_task:
+            self.assertEqual(catalog.get(self.region, catalog.FLAVORS), FLAVORS)
+            catalog.get(self.region, catalog.FLAVORS)
+        refresh_task.assert_called_once_with(self.region.pk, catalog.FLAVORS)
+        self.fetch.assert_not_called()
+
+    def test_invalidate(self):
+        """Is the catalog re-fetched after invalidation?"""
+        catalog.get(self.region, catalog.FLAVORS)
+        catalog.invalidate(self.region)
+        catalog.get(self.region, catalog.FLAVORS)
+        self.assertEqual(self.fetch.call_count, 2)
+
+
+class TestTenantCatalogs(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.tenant = benchmarks.create_tenant(cls.user, "catalogs")
+        cls.other_tenant = Tenant.objects.create(
+            team=cls.tenant.team,
+            region=cls.tenant.region,
+            created_tenant_id="other-project",
+            created_tenant_name="bryn:other",
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.force_login(user=self.user)
+
+    def get_names(self, path_name, tenant):
+        url = reverse(
+            path_name, kwargs={"team_id": tenant.team_id, "tenant_id": tenant.pk}
+        )
+        return [item["name"] for item in self.client.get(url).data]
+
+    def test_tenant_private_images_and_flavors_are_listed(self):
+        """Are a tenant's own private images & flavors listed with the region's public ones (for that tenant only)?"""
+        with FakeCloud(image_count=4).patch():
+            images = self.get_names("api:images", self.tenant)
+            flavors = self.get_names("api:flavors", self.tenant)
+            other_images = self.get_names("api:images", self.other_tenant)
+
+        self.assertEqual(images, ["image0", "image2", "catalogs-project-snapshot"])
+        self.assertIn("catalogs-project.flavor", flavors)
+        self.assertEqual(other_images, ["image0", "image2", "other-project-snapshot"])
+
+    def test_invalidate_includes_tenant_catalogs(self):
+        """Are tenants' own catalog entries re-fetched after their region's catalogs are invalidated?"""
+        with FakeCloud().patch() as cloud:
+            catalog.get_for_tenant(self.tenant, catalog.IMAGES)
+            call_count = cloud.call_count
+            catalog.get_for_tenant(self.tenant, catalog.IMAGES)
+            self.assertEqual(cloud.call_count, call_count)
+            catalog.invalidate(self.tenant.region)
+            catalog.get_for_tenant(self.tenant, catalog.IMAGES)
+            self.assertEqual(cloud.call_count, 2 * call_count)
@@ -0,0 +1,133 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from keystoneauth1 import exceptions as ksa_exceptions
+from keystoneauth1 import session as keystonesession
+
+from rest_framework import status
+
+from userdb.models import TeamMember
+from userdb.tests.factories import UserFactory
+from .. import circuit_breaker
+from ..circuit_breaker import CircuitBreaker, CircuitBreakerSession, CircuitOpen
+from .factories import RegionSettingsFactory, TenantFactory
+
+NOVA_REQUEST = {"endpoint_filter": {"service_type": "compute"}}
+
+
+@override_settings(
+    OPENSTACK_CIRCUIT_BREAKER_FAILURE_THRESHOLD=3,
+    OPENSTACK_CIRCUIT_BREAKER_RESET_SECONDS=30,
+)
+class TestCircuitBreakerSession(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch.object(keystonesession.Session, "request")
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = CircuitBreakerSession(region_name="bham")
+        self.breaker = CircuitBreaker("bham", circuit_breaker.NOVA)
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        """Do requests fail fast, without reaching openstack, once the failure threshold is reached?"""
+        self.request.side_effect = ksa_exceptions.ConnectFailure
+        for n in range(3):
+            with self.assertRaises(ksa_exceptions.ConnectFailure):
+                self.session.request("/servers", "GET", **NOVA_REQUEST)
+        with self.assertRaises(CircuitOpen):
+            self.session.request("/servers", "GET", **NOVA_REQUEST)
+        self.assertEqual(self.request.call_count, 3)
+        self.assertEqual(self.breaker.state, circuit_breaker.OPEN)
+
+    def test_circuits_are_per_service(self):
+        """Are requests to other services unaffected by an open circuit?"""
+        self.request.side_effect = ksa_exceptions.ConnectFailure
+        for n in range(3):
+            with self.assertRaises(ksa_exceptions.ConnectFailure):
+                self.session.request("/servers", "GET", **NOVA_REQUEST)
+        self.request.side_effect = None
+        self.request.return_value = mock.Mock(status_code=200)
+        self.session.request(
+            "/volumes", "GET", endpoint_filter={"service_type": "volumev3"}
+        )
+        self.assertEqual(self.request.call_count, 4)
+        self.assertEqual(
+            circuit_breaker.get_open_services(SimpleNamespace(name="bham")),
+            [circuit_breaker.NOVA],
+        )
+
+    def test_successful_probe_closes_circuit(self):
+        """Is a single probe request allowed once half-open, closing the circuit on success?"""
+        cache.set(self.breaker.key, {"failures": 3, "opened_at": 0})
+        self.assertEqual(self.breaker.state, circuit_breaker.HALF_OPEN)
+        self.request.return_value = mock.Mock(status_code=200)
+        self.session.request("/servers", "GET", **NOVA_REQUEST)
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+
+    def test_failed_probe_reopens_circuit(self):
+        """Does a failed probe request re-open the circuit?"""
+        cache.set(self.breaker.key, {"failures": 3, "opened_at": 0})
+        self.request.return_value = mock.Mock(status_code=503)
+        self.session.request("/servers", "GET", **NOVA_REQUEST)
+        self.assertEqual(self.breaker.state, circuit_breaker.OPEN)
+
+    def test_client_error_probe_closes_circuit(self):
+        """Does a probe answered with a client error (the service is reachable) close the circuit?"""
+        cache.set(self.breaker.key, {"failures": 3, "opened_at": 0})
+        self.request.side_effect = ksa_exceptions.NotFound
+        for n in range(2):
+            with self.assertRaises(ksa_exceptions.NotFound):
+                self.session.request("/servers/missing", "GET", **NOVA_REQUEST)
+        self.assertEqual(self.request.call_count, 2)
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+        self.assertIsNone(cache.get(self.breaker.key + ":probe"))
+
+
+class TestCircuitBreakerAPI(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region_settings = RegionSettingsFactory()
+        cls.tenant = TenantFactory(region=region_settings.region)
+        cls.user = UserFactory()
+        TeamMember.objects.create(team=cls.tenant.team, user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch("openstack.api_views.OpenstackService")
+        self.openstack = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_open_circuit_fails_fast(self):
+        """Is a 503 returned without calling openstack, when a region circuit is open?"""
+        breaker = CircuitBreaker(self.tenant.region.name, circuit_breaker.NOVA)
+        cache.set(breaker.key, {"failures": 5, "opened_at": time.time()})
+        self.client.force_login(user=self.user)
+        response = self.client.get(
+            reverse(
+                "api:instances",
+                kwargs={"team_id": self.tenant.team_id, "tenant_id": self.tenant.pk},
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.openstack.assert_not_called()
+
+    def test_other_open_circuits_are_ignored(self):
+        """Are views unaffected by open circuits for services they don't use (e.g. glance, for instances)?"""
+        breaker = CircuitBreaker(self.tenant.region.name, circuit_breaker.GLANCE)
+        cache.set(breaker.key, {"failures": 5, "opened_at": time.time()})
+        self.openstack.return_value.servers.get_list.return_value = []
+        self.client.force_login(user=self.user)
+        response = self.client.get(
+            reverse(
+                "api:instances",
+                kwargs={"team_id": self.tenant.team_id, "tenant_id": self.tenant.pk},
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.openstack.assert_called_once()
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from userdb.tests.factories import UserFactory
+from .. import benchmarks
+from ..fake import FakeCloud
+from ..service import LimitsService
+from .factories import KeyPairFactory
+
+
+class TestLaunchContextAPI(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.tenant = benchmarks.create_tenant(cls.user, "launch")
+        cls.keypair = KeyPairFactory(user=cls.user)
+        KeyPairFactory()  # Another user's key pair
+        cls.url = reverse(
+            "api:launch_context",
+            kwargs={"team_id": cls.tenant.team_id, "tenant_id": cls.tenant.pk},
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.force_login(user=self.user)
+
+    def test_launch_context(self):
+        """Are catalogs, quotas, the user's key pairs & hypervisor stats returned in a single response?"""
+        with FakeCloud(servers_per_tenant=3).patch():
+            response = self.client.get(self.url)
+            for path_name in ["api:flavors", "api:images", "api:volume_types"]:
+                with self.subTest(path_name=path_name):
+                    catalog_response = self.client.get(
+                        reverse(
+                            path_name,
+                            kwargs={
+                                "team_id": self.tenant.team_id,
+                                "tenant_id": self.tenant.pk,
+                            },
+                        )
+                    )
+                    section = path_name.split(":")[1]
+                    self.assertEqual(response.data[section], catalog_response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["errors"], {})
+        self.assertEqual(
+            [keypair["id"] for keypair in response.data["keypairs"]],
+            [str(self.keypair.pk)],
+        )
+        self.assertEqual(response.data["hypervisor_stats"], [])
+        self.assertEqual(response.data["quotas"]["instances"]["used"], 3)
+        self.assertGreater(response.data["quotas"]["instances"]["limit"], 3)
+        self.assertEqual(response.data["quotas"]["volumes"]["used"], 3)
+
+    def test_failed_section_is_reported(self):
+        """Is an openstack failure reported for its section, with the other sections still returned?"""
+        with FakeCloud().patch(), mock.patch.object(
+            LimitsService, "get", side_effect=Exception("Quotas unavailable")
+        ):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["quotas"])
+        self.assertEqual(response.data["errors"], {"quotas": "Quotas unavailable"})
+        self.assertTrue(response.data["flavors"])
+        self.assertTrue(response.data["keypairs"])
+
+    def test_non_member_is_rejected(self):
+        """Is the launch context only returned for team members?"""
+        self.client.force_login(user=UserFactory())
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,117 @@
+import datetime
+import uuid
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import OutboxMessage
+from userdb.models import TeamMember
+from userdb.tests.factories import UserFactory
+from .. import lease_timers, shelving
+from ..models import ServerLease, ServerLeaseRequest
+from ..tasks import fire_server_lease_timer
+from .factories import TenantFactory
+
+DAY = datetime.timedelta(days=1)
+HOUR = datetime.timedelta(hours=1)
+
+
+@override_settings(SERVER_LEASE_REMINDER_DAYS=[0, 3, 5], SERVER_LEASE_TIMERS=True)
+class TestLeaseTimers(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = TenantFactory()
+        cls.user = UserFactory()
+        cls.teammember = TeamMember.objects.create(team=cls.tenant.team, user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch.object(fire_server_lease_timer, "schedule")
+        self.schedule = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_lease(self, expires_in, reminded_ago=None):
+        now = timezone.now()
+        return ServerLease.objects.create(
+            server_id=uuid.uuid4(),
+            server_name="server",
+            tenant=self.tenant,
+            assigned_teammember=self.teammember,
+            expiry=now + expires_in,
+            last_reminder_sent_at=now - reminded_ago if reminded_ago else None,
+        )
+
+    def fire(self, lease):
+        fire_server_lease_timer.call_local(lease.pk, lease.renewal_count, lease.expiry)
+
+    def test_next_timer_is_next_reminder_window(self):
+        """Is the next timer the start of the next reminder window, or now if a reminder is due?"""
+        lease = self.create_lease(14 * DAY)
+        self.assertEqual(lease_timers.get_next_timer(lease), lease.expiry - 6 * DAY)
+
+        now = timezone.now()
+        lease = self.create_lease(5 * DAY + HOUR)
+        self.assertEqual(lease_timers.get_next_timer(lease, now), now)
+
+        lease = self.create_lease(5 * DAY + HOUR, reminded_ago=HOUR)
+        self.assertEqual(lease_timers.get_next_timer(lease), lease.expiry - 4 * DAY)
+
+        lease = self.create_lease(HOUR, reminded_ago=HOUR / 2)
+        self.assertEqual(lease_timers.get_next_timer(lease), lease.expiry)
+
+    def test_renewal_schedules_timer(self):
+        """Does renewing a lease schedule a timer for its new revision, only once?"""
+        lease = self.create_lease(HOUR)
+        lease.renew_lease(days=14)
+        lease.schedule_timer()
+        self.schedule.assert_called_once_with(
+            (lease.pk, 1, lease.expiry), eta=lease.expiry - 6 * DAY
+        )
+
+    def test_daily_reschedule_skips_scheduled_timers(self):
+        """Are timers already scheduled skipped by the daily reschedule (regardless of the cache), until lost?"""
+        lease = self.create_lease(14 * DAY)
+        self.assertEqual(lease_timers.schedule_all(ServerLease.objects.all()), 1)
+        cache.clear()
+        self.assertEqual(lease_timers.schedule_all(ServerLease.objects.all()), 0)
+        self.schedule.assert_called_once()
+
+        # The timer's point passed without it firing (e.g. lost from the queue)
+        ServerLease.objects.filter(pk=lease.pk).update(
+            timer_eta=timezone.now() - 7 * DAY
+        )
+        ServerLease.objects.filter(pk=lease.pk).update(expiry=timezone.now() + 5 * DAY)
+        self.assertEqual(lease_timers.schedule_all(ServerLease.objects.all()), 1)
+
+    def test_superseded_timer_does_nothing(self):
+        """Does a timer for a lease since renewed or granted indefinite status do nothing?"""
+        lease = self.create_lease(5 * DAY + HOUR)
+        renewal_count, expiry = lease.renewal_count, lease.expiry
+        ServerLeaseRequest.objects.create(
+            server_lease=lease, user=self.user, message="Please"
+        ).grant(mock.Mock(user=self.user))
+        fire_server_lease_timer.call_local(lease.pk, renewal_count, expiry)
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.schedule.assert_not_called()
+
+    def test_due_timer_sends_reminder_and_schedules_next(self):
+        """Does a due timer send a reminder, then schedule the next timer?"""
+        lease = self.create_lease(5 * DAY + HOUR)
+        self.fire(lease)
+        lease.refresh_from_db()
+        self.assertIsNotNone(lease.last_reminder_sent_at)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        self.schedule.assert_called_once_with(
+            (lease.pk, 0, lease.expiry), eta=lease.expiry - 4 * DAY
+        )
+
+    def test_expired_timer_shelves_server(self):
+        """Does a timer firing after expiry enqueue shelving?"""
+        lease = self.create_lease(-HOUR)
+        with mock.patch.object(shelving, "enqueue") as enqueue:
+            self.fire(lease)
+        self.assertEqual(list(enqueue.call_args[0][0]), [lease])
+        self.schedule.assert_not_called()
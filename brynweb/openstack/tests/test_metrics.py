@@ -0,0 +1,51 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+from userdb.tests.factories import UserFactory
+from ..metrics import InstrumentedService, openstack_call_seconds
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        openstack_call_seconds.reset()
+        self.addCleanup(openstack_call_seconds.reset)
+
+    def test_instrumented_service_records_outcome(self):
+        """Are sub-service calls timed, by region, service, method & outcome?"""
+        service = InstrumentedService(
+            mock.Mock(**{"get.side_effect": ValueError}), "bham", "servers"
+        )
+        with self.assertRaises(ValueError):
+            service.get("server-id")
+        self.assertEqual(
+            list(openstack_call_seconds.snapshot()),
+            [("bham", "servers", "get", "error")],
+        )
+
+    def test_staff_can_scrape_metrics(self):
+        """Can staff users fetch metrics in the prometheus text format?"""
+        openstack_call_seconds.observe(
+            0.2, region="bham", service="servers", method="get_list", outcome="success"
+        )
+        self.client.force_login(user=UserFactory(is_staff=True))
+        response = self.client.get(reverse("api:metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            'bryn_openstack_call_seconds_count{region="bham",service="servers",'
+            'method="get_list",outcome="success"} 1',
+            response.content.decode(),
+        )
+
+    def test_non_staff_cannot_scrape_metrics(self):
+        """Are metrics hidden from non-staff users?"""
+        self.client.force_login(user=UserFactory())
+        response = self.client.get(reverse("api:metrics"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
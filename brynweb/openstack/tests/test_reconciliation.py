@@ -0,0 +1,124 @@
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from userdb.models import TeamMember
+from userdb.tests.factories import UserFactory
+from .. import reconciliation
+from ..models import ServerLease
+from .factories import RegionSettingsFactory, TenantFactory
+
+
+class TestReconciliation(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region_settings = RegionSettingsFactory()
+        cls.region = region_settings.region
+        cls.tenant = TenantFactory(region=cls.region)
+        cls.teammember = TeamMember.objects.create(
+            team=cls.tenant.team, user=UserFactory()
+        )
+
+    def setUp(self):
+        patcher = mock.patch("openstack.reconciliation.OpenstackService")
+        self.list_servers = (
+            patcher.start().return_value.servers.get_list_for_all_tenants
+        )
+        self.addCleanup(patcher.stop)
+
+    def create_lease(self, shelved=False, deleted=False):
+        return ServerLease.objects.create(
+            server_id=uuid.uuid4(),
+            server_name="server",
+            tenant=self.tenant,
+            assigned_teammember=self.teammember,
+            shelved=shelved,
+            deleted=deleted,
+        )
+
+    def test_leases_are_reconciled_with_servers(self):
+        """Are leases for missing servers marked deleted, and shelved state synced, from a single listing?"""
+        unchanged = self.create_lease()
+        missing = self.create_lease()
+        shelved = self.create_lease()
+        unshelved = self.create_lease(shelved=True)
+        unleased_server_id = str(uuid.uuid4())
+        self.list_servers.return_value = [
+            SimpleNamespace(id=str(unchanged.server_id), status="ACTIVE"),
+            SimpleNamespace(id=str(shelved.server_id), status="SHELVED_OFFLOADED"),
+            SimpleNamespace(id=str(unshelved.server_id), status="SHUTOFF"),
+            SimpleNamespace(id=unleased_server_id, status="ACTIVE"),
+        ]
+
+        result = reconciliation.reconcile(self.region)
+        self.list_servers.assert_called_once_with()
+        self.assertEqual(
+            result,
+            {
+                "deleted": 1,
+                "restored": 0,
+                "shelved": 1,
+                "unshelved": 1,
+                "unleased_server_ids": [unleased_server_id],
+            },
+        )
+        self.assertEqual(
+            list(ServerLease.objects.active().order_by("pk")), [unchanged, unshelved]
+        )
+        self.assertTrue(ServerLease.objects.get(pk=missing.pk).deleted)
+        self.assertTrue(ServerLease.objects.get(pk=shelved.pk).shelved)
+
+    def test_reappeared_servers_leases_are_restored(self):
+        """Are deleted leases restored (with shelved state synced & timers scheduled) when servers are listed again?"""
+        restored = self.create_lease(deleted=True)
+        restored_shelved = self.create_lease(deleted=True)
+        self.list_servers.return_value = [
+            SimpleNamespace(id=str(restored.server_id), status="ACTIVE"),
+            SimpleNamespace(
+                id=str(restored_shelved.server_id), status="SHELVED_OFFLOADED"
+            ),
+        ]
+
+        with override_settings(SERVER_LEASE_TIMERS=True), mock.patch(
+            "openstack.reconciliation.lease_timers.schedule"
+        ) as schedule:
+            result = reconciliation.reconcile(self.region)
+        self.assertEqual(result["restored"], 2)
+        # Shelved leases have no timer
+        self.assertEqual([call[0][0] for call in schedule.call_args_list], [restored])
+        self.assertEqual(list(ServerLease.objects.active()), [restored])
+        self.assertTrue(ServerLease.objects.get(pk=restored_shelved.pk).shelved)
+        self.assertFalse(ServerLease.objects.get(pk=restored_shelved.pk).deleted)
+
+    @mock.patch("openstack.reconciliation.logger")
+    def test_empty_listing_is_aborted(self, logger):
+        """Is nothing marked deleted if no servers are listed while there are active leases?"""
+        lease = self.create_lease()
+        self.list_servers.return_value = []
+
+        self.assertIsNone(reconciliation.reconcile(self.region))
+        logger.error.assert_called_once()
+        self.assertFalse(ServerLease.objects.get(pk=lease.pk).deleted)
+
+    @override_settings(
+        SERVER_LEASE_RECONCILIATION_MAX_DELETED_FRACTION=0.5,
+        SERVER_LEASE_RECONCILIATION_DELETED_ALLOWANCE=1,
+    )
+    @mock.patch("openstack.reconciliation.logger")
+    def test_mass_deletion_is_aborted(self, logger):
+        """Is nothing marked deleted if more than the maximum fraction of active leases would be?"""
+        listed = self.create_lease()
+        missing = [self.create_lease() for _ in range(2)]
+        self.list_servers.return_value = [
+            SimpleNamespace(id=str(listed.server_id), status="ACTIVE")
+        ]
+
+        self.assertIsNone(reconciliation.reconcile(self.region))
+        logger.error.assert_called_once()
+        self.assertFalse(
+            ServerLease.objects.filter(pk__in=[lease.pk for lease in missing])
+            .filter(deleted=True)
+            .exists()
+        )
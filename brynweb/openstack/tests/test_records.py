@@ -0,0 +1,45 @@
+from django.test import TestCase
+
+from userdb.tests.factories import UserFactory
+from .. import benchmarks
+from ..fake import FakeCloud
+from ..records import ServerRecord, VolumeRecord
+from ..service import OpenstackService
+
+
+class TestRecords(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = benchmarks.create_tenant(UserFactory(), "records")
+
+    def test_listings_are_records(self):
+        """Are servers & volumes listed as records, with only the response fields used?"""
+        with FakeCloud(servers_per_tenant=2).patch():
+            openstack = OpenstackService(tenant=self.tenant)
+            servers = openstack.servers.get_list()
+            volumes = openstack.volumes.get_list()
+            server_info = openstack.nova.servers.get(servers[0].id)._info
+
+        self.assertEqual([type(server) for server in servers], [ServerRecord] * 2)
+        self.assertEqual([type(volume) for volume in volumes], [VolumeRecord] * 2)
+        self.assertFalse(hasattr(servers[0], "__dict__"))
+        self.assertEqual(servers[0].addresses, server_info["addresses"])
+        with self.assertRaises(AttributeError):
+            servers[0].metadata
+
+    def test_missing_fields_are_unset(self):
+        """Are fields missing from a response unset (raising AttributeError, as for resources)?"""
+        server = ServerRecord.from_info({"id": "1", "name": "server", "extra": True})
+        self.assertEqual(server.name, "server")
+        with self.assertRaises(AttributeError):
+            server.status
+
+    def test_actions_accept_records(self):
+        """Can server actions be called with listed records?"""
+        with FakeCloud(servers_per_tenant=1).patch():
+            openstack = OpenstackService(tenant=self.tenant)
+            server = openstack.servers.get_list()[0]
+            openstack.servers.shelve(server)
+            self.assertEqual(
+                openstack.servers.get(server.id).status, "SHELVED_OFFLOADED"
+            )
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..session_pool import SessionPool
+
+AUTH_SETTINGS = {
+    "TENANT_NAME": "admin",
+    "AUTH_URL": "http://localhost:5000/v3/",
+    "SERVICE_USERNAME": "service",
+    "SERVICE_PASSWORD": "service",
+    "ADMIN_USERNAME": "admin",
+    "ADMIN_PASSWORD": "admin",
+}
+
+
+class TestSessionPool(SimpleTestCase):
+    def setUp(self):
+        self.pool = SessionPool(expiry_margin=300)
+        self.region = SimpleNamespace(name="bham")
+        self.tenant_a = SimpleNamespace(created_tenant_id="aaa")
+        self.tenant_b = SimpleNamespace(created_tenant_id="bbb")
+
+    def test_session_is_reused_for_same_tenant(self):
+        """Is the same session returned for repeated requests for the same tenant?"""
+        first = self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_a)
+        second = self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_a)
+        self.assertIs(first, second)
+        stats = self.pool.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_sessions_are_keyed_by_tenant_and_user(self):
+        """Do different tenants, and the admin user, get separate sessions?"""
+        tenant_a = self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_a)
+        tenant_b = self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_b)
+        admin = self.pool.get(AUTH_SETTINGS, self.region)
+        self.assertIsNot(tenant_a, tenant_b)
+        self.assertIsNot(tenant_a, admin)
+        self.assertEqual(self.pool.stats()["size"], 3)
+
+    def test_expiring_token_is_refreshed(self):
+        """Is a token due to expire within the margin invalidated?"""
+        session = self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_a)
+        session.auth.auth_ref = mock.Mock()
+        session.auth.auth_ref.will_expire_soon.return_value = True
+        with mock.patch.object(session.auth, "invalidate") as invalidate:
+            self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_a)
+        invalidate.assert_called_once()
+        self.assertEqual(self.pool.stats()["refreshes"], 1)
+
+    def test_valid_token_is_not_refreshed(self):
+        """Is a token with plenty of life remaining reused?"""
+        session = self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_a)
+        session.auth.auth_ref = mock.Mock()
+        session.auth.auth_ref.will_expire_soon.return_value = False
+        self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_a)
+        self.assertEqual(self.pool.stats()["refreshes"], 0)
+
+    def test_invalidate_region(self):
+        """Are only sessions for the specified region discarded?"""
+        other_region = SimpleNamespace(name="warwick")
+        self.pool.get(AUTH_SETTINGS, self.region, tenant=self.tenant_a)
+        self.pool.get(AUTH_SETTINGS, other_region, tenant=self.tenant_a)
+        self.pool.invalidate(region=self.region)
+        self.assertEqual(self.pool.stats()["size"], 1)
@@ -0,0 +1,89 @@
+import datetime
+import uuid
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from userdb.models import TeamMember
+from userdb.tests.factories import UserFactory
+from .. import benchmarks, shelving
+from ..fake import FakeCloud
+from ..models import ServerLease
+from ..service import OpenstackService
+from ..tasks import shelve_overdue_servers
+from .test_tasks import ImmediateTimer
+
+
+@mock.patch("openstack.tasks.threading.Timer", ImmediateTimer)
+class TestShelving(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.tenant = benchmarks.create_tenant(cls.user, "shelving")
+        cls.teammember = TeamMember.objects.get(team=cls.tenant.team, user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.cloud = FakeCloud(servers_per_tenant=0)
+        patcher = self.cloud.patch()
+        patcher.__enter__()
+        self.addCleanup(patcher.__exit__, None, None, None)
+        self.nova = OpenstackService(tenant=self.tenant).nova
+
+    def create_lease(self, expires_in, server_id=None):
+        return ServerLease.objects.create(
+            server_id=server_id or self.nova.servers.create("server", "image").id,
+            server_name="server",
+            tenant=self.tenant,
+            assigned_teammember=self.teammember,
+            expiry=timezone.now() + expires_in,
+        )
+
+    @override_settings(SERVER_LEASE_TIMERS=False)
+    def test_overdue_servers_are_shelved(self):
+        """Are servers for overdue leases shelved, and the leases marked as shelved (only) once confirmed?"""
+        overdue = self.create_lease(-datetime.timedelta(hours=1))
+        due = self.create_lease(datetime.timedelta(days=1))
+        shelve_overdue_servers.call_local()
+
+        overdue.refresh_from_db()
+        due.refresh_from_db()
+        self.assertTrue(overdue.shelved)
+        self.assertFalse(due.shelved)
+        self.assertEqual(
+            self.nova.servers.get(str(overdue.server_id)).status, "SHELVED_OFFLOADED"
+        )
+        self.assertEqual(self.nova.servers.get(str(due.server_id)).status, "ACTIVE")
+
+    def test_missing_servers_mark_leases_deleted(self):
+        """Are overdue leases for servers which no longer exist marked as deleted?"""
+        lease = self.create_lease(-datetime.timedelta(hours=1), server_id=uuid.uuid4())
+        self.assertTrue(lease.shelve_server())
+        lease.refresh_from_db()
+        self.assertTrue(lease.deleted)
+        self.assertFalse(lease.shelved)
+
+    @override_settings(SERVER_SHELVING_MAX_CONFIRM_CHECKS=2)
+    def test_unconfirmed_leases_are_not_marked_shelved(self):
+        """Are leases left unshelved if nova never confirms the shelved status?"""
+        lease = self.create_lease(-datetime.timedelta(hours=1))
+        with mock.patch.object(shelving, "check", return_value=shelving.SHELVING):
+            lease.shelve_server()
+        lease.refresh_from_db()
+        self.assertFalse(lease.shelved)
+
+    @override_settings(SERVER_SHELVING_MAX_ATTEMPTS=2)
+    def test_failures_are_retried(self):
+        """Are failed shelve requests retried?"""
+        lease = self.create_lease(-datetime.timedelta(hours=1))
+        shelve = mock.Mock(
+            side_effect=[Exception("Nova unavailable"), shelving.SHELVED]
+        )
+        with mock.patch.object(shelving, "shelve", shelve):
+            lease.shelve_server()
+        lease.refresh_from_db()
+        self.assertEqual(shelve.call_count, 2)
+        self.assertTrue(lease.shelved)
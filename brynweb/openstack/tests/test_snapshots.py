@@ -0,0 +1,130 @@
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from userdb.models import TeamMember
+from userdb.tests.factories import UserFactory
+from .. import snapshots
+from ..models import ServerSnapshot, ServerSnapshotSync
+from .factories import RegionSettingsFactory, TenantFactory
+
+
+def fake_admin_server(tenant, n, status="ACTIVE"):
+    """Minimal stand-in for a novaclient Server, as listed with region admin credentials"""
+    return SimpleNamespace(
+        id=str(uuid.uuid4()),
+        tenant_id=tenant.created_tenant_id,
+        name=f"server{n}",
+        status=status,
+        flavor={"id": "flavor"},
+        image="",
+        addresses={"public": [{"addr": f"10.0.0.{n}"}]},
+        created="2021-04-01T12:00:00Z",
+        updated="2021-04-01T12:00:00Z",
+    )
+
+
+class TestServerSnapshotSync(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region_settings = RegionSettingsFactory()
+        cls.region = region_settings.region
+        cls.tenant = TenantFactory(region=cls.region)
+
+    def setUp(self):
+        patcher = mock.patch("openstack.snapshots.OpenstackService")
+        self.list_servers = (
+            patcher.start().return_value.servers.get_list_for_all_tenants
+        )
+        self.addCleanup(patcher.stop)
+
+    def test_first_sync_is_full(self):
+        """Does the first sync list all servers, mapping them to their tenant?"""
+        self.list_servers.return_value = [
+            fake_admin_server(self.tenant, n) for n in range(3)
+        ]
+        snapshots.sync(self.region)
+        self.list_servers.assert_called_once_with(changes_since=None)
+        self.assertEqual(ServerSnapshot.objects.filter(tenant=self.tenant).count(), 3)
+        sync_state = ServerSnapshotSync.objects.get(region=self.region)
+        self.assertEqual(sync_state.last_synced_at, sync_state.last_full_sync_at)
+
+    def test_subsequent_syncs_are_incremental(self):
+        """Are only changed servers fetched after the first sync, with deleted servers removed?"""
+        servers = [fake_admin_server(self.tenant, n) for n in range(3)]
+        self.list_servers.return_value = servers
+        snapshots.sync(self.region)
+        last_synced_at = ServerSnapshotSync.objects.get(
+            region=self.region
+        ).last_synced_at
+
+        servers[0].status = "SHUTOFF"
+        servers[1].status = "DELETED"
+        self.list_servers.return_value = servers[:2]
+        snapshots.sync(self.region)
+
+        self.list_servers.assert_called_with(
+            changes_since=last_synced_at - snapshots.CHANGES_SINCE_OVERLAP
+        )
+        self.assertEqual(
+            dict(ServerSnapshot.objects.values_list("name", "status")),
+            {"server0": "SHUTOFF", "server2": "ACTIVE"},
+        )
+
+    def test_full_sync_removes_missing_servers(self):
+        """Are snapshots removed for servers no longer listed in a full sync?"""
+        servers = [fake_admin_server(self.tenant, n) for n in range(3)]
+        self.list_servers.return_value = servers
+        snapshots.sync(self.region)
+        ServerSnapshotSync.objects.update(last_full_sync_at=None)
+
+        self.list_servers.return_value = servers[1:]
+        snapshots.sync(self.region)
+        self.assertEqual(ServerSnapshot.objects.count(), 2)
+
+
+class TestInstanceListMirrorAPI(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region_settings = RegionSettingsFactory()
+        cls.tenant = TenantFactory(region=region_settings.region)
+        cls.user = UserFactory()
+        TeamMember.objects.create(team=cls.tenant.team, user=cls.user, is_admin=True)
+        cls.url = reverse(
+            "api:instances",
+            kwargs={"team_id": cls.tenant.team_id, "tenant_id": cls.tenant.pk},
+        )
+
+    def setUp(self):
+        patcher = mock.patch("openstack.snapshots.OpenstackService")
+        patcher.start().return_value.servers.get_list_for_all_tenants.return_value = [
+            fake_admin_server(self.tenant, n) for n in range(3)
+        ]
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("openstack.api_views.OpenstackService")
+        self.openstack = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.client.force_login(user=self.user)
+
+    def test_instances_are_served_from_mirror(self):
+        """Are instances served from snapshots, with a sync timestamp, without querying openstack?"""
+        snapshots.sync(self.tenant.region)
+        response = self.client.get(self.url, {"source": "mirror"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+        self.assertIn("X-Synced-At", response)
+        self.openstack.servers.get_list.assert_not_called()
+
+    def test_unsynced_region_falls_back_to_openstack(self):
+        """Are instances fetched from openstack if the region has not yet been mirrored?"""
+        self.openstack.servers.get_list.return_value = []
+        response = self.client.get(self.url, {"source": "mirror"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Synced-At", response)
+        self.openstack.servers.get_list.assert_called_once()
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from userdb.models import TeamMember
+from userdb.tests.factories import UserFactory
+from ..status_events import StatusWatcherRegistry, TenantStatusWatcher, status_watchers
+from .factories import RegionSettingsFactory, TenantFactory
+
+
+@override_settings(OPENSTACK_STATUS_POLL_SECONDS=60)
+class TestTenantStatusWatcher(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region_settings = RegionSettingsFactory()
+        cls.tenant = TenantFactory(region=region_settings.region)
+        cls.user = UserFactory()
+        TeamMember.objects.create(team=cls.tenant.team, user=cls.user)
+
+    def setUp(self):
+        patcher = mock.patch("openstack.status_events.OpenstackService")
+        self.openstack = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.openstack.servers.get_list.return_value = []
+        self.openstack.volumes.get_list.return_value = []
+
+    def test_status_changes_are_published(self):
+        """Are events published for all items on the first poll, then for changed & deleted items only?"""
+        watcher = TenantStatusWatcher(self.tenant, poll_interval=60)
+        self.openstack.servers.get_list.return_value = [
+            SimpleNamespace(id="s1", status="ACTIVE"),
+            SimpleNamespace(id="s2", status="ACTIVE"),
+        ]
+        self.openstack.volumes.get_list.return_value = [
+            SimpleNamespace(id="v1", status="available")
+        ]
+        statuses = watcher.get_statuses()
+        self.assertEqual(len(watcher.get_events(statuses)), 3)
+        watcher.statuses = statuses
+        self.openstack.servers.get_list.return_value = [
+            SimpleNamespace(id="s1", status="SHUTOFF")
+        ]
+        events = watcher.get_events(watcher.get_statuses())
+        self.assertCountEqual(
+            [(event["type"], event["id"], event["status"]) for event in events],
+            [("instance", "s1", "SHUTOFF"), ("instance", "s2", "DELETED")],
+        )
+
+    def test_failed_polls_are_logged(self):
+        """Are failed polls logged (and retried), with the database connection closed when the watcher stops?"""
+        watcher = TenantStatusWatcher(self.tenant, poll_interval=0)
+        polls = []
+
+        def poll():
+            polls.append(None)
+            if len(polls) == 2:
+                watcher.stop()
+            raise Exception("Openstack unavailable")
+
+        with mock.patch.object(watcher, "poll", side_effect=poll), mock.patch(
+            "openstack.status_events.connection"
+        ) as connection, mock.patch("openstack.status_events.logger") as logger:
+            watcher.run()
+
+        self.assertEqual(len(polls), 2)
+        self.assertEqual(logger.exception.call_count, 2)
+        connection.close.assert_called_once()
+
+    def test_watcher_is_shared_and_stopped_with_last_subscriber(self):
+        """Is a single watcher shared by subscribers, and stopped when the last unsubscribes?"""
+        registry = StatusWatcherRegistry()
+        first = registry.subscribe(self.tenant)
+        second = registry.subscribe(self.tenant)
+        watcher = registry.get_watcher(self.tenant)
+        self.assertEqual(watcher.subscribers, {first, second})
+
+        registry.unsubscribe(self.tenant, first)
+        self.assertIs(registry.get_watcher(self.tenant), watcher)
+        registry.unsubscribe(self.tenant, second)
+        self.assertIsNone(registry.get_watcher(self.tenant))
+        self.assertTrue(watcher._stopped.is_set())
+
+    def test_event_stream_subscribes_until_closed(self):
+        """Does the event stream endpoint subscribe to the tenant watcher, until the stream is closed?"""
+        self.client.force_login(user=self.user)
+        url = reverse(
+            "api:tenant_events",
+            kwargs={"team_id": self.tenant.team_id, "tenant_id": self.tenant.pk},
+        )
+        response = self.client.get(url, HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(next(response.streaming_content), b"retry: 60000\n\n")
+        self.assertIsNotNone(status_watchers.get_watcher(self.tenant))
+        response.close()
+        self.assertIsNone(status_watchers.get_watcher(self.tenant))
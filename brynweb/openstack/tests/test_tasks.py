@@ -0,0 +1,263 @@
+import datetime
+import uuid
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import outbox
+from userdb.models import TeamMember
+from userdb.tests.factories import UserFactory
+from .. import catalog, snapshots
+from ..models import ServerLease, ServerProvisioningJob
+from ..service import OpenstackException
+from ..tasks import (
+    provision_server,
+    reconcile_server_leases,
+    schedule_task,
+    send_server_lease_expiry_reminder_emails,
+    sync_server_snapshots,
+    update_region_catalogs,
+)
+from .factories import (
+    KeyPairFactory,
+    RegionFactory,
+    RegionSettingsFactory,
+    TenantFactory,
+)
+
+
+class ImmediateTimer:
+    """Stand-in for threading.Timer, running a task scheduled by tasks.schedule_task on the calling thread"""
+
+    def __init__(self, interval, function, args):
+        self.task, self.task_args = args
+
+    def start(self):
+        self.task.call_local(*self.task_args)
+
+
+class TestScheduleTask(TestCase):
+    def test_task_is_not_run_on_calling_thread(self):
+        """Without a consumer, is a scheduled task run from a timer thread (rather than blocking the caller)?"""
+        task = mock.Mock()
+        with mock.patch("openstack.tasks.threading.Timer") as timer:
+            schedule_task(task, ("arg",), 30)
+        self.assertEqual(timer.call_args[0][0], 30)
+        timer.return_value.start.assert_called_once_with()
+        task.call_local.assert_not_called()
+        task.schedule.assert_not_called()
+
+
+def fail_for_unreachable_region(region, *args):
+    if region.name == "unreachable":
+        raise Exception("Region unreachable")
+
+
+@mock.patch("openstack.tasks.logger")
+class TestRegionTasks(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.unreachable_region = RegionFactory(name="unreachable")
+        cls.region = RegionFactory(name="warwick")
+
+    def test_catalog_refresh_failure_is_isolated(self, logger):
+        """Are later regions' catalogs still refreshed when a region fails?"""
+        with mock.patch(
+            "openstack.tasks.catalog.refresh", side_effect=fail_for_unreachable_region
+        ) as refresh:
+            update_region_catalogs.call_local()
+        self.assertEqual(
+            [call[0] for call in refresh.call_args_list if call[0][0] == self.region],
+            [(mock.ANY, name) for name in catalog.CATALOG_FETCHERS],
+        )
+        self.assertEqual(logger.exception.call_count, len(catalog.CATALOG_FETCHERS))
+
+    def test_snapshot_sync_failure_is_isolated(self, logger):
+        """Are later regions' snapshots still synced when a region fails?"""
+        with mock.patch(
+            "openstack.tasks.snapshots.sync", side_effect=fail_for_unreachable_region
+        ) as sync:
+            sync_server_snapshots.call_local()
+        self.assertIn(mock.call(self.region), sync.call_args_list)
+        logger.exception.assert_called_once()
+
+    def test_reconciliation_failure_is_isolated(self, logger):
+        """Are later regions' leases still reconciled when a region fails?"""
+        with mock.patch(
+            "openstack.tasks.reconciliation.reconcile",
+            side_effect=fail_for_unreachable_region,
+        ) as reconcile:
+            reconcile_server_leases.call_local()
+        self.assertIn(mock.call(self.region), reconcile.call_args_list)
+        logger.exception.assert_called_once()
+
+    def test_region_still_syncing_is_skipped(self, logger):
+        """Is a region skipped while a previous snapshot sync holds its lock?"""
+        with snapshots.region_lock(self.unreachable_region.pk), mock.patch(
+            "openstack.tasks.snapshots.sync"
+        ) as sync:
+            sync_server_snapshots.call_local()
+        self.assertNotIn(mock.call(self.unreachable_region), sync.call_args_list)
+        self.assertIn(mock.call(self.region), sync.call_args_list)
+
+
+@mock.patch("openstack.tasks.threading.Timer", ImmediateTimer)
+class TestProvisionServer(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region_settings = RegionSettingsFactory()
+        cls.tenant = TenantFactory(region=region_settings.region)
+        cls.user = UserFactory()
+        cls.teammember = TeamMember.objects.create(team=cls.tenant.team, user=cls.user)
+        cls.keypair = KeyPairFactory(user=cls.user)
+
+    def setUp(self):
+        patcher = mock.patch("openstack.tasks.OpenstackService")
+        self.openstack = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.server_id = str(uuid.uuid4())
+        self.openstack.servers.create_boot_volume.return_value = mock.Mock(id="vol")
+        self.openstack.servers.boot.return_value = mock.Mock(id=self.server_id)
+        self.job = ServerProvisioningJob.objects.create(
+            tenant=self.tenant,
+            user=self.user,
+            name="server",
+            flavor="flavor",
+            image="image",
+            keypair=self.keypair,
+        )
+
+    def test_job_completes_and_creates_lease(self):
+        """Does a job run through to completion, creating a lease for the launching user?"""
+        self.openstack.servers.boot_volume_is_ready.side_effect = [False, True]
+        provision_server.call_local(self.job.pk)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, ServerProvisioningJob.Status.COMPLETE)
+        self.assertEqual(self.job.server_id, self.server_id)
+        self.assertEqual(self.job.volume_checks, 1)
+        lease = ServerLease.objects.get(server_id=self.server_id)
+        self.assertEqual(lease.assigned_teammember, self.teammember)
+
+    def test_job_failure_is_recorded(self):
+        """Is an openstack error recorded on the job, without booting a server?"""
+        self.openstack.servers.boot_volume_is_ready.side_effect = OpenstackException(
+            "Boot volume creation failed."
+        )
+        provision_server.call_local(self.job.pk)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, ServerProvisioningJob.Status.FAILED)
+        self.assertEqual(self.job.error, "Boot volume creation failed.")
+        self.openstack.servers.boot.assert_not_called()
+
+    def test_lease_falls_back_to_team_admin(self):
+        """Is the lease assigned to a team admin, if the launching user has left the team?"""
+        admin = TeamMember.objects.create(
+            team=self.tenant.team, user=UserFactory(), is_admin=True
+        )
+        TeamMember.objects.filter(pk=self.teammember.pk).delete()
+        self.openstack.servers.boot_volume_is_ready.return_value = True
+        provision_server.call_local(self.job.pk)
+        lease = ServerLease.objects.get(server_id=self.server_id)
+        self.assertEqual(lease.assigned_teammember, admin)
+
+    @mock.patch("openstack.tasks.logger")
+    def test_lease_failure_does_not_fail_job(self, logger):
+        """Does a booted server's job complete (with a warning) if no lease can be assigned?"""
+        TeamMember.objects.filter(pk=self.teammember.pk).delete()
+        self.openstack.servers.boot_volume_is_ready.return_value = True
+        provision_server.call_local(self.job.pk)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, ServerProvisioningJob.Status.COMPLETE)
+        self.assertEqual(self.job.server_id, self.server_id)
+        self.assertIn("lease could not be assigned", self.job.error)
+        self.assertFalse(ServerLease.objects.filter(server_id=self.server_id).exists())
+        logger.exception.assert_called_once()
+
+    @override_settings(SERVER_PROVISIONING_MAX_VOLUME_CHECKS=3)
+    def test_job_times_out_waiting_for_volume(self):
+        """Does a job fail if the boot volume never becomes available?"""
+        self.openstack.servers.boot_volume_is_ready.return_value = False
+        provision_server.call_local(self.job.pk)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, ServerProvisioningJob.Status.FAILED)
+        self.assertEqual(self.job.volume_checks, 3)
+
+
+@override_settings(SERVER_LEASE_REMINDER_DAYS=[0, 3, 5], SERVER_LEASE_TIMERS=False)
+class TestServerLeaseReminders(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = TenantFactory()
+        cls.teammember = TeamMember.objects.create(
+            team=cls.tenant.team, user=UserFactory()
+        )
+
+    def create_lease(self, expires_in, reminded_ago=None, **kwargs):
+        now = timezone.now()
+        return ServerLease.objects.create(
+            server_id=uuid.uuid4(),
+            tenant=self.tenant,
+            expiry=now + expires_in,
+            last_reminder_sent_at=now - reminded_ago if reminded_ago else None,
+            **{
+                "server_name": "server",
+                "assigned_teammember": self.teammember,
+                **kwargs,
+            },
+        )
+
+    def test_due_for_reminder_matches_reminder_days(self):
+        """Are only active leases with a reminder day remaining, not reminded in the last 24 hours, selected?"""
+        hours = datetime.timedelta(hours=1)
+        days = datetime.timedelta(days=1)
+        due = [
+            self.create_lease(hours),
+            self.create_lease(3 * days + hours),
+            self.create_lease(5 * days + 23 * hours, reminded_ago=2 * days),
+        ]
+        self.create_lease(2 * days + hours)
+        self.create_lease(6 * days + hours)
+        self.create_lease(-hours)
+        self.create_lease(3 * days + hours, reminded_ago=2 * hours)
+        self.create_lease(hours, shelved=True)
+        self.assertCountEqual(ServerLease.objects.due_for_reminder(), due)
+
+    @override_settings(SERVER_LEASE_REMINDER_DIGEST=False)
+    def test_reminders_sent_for_due_leases(self):
+        """Does the periodic task send a reminder for each due lease?"""
+        due = self.create_lease(datetime.timedelta(days=3, hours=1))
+        self.create_lease(datetime.timedelta(days=2, hours=1))
+        with mock.patch.object(
+            ServerLease, "send_email_renewal_reminder", autospec=True
+        ) as send_reminder:
+            send_server_lease_expiry_reminder_emails.call_local()
+        send_reminder.assert_called_once_with(due)
+
+    @override_settings(SERVER_LEASE_REMINDER_DIGEST=True)
+    def test_reminder_digest_sent_per_user(self):
+        """Is a single reminder sent to each user, listing all their due leases?"""
+        other_teammember = TeamMember.objects.create(
+            team=self.tenant.team, user=UserFactory()
+        )
+        expires_in = datetime.timedelta(days=3, hours=1)
+        due = [
+            self.create_lease(expires_in, server_name="alpha"),
+            self.create_lease(expires_in, server_name="beta"),
+            self.create_lease(expires_in, assigned_teammember=other_teammember),
+        ]
+        mail.outbox = []  # i.e. excluding email validation links
+        send_server_lease_expiry_reminder_emails.call_local()
+        outbox.flush()
+        self.assertEqual(len(mail.outbox), 2)
+        digest = next(
+            message
+            for message in mail.outbox
+            if message.to == [self.teammember.user.email]
+        )
+        self.assertIn("'alpha'", digest.body)
+        self.assertIn("'beta'", digest.body)
+        for lease in due:
+            lease.refresh_from_db()
+            self.assertIsNotNone(lease.last_reminder_sent_at)
@@ -3,7 +3,8 @@ from django.shortcuts import get_object_or_404
 
 from rest_framework import exceptions, generics, permissions
 
-from .models import Invitation, LicenceAcceptance, LicenceVersion, Team, TeamMember
+from .context import get_team_context
+from .models import Invitation, LicenceAcceptance, LicenceVersion, TeamMember
 from .permissions import (
     IsTeamAdminForUnsafePermission,
     IsTeamMemberPermission,
@@ -52,9 +53,8 @@ class TeamMemberListView(generics.ListAPIView):
     ]
 
     def get_queryset(self):
-        team_id = self.kwargs.get("team_id")
-        teams = get_teams_for_user(self.request.user, team=team_id)
-        return TeamMember.objects.filter(team__in=teams)
+        team = get_team_context(self.request).team
+        return TeamMember.objects.filter(team=team).select_related("user")
 
 
 class TeamMemberDetailView(generics.RetrieveDestroyAPIView):
@@ -94,15 +94,14 @@ class InvitationListView(generics.ListCreateAPIView):
     ]
 
     def get_queryset(self):
-        team_id = self.kwargs.get("team_id")
-        teams = get_teams_for_user(self.request.user, team=team_id)
-        return Invitation.objects.filter(to_team__in=teams, accepted=False)
+        team = get_team_context(self.request).team
+        return Invitation.objects.filter(to_team=team, accepted=False)
 
     def perform_create(self, serializer):
         """
         Set to_team from url resolver
         """
-        team = get_object_or_404(Team, pk=self.request.resolver_match.kwargs["team_id"])
+        team = get_team_context(self.request).team
         invitation = serializer.save(to_team=team)
         invitation.send_invitation_email()
 
@@ -154,15 +153,14 @@ class LicenceAcceptanceListView(generics.ListCreateAPIView):
     ]
 
     def get_queryset(self):
-        team_id = self.kwargs.get("team_id")
-        teams = get_teams_for_user(self.request.user, team=team_id)
-        return LicenceAcceptance.objects.filter(team__in=teams)
+        team = get_team_context(self.request).team
+        return LicenceAcceptance.objects.filter(team=team)
 
     def perform_create(self, serializer):
         """
         Set team from url resolver, user from request
         """
-        team = get_object_or_404(Team, pk=self.request.resolver_match.kwargs["team_id"])
+        team = get_team_context(self.request).team
         try:
             licence_version = LicenceVersion.objects.current()
         except LicenceVersion.DoesNotExist:
@@ -0,0 +1,95 @@
+"""
+Request-scoped team context.
+
+Endpoints under teams/<team_id>/ need the team & the user's membership, and tenant endpoints (.../tenants/<tenant_id>/)
+also need the tenant, with its region & region settings. These are resolved from the URL kwargs in a single joined
+query, and memoized on the request, so permission classes & views share them.
+"""
+
+from django.db.models import F
+
+from rest_framework import exceptions
+
+from openstack.models import Tenant
+from .models import Team, TeamMember
+
+
+class TeamContext:
+    """
+    Team, the user's membership (None if not a member) & tenant (None if not requested, not found, or not a member).
+    """
+
+    def __init__(self, team, membership=None, tenant=None):
+        self.team = team
+        self.membership = membership
+        self.tenant = tenant
+
+    @property
+    def is_member(self):
+        return self.membership is not None
+
+    @property
+    def is_admin(self):
+        return self.is_member and self.membership.is_admin
+
+
+def resolve_tenant_context(user, team_id, tenant_id):
+    """Team context for a tenant, joining team, membership, region & region settings; None if not a member"""
+    tenant = (
+        Tenant.objects.filter(pk=tenant_id, team=team_id, team__memberships__user=user)
+        .annotate(
+            membership_id=F("team__memberships__id"),
+            membership_is_admin=F("team__memberships__is_admin"),
+        )
+        .select_related("team", "region__regionsettings")
+        .first()
+    )
+    if tenant is None:
+        return None
+    membership = TeamMember(
+        id=tenant.membership_id,
+        team=tenant.team,
+        user=user,
+        is_admin=tenant.membership_is_admin,
+    )
+    return TeamContext(tenant.team, membership, tenant)
+
+
+def resolve_team_context(user, team_id):
+    """Team context for a team; None if the team doesn't exist"""
+    membership = (
+        TeamMember.objects.filter(team=team_id, user=user)
+        .select_related("team")
+        .first()
+    )
+    if membership:
+        return TeamContext(membership.team, membership)
+
+    # Not a member (so only queried for rejected requests)
+    team = Team.objects.filter(pk=team_id).first()
+    return TeamContext(team) if team else None
+
+
+def get_team_context(request):
+    """
+    Return the TeamContext for a request's team_id (& tenant_id) URL kwargs, memoized on the request.
+    Raises NotFound if the team doesn't exist.
+    """
+    try:
+        return request._team_context
+    except AttributeError:
+        pass
+
+    kwargs = request.resolver_match.kwargs
+    context = None
+    if kwargs.get("tenant_id") is not None:
+        context = resolve_tenant_context(
+            request.user, kwargs["team_id"], kwargs["tenant_id"]
+        )
+    if context is None:  # Team endpoint, or tenant not found
+        context = resolve_team_context(request.user, kwargs["team_id"])
+    if context is None:
+        raise exceptions.NotFound  # No team
+
+    request._team_context = context
+    return context
@@ -14,6 +14,7 @@ from phonenumber_field.modelfields import PhoneNumberField
 from tinymce import models as tinymce_models
 
 from core import hashids
+from core import outbox
 from core.tasks import send_mail
 from core.utils import main_text_from_html
 from .tokens import account_activation_token
@@ -207,13 +208,15 @@ class Team(models.Model):
                     context,
                 )
             text_content = main_text_from_html(html_content)
-            send_mail(
+            outbox.queue(
                 subject,
                 text_content,
                 settings.DEFAULT_FROM_EMAIL,
                 [user.email],
                 html_message=html_content,
-                fail_silently=True,
+                dedupe_key=(
+                    f"team_licence_reminder:{self.pk}:{user.pk}:{timezone.now():%Y-%m-%d}"
+                ),
             )
 
         # Update team
@@ -277,13 +280,13 @@ class Invitation(models.Model):
         html_content = render_to_string("userdb/email/user_invite_email.html", context)
         text_content = main_text_from_html(html_content)
 
-        send_mail(
+        # No dedupe key, since invitations may be resent
+        outbox.queue(
             subject,
             text_content,
             settings.DEFAULT_FROM_EMAIL,
             [self.email],
             html_message=html_content,
-            fail_silently=False,
         )
 
     def __str__(self):
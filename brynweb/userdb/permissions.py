@@ -1,6 +1,6 @@
-from rest_framework import permissions, exceptions
+from rest_framework import permissions
 
-from .models import Team, TeamMember
+from .context import get_team_context
 
 
 class IsTeamAdminPermission(permissions.BasePermission):
@@ -12,15 +12,7 @@ class IsTeamAdminPermission(permissions.BasePermission):
         """
         Check whether the current user is admin for the team.
         """
-        try:
-            team_id = request.resolver_match.kwargs["team_id"]
-            Team.objects.get(pk=team_id)
-            team_member = TeamMember.objects.get(team=team_id, user=request.user)
-        except Team.DoesNotExist:
-            raise exceptions.NotFound  # No team
-        except TeamMember.DoesNotExist:
-            return False  # Team exists, but user is not a member
-        return team_member.is_admin
+        return get_team_context(request).is_admin  # May raise NotFound (no team)
 
 
 class IsTeamAdminForUnsafePermission(IsTeamAdminPermission):
@@ -43,12 +35,4 @@ class IsTeamMemberPermission(permissions.BasePermission):
         """
         Check whether the current user is a member of the team.
         """
-        try:
-            team_id = request.resolver_match.kwargs["team_id"]
-            Team.objects.get(pk=team_id)
-            TeamMember.objects.get(team=team_id, user=request.user)
-            return True
-        except Team.DoesNotExist:
-            raise exceptions.NotFound  # No team
-        except TeamMember.DoesNotExist:
-            return False  # Team exists, but user is not a member
+        return get_team_context(request).is_member  # May raise NotFound (no team)
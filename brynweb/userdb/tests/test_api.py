@@ -350,6 +350,18 @@ class TestTeamMemberAPI(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_team_context_is_resolved_once(self):
+        """Is the team & membership fetched in a single query, shared by all permission classes?"""
+        self.client.force_login(user=self.team_a_member1)
+        with self.assertNumQueries(4):  # Session, user, team context & team members
+            self.client.get(reverse(self.path_name, kwargs={"team_id": self.team_a.pk}))
+
+    def test_missing_team_is_not_found(self):
+        """Is a request for a team which doesn't exist not found?"""
+        self.client.force_login(user=self.team_a_member1)
+        response = self.client.get(reverse(self.path_name, kwargs={"team_id": 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_anon_user_cannot_view_team_member_detail(self):
         """Are non-authenticated users forbidden from viewing team member detail?"""
         teammember = TeamMember.objects.get(user=self.team_a_admin, team=self.team_a)